@@ -1,16 +1,56 @@
 # backend/app.py
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 import uuid
+import time
+import codecs
+import asyncio
 import logging
 
-from config import MODEL_VERSION
+from config import (
+    MODEL_VERSION,
+    MAX_BATCH_SIZE,
+    MAX_CONTENT_LENGTH,
+    STREAM_CHUNK_CHARS,
+    STREAM_MAX_BYTES,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL,
+    PREDICTION_CACHE_RAW_TIER,
+    HISTORY_WRITER_ENABLED,
+    INFERENCE_WORKERS,
+    INFERENCE_TIMEOUT,
+    DB_WORKERS,
+    DB_TIMEOUT,
+    MICRO_BATCH_WINDOW_MS,
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_MAX_INFLIGHT,
+    MICRO_BATCH_MAX_QUEUE,
+    METADATA_PATH,
+    ADMIN_TOKEN,
+    MODEL_WATCH_INTERVAL,
+    NEAR_DUP_ENABLED,
+    NEAR_DUP_THRESHOLD,
+    NEAR_DUP_NUM_PERM,
+    NEAR_DUP_MAX_ENTRIES,
+    ONLINE_LEARNER_INTERVAL,
+    HISTORY_COMPACT_INTERVAL,
+)
 import db
-from preprocessing import preprocess_for_vectorizer
-from inference import ModelServer, ModelNotLoadedError
+from history_maintenance import HistoryCompactor
+from cache import PredictionCache
+from executors import StageExecutor, StageTimeoutError
+from micro_batch import MicroBatcher, QueueFullError
+import metrics
+import preprocessing
+from preprocessing import StreamingPreprocessor, preprocess_fast
+from inference import ModelServer, ModelNotLoadedError, TOP_K_TOKENS
+from model_manager import MetadataWatcher, ModelManager, ReloadInProgressError
+from near_dup import NearDuplicateIndex
+from online_learner import OnlineLearner
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -24,15 +64,159 @@ app.add_middleware(
     allow_methods=["*"],  # allow POST, GET, OPTIONS, etc.
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Load stopword/lemma data and warm the pipeline before reporting ready
+try:
+    preprocessing.warm_up()
+    preprocessing_ready = True
+except Exception:
+    logger.exception("Preprocessing warm-up failed")
+    preprocessing_ready = False
 
 # Init DB and model server
 db.init_db()
+if HISTORY_WRITER_ENABLED:
+    db.start_writer()  # history inserts leave the request path
 model_server = ModelServer()  # attempts to load tfidf + model at startup
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL, raw_tier=PREDICTION_CACHE_RAW_TIER
+)
+
+# Near-duplicate index over past predictions, rebuilt from the history DB
+near_dup_index = None
+if NEAR_DUP_ENABLED:
+    near_dup_index = NearDuplicateIndex(NEAR_DUP_THRESHOLD, NEAR_DUP_NUM_PERM, NEAR_DUP_MAX_ENTRIES)
+    try:
+        logger.info("Near-duplicate index: loaded %d signatures", near_dup_index.load(db.fetch_minhash_rows(NEAR_DUP_MAX_ENTRIES)))
+    except Exception:
+        logger.exception("Failed to rebuild near-duplicate index from history")
+
+
+def _index_written_predictions(records) -> None:
+    """Index signatures once their history rows are committed, so duplicate_of never names an unwritten row."""
+    near_dup_index.load(
+        (r["prediction_id"], r["label"], r["probability"], r["top_tokens"], r["model_version"], r["minhash"])
+        for r in records if r.get("minhash") is not None
+    )
+
+
+if near_dup_index is not None:
+    db.on_history_written(_index_written_predictions)
+
+
+def _prune_near_dup_index(result) -> None:
+    """Drop index entries whose history rows compaction deleted, so duplicate_of never names a missing row."""
+    indexed = near_dup_index.prediction_ids()
+    db.flush_writer()  # rows of indexed predictions still queued are not deleted ones
+    removed = near_dup_index.remove(set(indexed) - db.existing_prediction_ids(indexed))
+    logger.info("Near-duplicate index: dropped %d entries of deleted history rows", removed)
+
+
+history_compactor = None
+if HISTORY_COMPACT_INTERVAL > 0:
+    history_compactor = HistoryCompactor(  # retention + VACUUM
+        HISTORY_COMPACT_INTERVAL, on_compact=_prune_near_dup_index if near_dup_index is not None else None
+    )
+    history_compactor.start()
+
+
+def _install_model(server: ModelServer) -> None:
+    # Requests read model_server once, so a swap never mixes two models in one response
+    global model_server
+    model_server = server
+    prediction_cache.clear()  # a retrained model may reuse the version string
+    if near_dup_index is not None:
+        near_dup_index.clear()
+
+
+model_manager = ModelManager(model_server, on_swap=_install_model)
+metadata_watcher = None
+if MODEL_WATCH_INTERVAL > 0:
+    metadata_watcher = MetadataWatcher(METADATA_PATH, MODEL_WATCH_INTERVAL, model_manager.reload)
+    metadata_watcher.start()
+
+
+def _reload_after_online_update(version: str) -> None:
+    try:
+        model_manager.reload()
+    except ReloadInProgressError:
+        logger.info("Online model %s published; a reload is already running", version)
+
+
+# In-process online learner (single-worker deployments; otherwise run online_learner.py)
+online_learner = None
+if ONLINE_LEARNER_INTERVAL > 0:
+    online_learner = OnlineLearner()
+    online_learner.start(ONLINE_LEARNER_INTERVAL, on_publish=_reload_after_online_update)
+
+# Blocking work runs off the event loop, on pools sized per stage
+inference_executor = StageExecutor("inference", INFERENCE_WORKERS, timeout=INFERENCE_TIMEOUT)
+db_executor = StageExecutor("db", DB_WORKERS, timeout=DB_TIMEOUT)
+# Concurrent single predictions share predict_batch calls when workers are busy
+micro_batcher = None
+if MICRO_BATCH_WINDOW_MS > 0:
+    micro_batcher = MicroBatcher(
+        inference_executor, MICRO_BATCH_WINDOW_MS / 1000, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_INFLIGHT,
+        max_queue=MICRO_BATCH_MAX_QUEUE, timeout=INFERENCE_TIMEOUT,
+    )
+
+
+def _runtime_gauges():
+    samples = {}
+    for name, executor in (("inference", inference_executor), ("db", db_executor)):
+        stats = executor.stats()
+        samples[("executor_active", name)] = stats["active"]
+        samples[("executor_queue_depth", name)] = stats["queue_depth"]
+        samples[("executor_timeouts", name)] = stats["timeouts"]
+    if micro_batcher is not None:
+        samples[("micro_batch_queue_depth", "inference")] = micro_batcher.stats()["queue_depth"]
+    if near_dup_index is not None:
+        near_stats = near_dup_index.stats()
+        samples[("near_dup_entries", "index")] = near_stats["entries"]
+        samples[("near_dup_hits", "index")] = near_stats["hits"]
+    cache_stats = prediction_cache.stats()
+    for tier in ("results", "raw"):
+        tier_stats = cache_stats.get(tier) or {}
+        samples[("cache_hits", tier)] = tier_stats.get("hits")
+        samples[("cache_misses", tier)] = tier_stats.get("misses")
+    writer = db.writer_stats()
+    if writer is not None:
+        samples[("history_queue_depth", "writer")] = writer["queue_depth"]
+        samples[("history_dropped", "writer")] = writer["dropped"]
+    return samples
+
+
+metrics.REGISTRY.register(metrics.GaugeCallback(
+    "fakenews_runtime", "Executor, prediction cache and history writer state.", ("metric", "component"), _runtime_gauges
+))
+
+
+TITLE_MAX_LENGTH = 500
+CONTENT_MAX_LENGTH = MAX_CONTENT_LENGTH
+MAX_TOP_K = 50
+MAX_HISTORY_LIMIT = 500
+MAX_SEARCH_LIMIT = 100
+MAX_SEARCH_OFFSET = 10000
 
 
 class PredictRequest(BaseModel):
-    title: Optional[str] = Field(None, max_length=500)
-    content: str = Field(..., min_length=1, max_length=20000)
+    title: Optional[str] = Field(None, max_length=TITLE_MAX_LENGTH)
+    content: str = Field(..., min_length=1, max_length=CONTENT_MAX_LENGTH)
+    top_k: int = Field(TOP_K_TOKENS, ge=0, le=MAX_TOP_K)
+    include_scores: bool = False
+
+
+class BatchPredictItem(BaseModel):
+    # Lengths are checked per item so one bad article does not reject the batch
+    title: Optional[str] = None
+    content: str
+
+
+class BatchPredictRequest(BaseModel):
+    items: List[BatchPredictItem] = Field(..., min_items=1, max_items=MAX_BATCH_SIZE)
+    top_k: int = Field(TOP_K_TOKENS, ge=0, le=MAX_TOP_K)
+    include_scores: bool = False
 
 
 class PredictResponse(BaseModel):
@@ -41,71 +225,588 @@ class PredictResponse(BaseModel):
     probability: float
     model_version: str
     top_tokens: Optional[List[str]] = None
+    token_scores: Optional[List[float]] = None
     created_at: str
+    # Set when the result was reused from a near-duplicate earlier prediction
+    duplicate_of: Optional[str] = None
+    similarity: Optional[float] = None
+
+
+class FeedbackRequest(BaseModel):
+    prediction_id: str = Field(..., min_length=1, max_length=64)
+    label: str = Field(..., regex="^(FAKE|REAL)$")
+
+
+class FeedbackResponse(BaseModel):
+    prediction_id: str
+    verified_label: str
+    verified_at: str
+    feedback_seq: int
+
+
+class BatchPredictResult(BaseModel):
+    index: int
+    result: Optional[PredictResponse] = None
+    error: Optional[str] = None
+
+
+class BatchPredictResponse(BaseModel):
+    items: List[BatchPredictResult]
+    model_version: str
+
+
+def _text_for_model(title: Optional[str], content: str) -> str:
+    text_for_model = title + " " + content if title else content
+    return text_for_model.strip()
+
+
+def _validate_batch_item(item: BatchPredictItem) -> Optional[str]:
+    if item.title is not None and len(item.title) > TITLE_MAX_LENGTH:
+        return f"title exceeds {TITLE_MAX_LENGTH} characters"
+    if len(item.content) > CONTENT_MAX_LENGTH:
+        return f"content exceeds {CONTENT_MAX_LENGTH} characters"
+    if not _text_for_model(item.title, item.content):
+        return "Empty content after trimming."
+    return None
+
+
+def _round_scores(token_scores: Optional[List[float]]) -> Optional[List[float]]:
+    if token_scores is None:
+        return None
+    return [round(float(c), 6) for c in token_scores]
+
+
+def _history_record(title: Optional[str], content: str, response: PredictResponse, minhash=None) -> dict:
+    return {
+        "prediction_id": response.prediction_id,
+        "title": title,
+        "content": content,
+        "label": response.label,
+        "probability": response.probability,
+        "model_version": response.model_version,
+        "top_tokens": response.top_tokens,
+        "created_at": response.created_at,
+        "minhash": minhash.tobytes() if minhash is not None else None,
+    }
+
+
+def _near_duplicate(signature, model_version: str, top_k: int):
+    """Earlier (prediction, match) that can stand in for this article, or None."""
+    match = near_dup_index.query(signature, model_version)
+    if match is None:
+        return None
+    entry = match[0]
+    if top_k and (entry.top_tokens is None or len(entry.top_tokens) < top_k):
+        return None  # stored explanation is shorter than requested; score afresh
+    return (entry.label, entry.probability, entry.top_tokens[:top_k] if top_k else []), match
+
+
+def _prepare_inference(text_for_model: str, model_version: str, top_k: int, include_scores: bool):
+    """
+    Preprocess one article and look it up in the near-duplicate index and the
+    prediction cache (blocking). Returns (prediction or None when it still
+    has to be scored, minhash signature, near-duplicate match or None,
+    preprocessed text, cache key).
+    """
+    prediction_cache.ensure_version(model_version)
+
+    # Preprocess (returns string normalized for vectorizer)
+    prepped = prediction_cache.get_preprocessed(text_for_model)
+    if prepped is None:
+        start = time.perf_counter()
+        prepped = preprocess_fast(text_for_model)
+        metrics.observe_stage("preprocess", time.perf_counter() - start)
+        prediction_cache.put_preprocessed(text_for_model, prepped)
+
+    signature = None
+    if near_dup_index is not None:
+        start = time.perf_counter()
+        signature = near_dup_index.signature(prepped)
+        # token_scores are not kept in the index, so those requests always score
+        reused = None
+        if signature is not None and not include_scores:
+            reused = _near_duplicate(signature, model_version, top_k)
+        metrics.observe_stage("near_dup", time.perf_counter() - start)
+        if reused is not None:
+            return reused[0], signature, reused[1], prepped, None
+
+    cache_key = prediction_cache.key(prepped, model_version, top_k, include_scores)
+    return prediction_cache.get(cache_key), signature, None, prepped, cache_key
+
+
+def _run_inference(server, text_for_model: str, model_version: str, top_k: int, include_scores: bool):
+    """
+    Preprocess + predict one article (blocking). Returns (prediction,
+    minhash signature, near-duplicate match or None).
+    """
+    prediction, signature, duplicate, prepped, cache_key = _prepare_inference(
+        text_for_model, model_version, top_k, include_scores
+    )
+    if prediction is None:
+        if include_scores:
+            prediction = server.predict(prepped, top_k=top_k, return_scores=True)
+        else:
+            prediction = server.predict(prepped, top_k=top_k)
+        prediction_cache.put(cache_key, prediction)
+    return prediction, signature, duplicate
+
+
+def _run_batch_inference(server, items: List[BatchPredictItem], top_k: int):
+    """
+    Validate + preprocess each item, then score the valid ones in one call (blocking).
+    Returns (errors by index, indexes that were scored, predictions).
+    """
+    errors = {}
+    pending_idx: List[int] = []
+    pending_text: List[str] = []
+    for i, item in enumerate(items):
+        error = _validate_batch_item(item)
+        if error is None:
+            try:
+                text_for_model = _text_for_model(item.title, item.content)
+                metrics.INPUT_LENGTH.observe(len(text_for_model), "batch")
+                start = time.perf_counter()
+                pending_text.append(preprocess_fast(text_for_model))
+                metrics.observe_stage("preprocess", time.perf_counter() - start)
+                pending_idx.append(i)
+                continue
+            except Exception as e:
+                logger.exception("Error preprocessing batch item %d", i)
+                error = f"Preprocessing failed: {str(e)}"
+        errors[i] = error
+
+    predictions = server.predict_batch(pending_text, top_k=top_k, return_scores=True)
+    return errors, pending_idx, predictions
+
+
+def _feed_stream(preprocessor: StreamingPreprocessor, accumulator, text: Optional[str]) -> None:
+    """Preprocess the next piece of a streamed article into its term accumulator (blocking); None flushes."""
+    start = time.perf_counter()
+    tokens = preprocessor.feed(text) if text is not None else preprocessor.finish()
+    metrics.observe_stage("preprocess", time.perf_counter() - start)
+    accumulator.add(" ".join(tokens))
+
+
+def _finish_stream(server, preprocessor: StreamingPreprocessor, accumulator, top_k: int, include_scores: bool):
+    _feed_stream(preprocessor, accumulator, None)
+    return server.predict_accumulated(accumulator, top_k=top_k, return_scores=include_scores)
 
 
 @app.get("/api/v1/health")
-def health():
+async def health():
     return {
         "status": "ok",
+        "ready": bool(preprocessing_ready and model_server.loaded),
+        "preprocessing_ready": preprocessing_ready,
+        "preprocessing_source": preprocessing.RESOURCE_SOURCE,
         "model_loaded": model_server.loaded,
         "model_version": model_server.model_version if model_server.loaded else None,
+        "artifact_format": getattr(model_server, "artifact_format", None),
+        "vectorizer": getattr(model_server, "vectorizer_kind", None),
+        "scorer": getattr(model_server, "scorer_kind", None),
+        "model_reload": model_manager.status(),
+        "online_learner": online_learner.status() if online_learner is not None else None,
+        "prediction_cache": prediction_cache.stats(),
+        "history_writer": db.writer_stats(),
+        "history_compactor": history_compactor.stats() if history_compactor is not None else None,
+        "micro_batcher": micro_batcher.stats() if micro_batcher is not None else None,
+        "executors": {
+            "inference": inference_executor.stats(),
+            "db": db_executor.stats(),
+        },
     }
 
 
+@app.get("/api/v1/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _require_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ADMIN_TOKEN).")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+@app.get("/api/v1/admin/model")
+async def admin_model_status(x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    return model_manager.status()
+
+
+@app.post("/api/v1/admin/reload", status_code=202)
+async def admin_reload(
+    wait: bool = Query(False, description="Block until the new model is serving"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Load the artifacts on disk in the background, warm up, then swap atomically."""
+    _require_admin(x_admin_token)
+    try:
+        started = model_manager.reload()
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if wait and started:
+        if not await asyncio.get_running_loop().run_in_executor(None, model_manager.wait):
+            raise HTTPException(status_code=500, detail=f"Reload failed: {model_manager.last_error}")
+    return model_manager.status()
+
+
+@app.post("/api/v1/admin/rollback")
+async def admin_rollback(x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    try:
+        model_manager.rollback()
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return model_manager.status()
+
+
+@app.post("/api/v1/feedback", response_model=FeedbackResponse)
+async def feedback(req: FeedbackRequest, x_admin_token: Optional[str] = Header(None)):
+    """Store a verified label on a stored prediction; the online learner trains on these."""
+    _require_admin(x_admin_token)
+    verified_at = datetime.utcnow().isoformat() + "Z"
+    try:
+        seq = await db_executor.run(db.record_feedback, req.prediction_id, req.label, verified_at)
+        if seq is None:
+            # The prediction may still be queued in the history writer
+            await db_executor.run(db.flush_writer)
+            seq = await db_executor.run(db.record_feedback, req.prediction_id, req.label, verified_at)
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.exception("Error storing feedback")
+        raise HTTPException(status_code=500, detail=f"Feedback failed: {str(e)}")
+    if seq is None:
+        raise HTTPException(status_code=404, detail="Unknown prediction_id.")
+    return FeedbackResponse(
+        prediction_id=req.prediction_id, verified_label=req.label, verified_at=verified_at, feedback_seq=seq
+    )
+
+
+@app.on_event("shutdown")
+def flush_history_on_shutdown():
+    if online_learner is not None:
+        online_learner.stop()
+    if history_compactor is not None:
+        history_compactor.stop()
+    if metadata_watcher is not None:
+        metadata_watcher.stop()
+    db.stop_writer()
+    inference_executor.shutdown(wait=False)
+    db_executor.shutdown()
+
+
 @app.get("/api/v1/history")
-def history(limit: int = 20):
+async def history(
+    limit: int = Query(20, ge=1, le=MAX_HISTORY_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    summary: bool = Query(False, description="Truncate content to a short snippet"),
+):
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
     try:
-        items = db.fetch_history(limit=limit)
-        return {"items": items}
+        items, next_cursor = await db_executor.run(
+            db.fetch_history_page, limit=limit, cursor=cursor, fields=field_list, summary=summary
+        )
+        return {"items": items, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.exception("Error fetching history")
         raise HTTPException(status_code=500, detail=f"History fetch failed: {str(e)}")
 
 
+@app.get("/api/v1/history/search")
+async def history_search(
+    q: str = Query(..., min_length=1, description="Keywords that must all appear in the title or article"),
+    label: Optional[str] = None,
+    model_version: Optional[str] = None,
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    sort: str = Query("relevance", regex="^(relevance|newest)$"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    syntax: bool = Query(False, description="Treat q as an FTS5 query (phrases, OR, NOT, NEAR, prefix*)"),
+):
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        items, next_offset = await db_executor.run(
+            db.search_history,
+            q,
+            label=label,
+            model_version=model_version,
+            created_from=created_from.isoformat() if created_from else None,
+            created_to=created_to.isoformat() if created_to else None,
+            sort=sort,
+            limit=limit,
+            offset=offset,
+            fields=field_list,
+            raw_query=syntax,
+        )
+        return {"items": items, "next_offset": next_offset}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.exception("Error searching history")
+        raise HTTPException(status_code=500, detail=f"History search failed: {str(e)}")
+
+
+@app.get("/api/v1/stats")
+async def stats(
+    bucket: str = Query("hour", regex="^(hour|day)$"),
+    model_version: Optional[str] = None,
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound (whole hours)"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound (whole hours)"),
+):
+    """Prediction volume, label split and mean probability per time bucket, from the hourly rollups."""
+    try:
+        items = await db_executor.run(
+            db.fetch_stats,
+            bucket=bucket,
+            model_version=model_version,
+            created_from=created_from.isoformat() if created_from else None,
+            created_to=created_to.isoformat() if created_to else None,
+        )
+        return {"bucket": bucket, "items": items}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.exception("Error fetching stats")
+        raise HTTPException(status_code=500, detail=f"Stats fetch failed: {str(e)}")
+
+
 @app.post("/api/v1/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
+async def predict(req: PredictRequest):
     # Basic validation already handled by Pydantic
-    text_for_model = req.title + " " + req.content if req.title else req.content
-    text_for_model = text_for_model.strip()
+    text_for_model = _text_for_model(req.title, req.content)
     if not text_for_model:
         raise HTTPException(status_code=400, detail="Empty content after trimming.")
 
-    if not model_server.loaded:
+    server = model_server  # pinned for the whole request, even if a reload swaps models
+    if not server.loaded:
         raise HTTPException(status_code=503, detail="Model not loaded. Try again later.")
 
+    model_version = server.model_version or MODEL_VERSION
+    metrics.INPUT_LENGTH.observe(len(text_for_model), "predict")
+
     try:
-        # Preprocess (returns string normalized for vectorizer)
-        prepped = preprocess_for_vectorizer(text_for_model)
-        label, prob, top_tokens = model_server.predict(prepped)
+        if micro_batcher is None:
+            prediction, signature, duplicate = await inference_executor.run(
+                _run_inference, server, text_for_model, model_version, req.top_k, req.include_scores
+            )
+        else:
+            prediction, signature, duplicate, prepped, cache_key = await inference_executor.run(
+                _prepare_inference, text_for_model, model_version, req.top_k, req.include_scores
+            )
+            if prediction is None:
+                prediction = await micro_batcher.predict(server, prepped, req.top_k, req.include_scores)
+                prediction_cache.put(cache_key, prediction)
+    except QueueFullError as e:
+        logger.warning("Prediction rejected: %s", e)
+        metrics.PREDICTION_ERRORS.inc("predict", "overloaded", model_version)
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}. Try again later.")
+    except StageTimeoutError as e:
+        logger.warning("Prediction timed out: %s", e)
+        metrics.PREDICTION_ERRORS.inc("predict", "timeout", model_version)
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.exception("Error during prediction")
+        metrics.PREDICTION_ERRORS.inc("predict", "inference", model_version)
         raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
 
+    label, prob, top_tokens = prediction[:3]
+    token_scores = prediction[3] if req.include_scores else None
+    metrics.PREDICTIONS.inc("predict", label, model_version)
+
     response = PredictResponse(
         prediction_id=str(uuid.uuid4()),
         label=label,
         probability=round(float(prob), 4),
-        model_version=model_server.model_version or MODEL_VERSION,
-        top_tokens=top_tokens,
+        model_version=model_version,
+        top_tokens=list(top_tokens) if top_tokens is not None else None,
+        token_scores=_round_scores(token_scores),
         created_at=datetime.utcnow().isoformat() + "Z",
     )
 
-    # Persist history (best effort)
-    try:
-        db.insert_prediction(
-            {
-                "prediction_id": response.prediction_id,
-                "title": req.title,
-                "content": req.content,
-                "label": response.label,
-                "probability": response.probability,
-                "model_version": response.model_version,
-                "top_tokens": response.top_tokens,
+    if duplicate is not None:
+        # Link to the earlier prediction instead of storing another copy
+        entry, similarity = duplicate
+        response.duplicate_of = entry.prediction_id
+        response.similarity = round(similarity, 4)
+        # Not stored again, but still a prediction served (best effort)
+        try:
+            await db_executor.run(db.submit_stats, [{
                 "created_at": response.created_at,
-            }
+                "model_version": model_version,
+                "label": label,
+                "probability": response.probability,
+            }])
+        except Exception:
+            logger.exception("Failed to count near-duplicate prediction in stats")
+        return response
+
+    # Persist history (best effort); the near-dup index picks the row up once committed
+
+    try:
+        await db_executor.run(
+            db.submit_predictions, [_history_record(req.title, req.content, response, signature)]
+        )
+    except Exception:
+        logger.exception("Failed to persist prediction history")
+
+    return response
+
+
+@app.post("/api/v1/predict/stream", response_model=PredictResponse)
+async def predict_stream(
+    request: Request,
+    title: Optional[str] = Query(None, max_length=TITLE_MAX_LENGTH),
+    top_k: int = Query(TOP_K_TOKENS, ge=0, le=MAX_TOP_K),
+    include_scores: bool = False,
+):
+    """
+    Score an article of any length sent as the raw UTF-8 request body (chunked
+    upload, or e.g. `curl --data-binary @article.txt`). The body is decoded,
+    preprocessed and counted into one TF-IDF row chunk by chunk, so memory
+    does not grow with the article and time grows linearly with it (see
+    ModelServer.stream_accumulator for the one vectorizer kind that is
+    buffered whole instead; STREAM_MAX_BYTES still caps it).
+    Only the first MAX_CONTENT_LENGTH chars are stored in history.
+    """
+    server = model_server  # pinned for the whole request, even if a reload swaps models
+    if not server.loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded. Try again later.")
+    model_version = server.model_version or MODEL_VERSION
+
+    preprocessor = StreamingPreprocessor()
+    accumulator = server.stream_accumulator()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending: List[str] = [title + " "] if title else []
+    pending_chars = 0
+    head: List[str] = []  # leading content kept for the history row
+    head_chars = 0
+    received = 0
+    blank = not (title and title.strip())
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > STREAM_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"Article exceeds {STREAM_MAX_BYTES} bytes.")
+            text = decoder.decode(chunk)
+            if not text:
+                continue
+            if blank and text.strip():
+                blank = False
+            if head_chars < MAX_CONTENT_LENGTH:
+                head.append(text[:MAX_CONTENT_LENGTH - head_chars])
+                head_chars += len(head[-1])
+            pending.append(text)
+            pending_chars += len(text)
+            if pending_chars >= STREAM_CHUNK_CHARS:
+                await inference_executor.run(_feed_stream, preprocessor, accumulator, "".join(pending))
+                pending, pending_chars = [], 0
+        pending.append(decoder.decode(b"", final=True))
+        if blank:
+            raise HTTPException(status_code=400, detail="Empty content after trimming.")
+        await inference_executor.run(_feed_stream, preprocessor, accumulator, "".join(pending))
+        metrics.INPUT_LENGTH.observe(preprocessor.chars, "stream")
+        prediction = await inference_executor.run(
+            _finish_stream, server, preprocessor, accumulator, top_k, include_scores
         )
+    except HTTPException:
+        raise
+    except StageTimeoutError as e:
+        logger.warning("Streamed prediction timed out: %s", e)
+        metrics.PREDICTION_ERRORS.inc("stream", "timeout", model_version)
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.exception("Error during streamed prediction")
+        metrics.PREDICTION_ERRORS.inc("stream", "inference", model_version)
+        raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
+
+    label, prob, top_tokens = prediction[:3]
+    token_scores = prediction[3] if include_scores else None
+    metrics.PREDICTIONS.inc("stream", label, model_version)
+
+    response = PredictResponse(
+        prediction_id=str(uuid.uuid4()),
+        label=label,
+        probability=round(float(prob), 4),
+        model_version=model_version,
+        top_tokens=list(top_tokens) if top_tokens is not None else None,
+        token_scores=_round_scores(token_scores),
+        created_at=datetime.utcnow().isoformat() + "Z",
+    )
+
+    # Persist history (best effort)
+    try:
+        await db_executor.run(db.submit_predictions, [_history_record(title, "".join(head), response)])
     except Exception:
         logger.exception("Failed to persist prediction history")
 
     return response
+
+
+@app.post("/api/v1/predict/batch", response_model=BatchPredictResponse)
+async def predict_batch(req: BatchPredictRequest):
+    server = model_server  # pinned for the whole request, even if a reload swaps models
+    if not server.loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded. Try again later.")
+
+    model_version = server.model_version or MODEL_VERSION
+
+    try:
+        errors, pending_idx, predictions = await inference_executor.run(
+            _run_batch_inference, server, req.items, req.top_k
+        )
+    except StageTimeoutError as e:
+        logger.warning("Batch prediction timed out: %s", e)
+        metrics.PREDICTION_ERRORS.inc("batch", "timeout", model_version, amount=len(req.items))
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.exception("Error during batch prediction")
+        metrics.PREDICTION_ERRORS.inc("batch", "inference", model_version, amount=len(req.items))
+        raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
+    if errors:
+        metrics.PREDICTION_ERRORS.inc("batch", "invalid_item", model_version, amount=len(errors))
+
+    # Results in input order; failures are reported per item
+    results: List[BatchPredictResult] = [
+        BatchPredictResult(index=i, error=errors.get(i)) for i in range(len(req.items))
+    ]
+    created_at = datetime.utcnow().isoformat() + "Z"
+    records = []
+    for i, (label, prob, top_tokens, token_scores) in zip(pending_idx, predictions):
+        response = PredictResponse(
+            prediction_id=str(uuid.uuid4()),
+            label=label,
+            probability=round(float(prob), 4),
+            model_version=model_version,
+            top_tokens=top_tokens,
+            token_scores=_round_scores(token_scores) if req.include_scores else None,
+            created_at=created_at,
+        )
+        results[i].result = response
+        metrics.PREDICTIONS.inc("batch", label, model_version)
+        item = req.items[i]
+        records.append(_history_record(item.title, item.content, response))
+
+    # Persist history in one submission (best effort)
+    try:
+        await db_executor.run(db.submit_predictions, records)
+    except Exception:
+        logger.exception("Failed to persist batch prediction history")
+
+    return BatchPredictResponse(items=results, model_version=model_version)
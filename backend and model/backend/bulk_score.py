@@ -0,0 +1,310 @@
+# backend/bulk_score.py
+"""
+Offline bulk scoring for CSV / JSONL corpora.
+
+Streams the input in chunks (never loads the whole file), preprocesses chunks
+across a process pool, scores each chunk with one vectorized ModelServer
+call and appends results to the output as it goes. Memory stays bounded by
+chunk_size * in-flight chunks regardless of input size.
+
+Progress is checkpointed next to the output (<output>.progress) after every
+chunk; --resume skips rows already scored and truncates any partially
+written tail, so an interrupted run can be continued without duplicates.
+
+Usage:
+  python bulk_score.py --input articles.jsonl --output scored.jsonl [--workers 8] [--chunk-size 1000] [--resume]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+csv.field_size_limit(sys.maxsize)
+
+logger = logging.getLogger("bulk-score")
+
+OUTPUT_FIELDS = ["id", "label", "probability", "model_version", "top_tokens", "error"]
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt != "auto":
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+class _BadRecord(dict):
+    """Empty stand-in for a JSONL line that is not a JSON object; written as an error row."""
+
+    def __init__(self, line_no: int, reason: str):
+        super().__init__()
+        self.error = f"line {line_no}: {reason}"
+
+
+def iter_records(path: str, fmt: str) -> Iterator[Dict]:
+    """Yield one dict per input row, streaming (a _BadRecord for each malformed JSONL line)."""
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        if fmt == "jsonl":
+            for line_no, line in enumerate(fh, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield _BadRecord(line_no, f"invalid JSON ({e})")
+                    continue
+                if isinstance(record, dict):
+                    yield record
+                else:
+                    yield _BadRecord(line_no, f"expected a JSON object, got {type(record).__name__}")
+        else:
+            yield from csv.DictReader(fh)
+
+
+def iter_chunks(records: Iterator[Dict], chunk_size: int, skip: int = 0) -> Iterator[List[Dict]]:
+    chunk: List[Dict] = []
+    for i, record in enumerate(records):
+        if i < skip:
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text_of(record: Dict, title_col: str, content_col: str) -> str:
+    content = record.get(content_col)
+    if content is None and content_col == "content":
+        content = record.get("text")
+    title = record.get(title_col)
+    content = "" if content is None else str(content)
+    text = f"{title} {content}" if title else content
+    return text.strip()
+
+
+def _worker_init() -> None:
+    from preprocessing import warm_up
+
+    warm_up()
+
+
+def preprocess_chunk(texts: List[str]) -> List[str]:
+    from preprocessing import preprocess_fast
+
+    return [preprocess_fast(t) if t else "" for t in texts]
+
+
+class _Checkpoint:
+    def __init__(self, output_path: str):
+        self.path = output_path + ".progress"
+
+    def load(self) -> Tuple[int, int]:
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+        return int(state["rows_done"]), int(state["output_bytes"])
+
+    def save(self, rows_done: int, output_bytes: int) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"rows_done": rows_done, "output_bytes": output_bytes}, fh)
+        os.replace(tmp, self.path)
+
+
+class _Writer:
+    def __init__(self, path: str, fmt: str, append: bool):
+        self.fmt = fmt
+        self.fh = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self.fh, fieldnames=OUTPUT_FIELDS) if fmt == "csv" else None
+        if self._csv is not None and self.fh.tell() == 0:
+            self._csv.writeheader()
+
+    def write(self, rows: List[Dict]) -> int:
+        for row in rows:
+            if self._csv is not None:
+                self._csv.writerow(
+                    dict(row, top_tokens=" ".join(row["top_tokens"]) if row["top_tokens"] else "")
+                )
+            else:
+                self.fh.write(json.dumps(row) + "\n")
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        return self.fh.tell()
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    server,
+    input_format: str = "auto",
+    output_format: str = "auto",
+    chunk_size: int = 1000,
+    workers: int = 0,
+    top_k: int = 0,
+    resume: bool = False,
+    id_col: str = "id",
+    title_col: str = "title",
+    content_col: str = "content",
+    max_rows: Optional[int] = None,
+) -> Dict:
+    """
+    Score input_path into output_path. workers=0 preprocesses in-process.
+    Returns a summary dict (rows, seconds, rows_per_sec, ...).
+    """
+    input_format = _detect_format(input_path, input_format)
+    output_format = _detect_format(output_path, output_format)
+    checkpoint = _Checkpoint(output_path)
+
+    rows_done, output_bytes = checkpoint.load() if resume else (0, 0)
+    if resume and os.path.exists(output_path):
+        # Drop anything written after the last checkpoint (interrupted mid-chunk)
+        with open(output_path, "r+b") as fh:
+            fh.truncate(output_bytes)
+    elif not resume and os.path.exists(checkpoint.path):
+        os.remove(checkpoint.path)
+    writer = _Writer(output_path, output_format, append=resume and rows_done > 0)
+
+    model_version = server.model_version
+    start = time.perf_counter()
+    scored = 0
+    budget = max_rows
+
+    def chunks():
+        nonlocal budget
+        for chunk in iter_chunks(iter_records(input_path, input_format), chunk_size, skip=rows_done):
+            if budget is not None:
+                if budget <= 0:
+                    return
+                chunk = chunk[:budget]
+                budget -= len(chunk)
+            yield chunk
+
+    pool = Pool(workers, initializer=_worker_init) if workers > 0 else None
+    try:
+        # Bounded window of in-flight chunks keeps memory flat
+        in_flight: deque = deque()
+        source = chunks()
+        window = max(2 * workers, 1)
+
+        def submit_next() -> bool:
+            chunk = next(source, None)
+            if chunk is None:
+                return False
+            texts = [_text_of(r, title_col, content_col) for r in chunk]
+            if pool is not None:
+                pending = pool.apply_async(preprocess_chunk, (texts,))
+            else:
+                pending = preprocess_chunk(texts)
+            in_flight.append((chunk, texts, pending))
+            return True
+
+        while len(in_flight) < window and submit_next():
+            pass
+
+        while in_flight:
+            chunk, texts, pending = in_flight.popleft()
+            prepped = pending.get() if pool is not None else pending
+            submit_next()
+
+            valid = [i for i, t in enumerate(texts) if t]
+            predictions = server.predict_batch([prepped[i] for i in valid], top_k=top_k)
+            by_index = dict(zip(valid, predictions))
+
+            rows = []
+            for i, record in enumerate(chunk):
+                row = {
+                    "id": record.get(id_col, rows_done + i),
+                    "label": None,
+                    "probability": None,
+                    "model_version": model_version,
+                    "top_tokens": None,
+                    "error": None,
+                }
+                if i in by_index:
+                    label, prob, top_tokens = by_index[i][:3]
+                    row.update(label=label, probability=round(float(prob), 4), top_tokens=top_tokens or None)
+                elif isinstance(record, _BadRecord):
+                    row["error"] = record.error
+                else:
+                    row["error"] = "empty content"
+                rows.append(row)
+
+            output_bytes = writer.write(rows)
+            rows_done += len(chunk)
+            scored += len(chunk)
+            checkpoint.save(rows_done, output_bytes)
+
+            elapsed = time.perf_counter() - start
+            logger.info("scored %d rows (%.1f rows/s)", rows_done, scored / elapsed if elapsed else 0.0)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": scored,
+        "rows_total": rows_done,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(scored / elapsed, 1) if elapsed else None,
+        "output": output_path,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Stream-score a CSV/JSONL corpus with the serving model")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--input-format", choices=("auto", "csv", "jsonl"), default="auto")
+    parser.add_argument("--output-format", choices=("auto", "csv", "jsonl"), default="auto")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Preprocessing processes (0 = in-process)")
+    parser.add_argument("--top-k", type=int, default=0, help="Explanation tokens per row (0 = none)")
+    parser.add_argument("--id-col", default="id")
+    parser.add_argument("--title-col", default="title")
+    parser.add_argument("--content-col", default="content")
+    parser.add_argument("--max-rows", type=int, default=None, help="Stop after this many rows (resume later)")
+    parser.add_argument("--resume", action="store_true", help="Continue from <output>.progress")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from inference import ModelServer
+
+    server = ModelServer()
+    if not server.loaded:
+        raise SystemExit("Model artifacts not loaded; nothing to score with")
+
+    summary = score_file(
+        args.input,
+        args.output,
+        server,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        top_k=args.top_k,
+        resume=args.resume,
+        id_col=args.id_col,
+        title_col=args.title_col,
+        content_col=args.content_col,
+        max_rows=args.max_rows,
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
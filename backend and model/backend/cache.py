@@ -0,0 +1,140 @@
+# backend/cache.py
+"""
+In-process, content-addressed prediction cache.
+
+Two LRU tiers with a size bound and TTL:
+- raw tier:    sha256(raw text)                      -> preprocessed text
+- result tier: sha256(preprocessed text) + version   -> ModelServer.predict() output
+
+Keys carry model_version and the whole cache is dropped when the serving
+model version changes, so stale predictions are never returned.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class PredictionCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        raw_tier: bool = True,
+    ):
+        self.results = LRUCache(maxsize, ttl)
+        self.raw = LRUCache(maxsize, ttl) if raw_tier else None
+        self.model_version: Optional[str] = None
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def ensure_version(self, model_version: str) -> None:
+        """Drop every entry when the serving model version changes."""
+        with self._lock:
+            if model_version == self.model_version:
+                return
+            if self.model_version is not None:
+                self.invalidations += 1
+            self.model_version = model_version
+            self.results.clear()
+            if self.raw is not None:
+                self.raw.clear()
+
+    # Raw tier: lets repeated submissions skip preprocessing as well
+    def get_preprocessed(self, raw_text: str) -> Optional[str]:
+        if self.raw is None:
+            return None
+        return self.raw.get(content_hash(raw_text))
+
+    def put_preprocessed(self, raw_text: str, preprocessed: str) -> None:
+        if self.raw is not None:
+            self.raw.put(content_hash(raw_text), preprocessed)
+
+    @staticmethod
+    def key(preprocessed_text: str, model_version: str, *options: Hashable) -> tuple:
+        return (content_hash(preprocessed_text), model_version) + options
+
+    def get(self, key: tuple) -> Optional[Any]:
+        return self.results.get(key)
+
+    def put(self, key: tuple, value: Any) -> None:
+        self.results.put(key, value)
+
+    def clear(self) -> None:
+        self.results.clear()
+        if self.raw is not None:
+            self.raw.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.model_version,
+            "invalidations": self.invalidations,
+            "results": self.results.stats(),
+            "raw": self.raw.stats() if self.raw is not None else None,
+        }
@@ -0,0 +1,318 @@
+# backend/compact.py
+"""
+Compact, memory-mappable model artifacts.
+
+Replaces the pickled TfidfVectorizer vocabulary dict (tens of thousands of
+Python strings per worker) with flat numpy arrays that every worker maps
+read-only from the same files:
+
+    compact/
+      manifest.json        vectorizer + model settings, format version
+      vocab_blob.npy       uint8, UTF-8 terms concatenated in column order
+      vocab_offsets.npy    int64, term i is blob[offsets[i]:offsets[i+1]]
+      vocab_table.npy      int32, open-addressing hash table (crc32) -> column
+      idf.npy              float64, per-column idf
+      coef.npy             float64, (n_rows, n_features) linear coefficients
+      intercept.npy        float64, (n_rows,)
+
+CompactVectorizer / CompactLinearModel are duck-type compatible with the
+parts of TfidfVectorizer / LogisticRegression that ModelServer uses
+(transform, get_feature_names_out, classes_, coef_, predict_proba).
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def _hash_table_size(n_terms: int) -> int:
+    size = 1
+    while size < 2 * max(n_terms, 1):
+        size <<= 1
+    return size
+
+
+def _build_hash_table(terms: Sequence[bytes]) -> np.ndarray:
+    table = np.full(_hash_table_size(len(terms)), -1, dtype=np.int32)
+    mask = len(table) - 1
+    for col, term in enumerate(terms):
+        slot = zlib.crc32(term) & mask
+        while table[slot] >= 0:
+            slot = (slot + 1) & mask
+        table[slot] = col
+    return table
+
+
+def _proba_mode(model, n_classes: int) -> str:
+    """
+    How model.predict_proba maps decisions to probabilities, as sklearn does:
+    "binary" sigmoid(d), "multinomial" softmax (sigmoid(2d) for two classes)
+    or "ovr" normalized per-class sigmoids.
+    """
+    if not hasattr(model, "predict_proba"):
+        raise ValueError(f"{type(model).__name__} has no predict_proba")
+    if getattr(model, "loss", "log_loss") != "log_loss":
+        raise ValueError(f"compact format only supports log-loss probabilities, not loss={model.loss!r}")
+    multi_class = getattr(model, "multi_class", "ovr")
+    if multi_class == "auto":
+        liblinear = getattr(model, "solver", None) == "liblinear"
+        multi_class = "ovr" if n_classes <= 2 or liblinear else "multinomial"
+    if multi_class not in ("ovr", "multinomial"):
+        raise ValueError(f"compact format does not support multi_class={multi_class!r}")
+    if n_classes == 2 and multi_class == "ovr":
+        return "binary"
+    return multi_class
+
+
+def export_compact(tfidf, model, out_dir) -> Dict:
+    """
+    Write tfidf + a linear model to out_dir in the compact format.
+    Raises ValueError for vectorizer/model settings the format cannot reproduce.
+    """
+    if not hasattr(tfidf, "vocabulary_"):
+        raise ValueError("compact format requires a fitted vocabulary (not a hashing pipeline)")
+    if getattr(tfidf, "analyzer", "word") != "word" or callable(getattr(tfidf, "analyzer", None)):
+        raise ValueError("compact format only supports analyzer='word'")
+    if tfidf.preprocessor is not None or tfidf.tokenizer is not None or tfidf.strip_accents:
+        raise ValueError("compact format does not support custom preprocessor/tokenizer/strip_accents")
+    if tfidf.stop_words is not None:
+        raise ValueError("compact format does not support stop_words")
+    if not hasattr(model, "coef_") or not hasattr(model, "intercept_"):
+        raise ValueError("compact format requires a linear model with coef_ and intercept_")
+    classes = [c.item() if hasattr(c, "item") else c for c in model.classes_]
+    multi_class = _proba_mode(model, len(classes))
+
+    out_dir = str(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    vocab = tfidf.vocabulary_
+    n_features = len(vocab)
+    terms: List[bytes] = [b""] * n_features
+    for term, col in vocab.items():
+        terms[col] = term.encode("utf-8")
+
+    offsets = np.zeros(n_features + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in terms])
+    blob = np.frombuffer(b"".join(terms), dtype=np.uint8)
+
+    np.save(os.path.join(out_dir, "vocab_blob.npy"), blob)
+    np.save(os.path.join(out_dir, "vocab_offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "vocab_table.npy"), _build_hash_table(terms))
+    if tfidf.use_idf:
+        np.save(os.path.join(out_dir, "idf.npy"), np.asarray(tfidf.idf_, dtype=np.float64))
+    np.save(os.path.join(out_dir, "coef.npy"), np.ascontiguousarray(model.coef_, dtype=np.float64))
+    np.save(os.path.join(out_dir, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float64))
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "n_features": n_features,
+        "vectorizer": {
+            "lowercase": bool(tfidf.lowercase),
+            "token_pattern": tfidf.token_pattern,
+            "ngram_range": list(tfidf.ngram_range),
+            "binary": bool(tfidf.binary),
+            "norm": tfidf.norm,
+            "use_idf": bool(tfidf.use_idf),
+            "sublinear_tf": bool(tfidf.sublinear_tf),
+        },
+        "model": {
+            "type": type(model).__name__,
+            "classes": classes,
+            "multi_class": multi_class,
+        },
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+def _load_array(path: str, mmap: bool) -> np.ndarray:
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+class CompactVocabulary:
+    """term <-> column lookups over the mmapped blob/offsets/hash table."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, table: np.ndarray):
+        self._arrays = (blob, offsets, table)  # keep the mappings alive
+        # memoryviews give Python-int indexing straight from the shared pages
+        self._blob = memoryview(blob)
+        self._offsets = memoryview(offsets)
+        self._table = memoryview(table)
+        self._mask = len(table) - 1
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, col: int) -> str:
+        return self.term(col)
+
+    def term(self, col: int) -> str:
+        return self._blob[self._offsets[col]:self._offsets[col + 1]].tobytes().decode("utf-8")
+
+    def lookup(self, term: str) -> int:
+        """Column of term, or -1 when it is not in the vocabulary."""
+        raw = term.encode("utf-8")
+        blob, offsets, table, mask = self._blob, self._offsets, self._table, self._mask
+        slot = zlib.crc32(raw) & mask
+        while True:
+            col = table[slot]
+            if col < 0:
+                return -1
+            if blob[offsets[col]:offsets[col + 1]] == raw:
+                return col
+            slot = (slot + 1) & mask
+
+
+class CompactVectorizer:
+    """TF-IDF transform equivalent to the exported TfidfVectorizer."""
+
+    def __init__(self, settings: Dict, vocabulary: CompactVocabulary, idf=None):
+        self.lowercase = settings["lowercase"]
+        self.ngram_range = tuple(settings["ngram_range"])
+        self.binary = settings["binary"]
+        self.norm = settings["norm"]
+        self.use_idf = settings["use_idf"]
+        self.sublinear_tf = settings["sublinear_tf"]
+        self._token_re = re.compile(settings["token_pattern"])
+        self.vocabulary = vocabulary
+        self.idf_ = idf
+
+    def _tokenize(self, doc: str) -> List[str]:
+        if self.lowercase:
+            doc = doc.lower()
+        return self._token_re.findall(doc)
+
+    def _analyze(self, doc: str) -> List[str]:
+        tokens = self._tokenize(doc)
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        n_tokens = len(tokens)
+        for n in range(max(min_n, 2), min(max_n, n_tokens) + 1):
+            for i in range(n_tokens - n + 1):
+                grams.append(" ".join(tokens[i:i + n]))
+        return grams
+
+    def _row(self, doc: str):
+        counts: Dict[str, int] = {}
+        for gram in self._analyze(doc):
+            counts[gram] = counts.get(gram, 0) + 1
+        lookup = self.vocabulary.lookup
+        cols, vals = [], []
+        for gram, count in counts.items():
+            col = lookup(gram)
+            if col >= 0:
+                cols.append(col)
+                vals.append(count)
+        cols = np.asarray(cols, dtype=np.int32)
+        vals = np.asarray(vals, dtype=np.float64)
+        order = np.argsort(cols, kind="stable")
+        return cols[order], vals[order]
+
+    def transform(self, raw_documents) -> sp.csr_matrix:
+        indptr = [0]
+        indices, data = [], []
+        for doc in raw_documents:
+            cols, vals = self._row(doc)
+            indices.append(cols)
+            data.append(vals)
+            indptr.append(indptr[-1] + len(cols))
+
+        indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32)
+        data = np.concatenate(data) if data else np.zeros(0, dtype=np.float64)
+        if self.binary:
+            data[:] = 1.0
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1
+        if self.use_idf and self.idf_ is not None:
+            data *= self.idf_[indices]
+
+        X = sp.csr_matrix(
+            (data, indices, np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self.vocabulary)),
+        )
+        if self.norm:
+            from sklearn.preprocessing import normalize
+
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def get_feature_names_out(self) -> CompactVocabulary:
+        # Indexable by column without materializing every term
+        return self.vocabulary
+
+
+class CompactLinearModel:
+    """predict_proba for an exported linear classifier, straight from numpy arrays."""
+
+    def __init__(self, settings: Dict, coef: np.ndarray, intercept: np.ndarray):
+        self.classes_ = np.asarray(settings["classes"])
+        self.multi_class = settings["multi_class"]
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def decision_function(self, X) -> np.ndarray:
+        scores = np.asarray(X @ self.coef_.T) + self.intercept_
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            if self.multi_class == "multinomial":
+                scores = 2.0 * scores  # softmax over (-d, d)
+            pos = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1.0 - pos, pos])
+        if self.multi_class == "ovr":
+            probs = 1.0 / (1.0 + np.exp(-scores))
+            return probs / probs.sum(axis=1, keepdims=True)
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def has_compact_artifacts(artifacts_dir: str) -> bool:
+    return os.path.exists(os.path.join(artifacts_dir, MANIFEST_NAME))
+
+
+def load_compact(artifacts_dir: str, mmap: bool = True):
+    """Load (CompactVectorizer, CompactLinearModel, manifest) from artifacts_dir."""
+    with open(os.path.join(artifacts_dir, MANIFEST_NAME), "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact format version: {manifest.get('format_version')}")
+    if manifest.get("byteorder") != sys.byteorder:
+        raise ValueError("Compact artifacts were written with a different byte order")
+
+    def path(name):
+        return os.path.join(artifacts_dir, name)
+
+    vocabulary = CompactVocabulary(
+        _load_array(path("vocab_blob.npy"), mmap),
+        _load_array(path("vocab_offsets.npy"), mmap),
+        _load_array(path("vocab_table.npy"), mmap),
+    )
+    settings = manifest["vectorizer"]
+    idf = _load_array(path("idf.npy"), mmap) if settings["use_idf"] else None
+    vectorizer = CompactVectorizer(settings, vocabulary, idf)
+    model = CompactLinearModel(
+        manifest["model"],
+        _load_array(path("coef.npy"), mmap),
+        _load_array(path("intercept.npy"), mmap),
+    )
+    return vectorizer, model, manifest
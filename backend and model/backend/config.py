@@ -4,17 +4,91 @@ import os
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Where you will place model artifacts after training
-MODEL_ARTIFACTS_DIR = os.path.join(ROOT_DIR, "model_artifacts")
+MODEL_ARTIFACTS_DIR = os.environ.get("MODEL_ARTIFACTS_DIR", os.path.join(ROOT_DIR, "model_artifacts"))
 TFIDF_PATH = os.path.join(MODEL_ARTIFACTS_DIR, "tfidf.pkl")
 MODEL_PATH = os.path.join(MODEL_ARTIFACTS_DIR, "model.pkl")
 METADATA_PATH = os.path.join(MODEL_ARTIFACTS_DIR, "metadata.json")
+# Compact mmap format (see compact.py); pickles stay the fallback
+COMPACT_ARTIFACTS_DIR = os.path.join(MODEL_ARTIFACTS_DIR, "compact")
+# "auto" (compact when present, else pickle) | "compact" | "pickle"
+ARTIFACT_FORMAT = os.environ.get("ARTIFACT_FORMAT", "auto")
+# "auto" (numpy LinearScorer when the model supports it, see linear_scorer.py) | "numpy" | "sklearn"
+SCORER = os.environ.get("SCORER", "auto")
 HISTORY_DB_PATH = os.path.join(ROOT_DIR, "history.db")
+# "dedup": article bodies stored once per distinct text, zlib-compressed (contents table) | "inline"
+HISTORY_STORAGE = os.environ.get("HISTORY_STORAGE", "dedup")
+# Retention (history_maintenance.py): drop unlabelled rows older than N days / beyond the newest N rows (0 = keep)
+HISTORY_RETENTION_DAYS = float(os.environ.get("HISTORY_RETENTION_DAYS", 0))
+HISTORY_MAX_ROWS = int(os.environ.get("HISTORY_MAX_ROWS", 0))
+# Run retention + compaction inside the API every N seconds (0 = only via the CLI)
+HISTORY_COMPACT_INTERVAL = float(os.environ.get("HISTORY_COMPACT_INTERVAL", 0))
+# Relevance-sorted history search ranks at most the newest N matching rows (0 = all matches)
+HISTORY_SEARCH_RANK_WINDOW = int(os.environ.get("HISTORY_SEARCH_RANK_WINDOW", 10000))
+# Hot reload: poll metadata.json every N seconds and reload on change (0 disables)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+# Shared secret for /api/v1/admin/* (X-Admin-Token header); unset disables those endpoints
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Online learning from verified feedback (see online_learner.py)
+ONLINE_BATCH_SIZE = int(os.environ.get("ONLINE_BATCH_SIZE", 32))  # min new labels per update
+ONLINE_MAX_BATCH = int(os.environ.get("ONLINE_MAX_BATCH", 1024))
+ONLINE_LEARNING_RATE = float(os.environ.get("ONLINE_LEARNING_RATE", 0.05))
+ONLINE_ALPHA = float(os.environ.get("ONLINE_ALPHA", 1e-5))
+ONLINE_PASSES = int(os.environ.get("ONLINE_PASSES", 1))
+# Run the learner inside the API process every N seconds (0 = run online_learner.py separately)
+ONLINE_LEARNER_INTERVAL = float(os.environ.get("ONLINE_LEARNER_INTERVAL", 0))
+
+# Background history writer: bounded queue drained in batched commits
+HISTORY_WRITER_ENABLED = os.environ.get("HISTORY_WRITER_ENABLED", "1") == "1"
+HISTORY_WRITER_QUEUE_SIZE = int(os.environ.get("HISTORY_WRITER_QUEUE_SIZE", 10000))
+HISTORY_WRITER_BATCH_SIZE = int(os.environ.get("HISTORY_WRITER_BATCH_SIZE", 256))
+HISTORY_WRITER_FLUSH_INTERVAL = float(os.environ.get("HISTORY_WRITER_FLUSH_INTERVAL", 0.05))
+HISTORY_WRITER_PUT_TIMEOUT = float(os.environ.get("HISTORY_WRITER_PUT_TIMEOUT", 0.01))
 
 # Model version default (overridden by metadata if available)
 MODEL_VERSION = os.environ.get("MODEL_VERSION", "baseline_v0.1")
 
 # Preprocessing config
+# Longest content /api/v1/predict accepts inline; longer articles go to /api/v1/predict/stream,
+# which keeps this many leading chars of the article in history
 MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", 20000))
+# Streamed articles are preprocessed every STREAM_CHUNK_CHARS decoded chars, up to STREAM_MAX_BYTES
+STREAM_CHUNK_CHARS = int(os.environ.get("STREAM_CHUNK_CHARS", 65536))
+STREAM_MAX_BYTES = int(os.environ.get("STREAM_MAX_BYTES", 50 * 1024 * 1024))
+# Bounded memo for WordNet lemmas used by the fast preprocessing engine
+LEMMA_CACHE_SIZE = int(os.environ.get("LEMMA_CACHE_SIZE", 50000))
+
+# Prediction cache (set PREDICTION_CACHE_SIZE=0 to disable)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+PREDICTION_CACHE_RAW_TIER = os.environ.get("PREDICTION_CACHE_RAW_TIER", "1") == "1"
+
+# Request execution: separate pools for CPU-bound inference and SQLite I/O.
+# Timeouts are in seconds per stage (0 disables).
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", os.cpu_count() or 1))
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 10)) or None
+DB_WORKERS = int(os.environ.get("DB_WORKERS", 4))
+DB_TIMEOUT = float(os.environ.get("DB_TIMEOUT", 5)) or None
+# Micro-batching of concurrent /api/v1/predict calls (micro_batch.py): wait at most
+# MICRO_BATCH_WINDOW_MS for up to MICRO_BATCH_MAX_SIZE requests (window 0 disables)
+MICRO_BATCH_WINDOW_MS = float(os.environ.get("MICRO_BATCH_WINDOW_MS", 0))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 32))
+MICRO_BATCH_MAX_INFLIGHT = int(os.environ.get("MICRO_BATCH_MAX_INFLIGHT", 1))  # batches scored concurrently
+# Requests allowed to wait for a batch; more get 503 (0 = unbounded). The wait is capped by INFERENCE_TIMEOUT.
+MICRO_BATCH_MAX_QUEUE = int(os.environ.get("MICRO_BATCH_MAX_QUEUE", 256))
+
+# Near-duplicate short-circuit (MinHash/LSH over preprocessed tokens, see near_dup.py)
+NEAR_DUP_ENABLED = os.environ.get("NEAR_DUP_ENABLED", "1") == "1"
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", 0.8))  # estimated Jaccard of word 3-shingles
+NEAR_DUP_NUM_PERM = int(os.environ.get("NEAR_DUP_NUM_PERM", 64))
+NEAR_DUP_MAX_ENTRIES = int(os.environ.get("NEAR_DUP_MAX_ENTRIES", 20000))
+
+# Batch prediction config
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 256))
 
 # NLTK data path (optional)
 NLTK_DATA_DIR = os.environ.get("NLTK_DATA_DIR", None)
+# Precompiled stopwords + WordNet noun data (build with `python nltk_bundle.py`)
+NLTK_BUNDLE_PATH = os.environ.get("NLTK_BUNDLE_PATH", os.path.join(ROOT_DIR, "nltk_bundle.json.gz"))
+# Never call nltk.download; fail fast instead of stalling on boxes without egress
+NLTK_OFFLINE = os.environ.get("NLTK_OFFLINE", "0") == "1"
@@ -1,19 +1,96 @@
 import os
 import json
+import zlib
+import base64
+import hashlib
+import queue
 import sqlite3
-from typing import List, Dict, Any
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from config import HISTORY_DB_PATH
+from config import (
+    HISTORY_DB_PATH,
+    HISTORY_SEARCH_RANK_WINDOW,
+    HISTORY_STORAGE,
+    HISTORY_WRITER_QUEUE_SIZE,
+    HISTORY_WRITER_BATCH_SIZE,
+    HISTORY_WRITER_FLUSH_INTERVAL,
+    HISTORY_WRITER_PUT_TIMEOUT,
+)
+from metrics import DB_ROWS_WRITTEN, observe_stage
+
+logger = logging.getLogger("history-db")
+
+# Applied to every connection. WAL lets readers run alongside the writer and
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+_local = threading.local()
+
+# Article bodies in "dedup" storage: stored once per distinct content in the
+# contents table, zlib-compressed, keyed by a truncated sha256 of the text.
+CONTENT_HASH_BYTES = 16
+CONTENT_ZLIB_LEVEL = 6
+
+
+def content_hash(content: str) -> bytes:
+    return hashlib.sha256(content.encode("utf-8")).digest()[:CONTENT_HASH_BYTES]
+
+
+def compress_content(content: str) -> bytes:
+    return zlib.compress(content.encode("utf-8"), CONTENT_ZLIB_LEVEL)
+
+
+def decompress_content(data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _decompress_prefix(data: Optional[bytes], chars: int) -> Optional[str]:
+    """First `chars` characters only, inflating no more than 4 bytes per char."""
+    if data is None:
+        return None
+    raw = zlib.decompressobj().decompress(data, 4 * chars)
+    return raw.decode("utf-8", errors="ignore")[:chars]
 
 
 def _get_conn():
+    """Open a new, tuned connection (owned by the caller)."""
     os.makedirs(os.path.dirname(HISTORY_DB_PATH), exist_ok=True)
-    return sqlite3.connect(HISTORY_DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(HISTORY_DB_PATH, check_same_thread=False)
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    conn.create_function("inflate", 1, decompress_content, deterministic=True)
+    conn.create_function("inflate_prefix", 2, _decompress_prefix, deterministic=True)
+    return conn
+
+
+def _pooled_conn():
+    """Persistent per-thread connection, reopened if the DB path changes."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != HISTORY_DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _get_conn()
+        _local.conn = conn
+        _local.path = HISTORY_DB_PATH
+    return conn
 
 
 def init_db() -> None:
-    conn = _get_conn()
-    try:
+    conn = _pooled_conn()
+    with conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS predictions (
@@ -25,68 +102,910 @@ def init_db() -> None:
                 probability REAL,
                 model_version TEXT,
                 top_tokens TEXT,
-                created_at TEXT
+                created_at TEXT,
+                created_ts INTEGER,
+                minhash BLOB,
+                verified_label TEXT,
+                verified_at TEXT,
+                feedback_seq INTEGER
             )
             """
         )
-        conn.commit()
-    finally:
-        conn.close()
+        _migrate_created_ts(conn)
+        _migrate_minhash(conn)
+        _migrate_feedback(conn)
+        _migrate_contents(conn)
+        _migrate_search(conn)
+        _migrate_stats(conn)
 
 
-def insert_prediction(record: Dict[str, Any]) -> None:
+# created_at (ISO-8601 text) as integer epoch milliseconds, computed by SQLite
+# so inserts and the migration backfill agree exactly.
+_CREATED_TS_SQL = "CAST(ROUND((julianday({}) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _migrate_created_ts(conn) -> None:
+    """
+    Add + backfill the sortable created_ts column on databases created before
+    it existed, and make sure the keyset index is present.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+    if "created_ts" not in columns:
+        logger.info("Migrating predictions table: adding created_ts")
+        conn.execute("ALTER TABLE predictions ADD COLUMN created_ts INTEGER")
+    conn.execute(
+        "UPDATE predictions SET created_ts = "
+        + _CREATED_TS_SQL.format("created_at")
+        + " WHERE created_ts IS NULL AND created_at IS NOT NULL"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_predictions_created_ts "
+        "ON predictions (created_ts DESC, id DESC)"
+    )
+
+
+def _migrate_minhash(conn) -> None:
+    """Add the near-duplicate signature column (see near_dup.py) to older databases."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+    if "minhash" not in columns:
+        logger.info("Migrating predictions table: adding minhash")
+        conn.execute("ALTER TABLE predictions ADD COLUMN minhash BLOB")
+
+
+def _migrate_feedback(conn) -> None:
+    """
+    Verified-label columns for the feedback loop. feedback_seq increases with
+    every label submitted, so the online learner can consume new feedback
+    with a simple cursor.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+    for column, kind in (("verified_label", "TEXT"), ("verified_at", "TEXT"), ("feedback_seq", "INTEGER")):
+        if column not in columns:
+            logger.info("Migrating predictions table: adding %s", column)
+            conn.execute(f"ALTER TABLE predictions ADD COLUMN {column} {kind}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_prediction_id ON predictions (prediction_id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_predictions_feedback_seq "
+        "ON predictions (feedback_seq) WHERE feedback_seq IS NOT NULL"
+    )
+
+
+def _migrate_contents(conn) -> None:
+    """
+    Shared, compressed article bodies for HISTORY_STORAGE=dedup. Rows written
+    before (or with HISTORY_STORAGE=inline) keep predictions.content and are
+    moved over by history_maintenance.py --migrate.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS contents (
+            hash BLOB PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+    if "content_hash" not in columns:
+        logger.info("Migrating predictions table: adding content_hash")
+        conn.execute("ALTER TABLE predictions ADD COLUMN content_hash BLOB")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_predictions_content_hash "
+        "ON predictions (content_hash) WHERE content_hash IS NOT NULL"
+    )
+
+
+# Article text of a predictions row `p`, whichever way it was stored
+CONTENT_SQL = "COALESCE(p.content, (SELECT inflate(data) FROM contents WHERE hash = p.content_hash))"
+
+
+def _content_prefix_sql(chars: int) -> str:
+    return (
+        f"COALESCE(substr(p.content, 1, {chars}), "
+        f"(SELECT inflate_prefix(data, {chars}) FROM contents WHERE hash = p.content_hash))"
+    )
+
+
+def _migrate_search(conn) -> None:
+    """
+    FTS5 index over title + article text for search_history(). It is an
+    external-content index: the text lives only in predictions/contents and
+    history_fts_source exposes it, so nothing is stored twice. Triggers keep
+    it in sync; they use inflate(), so delete history rows through this
+    module (or history_maintenance.py), not a bare sqlite3 shell.
+    """
+    created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone() is None
+    conn.execute(
+        f"CREATE VIEW IF NOT EXISTS history_fts_source AS "
+        f"SELECT p.id, p.title, {CONTENT_SQL} AS content FROM predictions p"
+    )
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+        "title, content, content='history_fts_source', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_fts_insert AFTER INSERT ON predictions BEGIN
+            INSERT INTO history_fts (rowid, title, content)
+            VALUES (new.id, new.title, {_row_content_sql("new")});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_fts_delete AFTER DELETE ON predictions BEGIN
+            INSERT INTO history_fts (history_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, {_row_content_sql("old")});
+        END
+        """
+    )
+    # Moving a body into the contents table does not change the text, so only
+    # title edits need reindexing
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_fts_update AFTER UPDATE OF title ON predictions BEGIN
+            INSERT INTO history_fts (history_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, {_row_content_sql("old")});
+            INSERT INTO history_fts (rowid, title, content)
+            VALUES (new.id, new.title, {_row_content_sql("new")});
+        END
+        """
+    )
+    if created and conn.execute("SELECT 1 FROM predictions LIMIT 1").fetchone() is not None:
+        logger.info("Building full-text index over existing history rows")
+        conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+
+
+def _row_content_sql(row: str) -> str:
+    """CONTENT_SQL for a trigger's new/old row."""
+    return f"COALESCE({row}.content, (SELECT inflate(data) FROM contents WHERE hash = {row}.content_hash))"
+
+
+STATS_BUCKET_MS = {"hour": 3600 * 1000, "day": 86400 * 1000}
+
+
+def _migrate_stats(conn) -> None:
+    """
+    Hourly rollups (count, probability sum) per model version and label for
+    the stats endpoint, maintained by an insert trigger. Deleting history
+    rows (retention) deliberately leaves them alone, so dashboards keep the
+    volume of pruned hours; rebuild_stats() recomputes them from history.
+    """
+    created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'prediction_stats'").fetchone() is None
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prediction_stats (
+            bucket_ts INTEGER NOT NULL,
+            model_version TEXT NOT NULL,
+            label TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            probability_sum REAL NOT NULL,
+            PRIMARY KEY (bucket_ts, model_version, label)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_stats_insert AFTER INSERT ON predictions
+        WHEN new.created_ts IS NOT NULL BEGIN
+            INSERT INTO prediction_stats (bucket_ts, model_version, label, count, probability_sum)
+            VALUES ({_STATS_KEY_SQL.format(row="new.")}, 1, COALESCE(new.probability, 0))
+            ON CONFLICT (bucket_ts, model_version, label) DO UPDATE SET
+                count = count + 1, probability_sum = probability_sum + excluded.probability_sum;
+        END
+        """
+    )
+    if created:
+        _rollup_history(conn)
+
+
+_STATS_KEY_SQL = (
+    "{row}created_ts - {row}created_ts % " + str(STATS_BUCKET_MS["hour"])
+    + ", COALESCE({row}model_version, ''), COALESCE({row}label, '')"
+)
+
+
+def _rollup_history(conn, since_ts: Optional[int] = None) -> int:
+    """(Re)compute rollups from predictions for hours starting at or after since_ts (all when None)."""
+    where, params = "WHERE created_ts IS NOT NULL", []
+    if since_ts is not None:
+        since_ts -= since_ts % STATS_BUCKET_MS["hour"]
+        conn.execute("DELETE FROM prediction_stats WHERE bucket_ts >= ?", (since_ts,))
+        where += " AND created_ts >= ?"
+        params.append(since_ts)
+    else:
+        conn.execute("DELETE FROM prediction_stats")
+    cur = conn.execute(
+        "INSERT INTO prediction_stats (bucket_ts, model_version, label, count, probability_sum) "
+        f"SELECT {_STATS_KEY_SQL.format(row='')}, COUNT(*), COALESCE(SUM(probability), 0) "
+        f"FROM predictions {where} GROUP BY 1, 2, 3",
+        params,
+    )
+    return cur.rowcount
+
+
+def rebuild_stats(since: Optional[str] = None) -> int:
+    """Recompute rollups from history (all, or hours from ISO-8601 `since` on); returns rollup rows written."""
     conn = _get_conn()
     try:
-        conn.execute(
-            """
-            INSERT INTO predictions (
-                prediction_id, title, content, label, probability, model_version, top_tokens, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                record.get("prediction_id"),
-                record.get("title"),
-                record.get("content"),
-                record.get("label"),
-                record.get("probability"),
-                record.get("model_version"),
-                json.dumps(record.get("top_tokens")) if record.get("top_tokens") is not None else None,
-                record.get("created_at"),
-            ),
-        )
-        conn.commit()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")  # no inserts between the delete and the backfill
+            since_ts = None
+            if since is not None:
+                since_ts = conn.execute("SELECT " + _CREATED_TS_SQL.format("?"), (since,)).fetchone()[0]
+                if since_ts is None:
+                    raise ValueError(f"Invalid timestamp: {since}")
+            return _rollup_history(conn, since_ts)
     finally:
         conn.close()
 
 
+def store_contents(conn, contents: List[str]) -> List[bytes]:
+    """
+    Make sure each text is in the contents table (compressing only new ones);
+    returns their hashes. Call inside a BEGIN IMMEDIATE transaction.
+    """
+    hashes = [content_hash(c) for c in contents]
+    unique = dict(zip(hashes, contents))
+    if not unique:
+        return hashes
+    present = set()
+    keys = list(unique)
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        present.update(
+            row[0] for row in conn.execute(f"SELECT hash FROM contents WHERE hash IN ({placeholders})", chunk)
+        )
+    conn.executemany(
+        "INSERT OR IGNORE INTO contents (hash, data, size) VALUES (?, ?, ?)",
+        [(h, compress_content(c), len(c)) for h, c in unique.items() if h not in present],
+    )
+    return hashes
+
+
+_INSERT_SQL = """
+    INSERT INTO predictions (
+        prediction_id, title, content, label, probability, model_version, top_tokens, created_at, created_ts, minhash,
+        content_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, {}, ?, ?)
+""".format(_CREATED_TS_SQL.format("?"))
+
+
+# Rollup for a prediction that is counted but not stored (near-duplicate responses)
+_STATS_UPSERT_SQL = f"""
+    INSERT INTO prediction_stats (bucket_ts, model_version, label, count, probability_sum)
+    SELECT {_STATS_KEY_SQL.format(row="")}, 1, COALESCE(probability, 0)
+    FROM (SELECT {_CREATED_TS_SQL.format("?")} AS created_ts, ? AS model_version, ? AS label, ? AS probability)
+    WHERE created_ts IS NOT NULL
+    ON CONFLICT (bucket_ts, model_version, label) DO UPDATE SET
+        count = count + 1, probability_sum = probability_sum + excluded.probability_sum
+"""
+
+
+def _record_to_row(record: Dict[str, Any], stored_hash: Optional[bytes] = None) -> tuple:
+    return (
+        record.get("prediction_id"),
+        record.get("title"),
+        record.get("content") if stored_hash is None else None,
+        record.get("label"),
+        record.get("probability"),
+        record.get("model_version"),
+        json.dumps(record.get("top_tokens")) if record.get("top_tokens") is not None else None,
+        record.get("created_at"),
+        record.get("created_at"),
+        record.get("minhash"),
+        stored_hash,
+    )
+
+
+# Called with each committed batch of history records (see on_history_written)
+_history_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+
+def on_history_written(callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+    """Call callback(records) after every commit of history rows, on the thread that wrote them."""
+    _history_listeners.append(callback)
+
+
+def _write_rows(conn, records: List[Dict[str, Any]]) -> None:
+    """Insert history records; those marked stats_only (see submit_stats) only update the rollups."""
+    start = time.perf_counter()
+    counted = [r for r in records if r.get("stats_only")]
+    if counted:
+        records = [r for r in records if not r.get("stats_only")]
+    with conn:
+        hashes: List[Optional[bytes]] = [None] * len(records)
+        if HISTORY_STORAGE == "dedup":
+            # Take the write lock before checking which bodies exist, so a
+            # concurrent orphan cleanup cannot delete one we are about to reference
+            conn.execute("BEGIN IMMEDIATE")
+            idx = [i for i, r in enumerate(records) if r.get("content") is not None]
+            for i, h in zip(idx, store_contents(conn, [records[i]["content"] for i in idx])):
+                hashes[i] = h
+        conn.executemany(_INSERT_SQL, [_record_to_row(r, h) for r, h in zip(records, hashes)])
+        if counted:
+            conn.executemany(
+                _STATS_UPSERT_SQL,
+                [(r.get("created_at"), r.get("model_version") or "", r.get("label") or "", r.get("probability"))
+                 for r in counted],
+            )
+    observe_stage("db_write", time.perf_counter() - start)
+    DB_ROWS_WRITTEN.inc(amount=len(records))
+    if records:
+        for callback in _history_listeners:
+            try:
+                callback(records)
+            except Exception:
+                logger.exception("History write listener failed")
+
+
+def insert_prediction(record: Dict[str, Any]) -> None:
+    _write_rows(_pooled_conn(), [record])
+
+
+def insert_predictions(records: List[Dict[str, Any]]) -> None:
+    """Insert many prediction records in a single transaction."""
+    if not records:
+        return
+    _write_rows(_pooled_conn(), records)
+
+
+HISTORY_FIELDS = (
+    "prediction_id",
+    "title",
+    "content",
+    "label",
+    "probability",
+    "model_version",
+    "top_tokens",
+    "created_at",
+    "verified_label",
+)
+
+# Length of the content snippet returned in summary mode
+SUMMARY_CONTENT_CHARS = 200
+
+
+def encode_cursor(created_ts: int, row_id: int) -> str:
+    raw = f"{created_ts}:{row_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_ts, row_id = base64.urlsafe_b64decode(padded).decode("ascii").split(":")
+        return int(created_ts), int(row_id)
+    except Exception:
+        raise ValueError("Invalid history cursor")
+
+
+def fetch_history_page(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    summary: bool = False,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Newest-first history page using keyset pagination on (created_ts, id).
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    fields projects the returned columns; summary truncates content to
+    SUMMARY_CONTENT_CHARS.
+    """
+    fields = list(fields) if fields else list(HISTORY_FIELDS)
+    unknown = [f for f in fields if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown history fields: {', '.join(unknown)}")
+
+    columns = []
+    for f in fields:
+        if f == "content":
+            columns.append(_content_prefix_sql(SUMMARY_CONTENT_CHARS) if summary else CONTENT_SQL)
+        else:
+            columns.append(f"p.{f}")
+
+    sql = f"SELECT p.id, p.created_ts, {', '.join(columns)} FROM predictions p"
+    params: List[Any] = []
+    if cursor:
+        created_ts, row_id = decode_cursor(cursor)
+        sql += " WHERE (p.created_ts < ? OR (p.created_ts = ? AND p.id < ?))"
+        params += [created_ts, created_ts, row_id]
+    sql += " ORDER BY p.created_ts DESC, p.id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    start = time.perf_counter()
+    rows = _pooled_conn().execute(sql, params).fetchall()
+    observe_stage("db_read", time.perf_counter() - start)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    result = []
+    for row in rows:
+        item = dict(zip(fields, row[2:]))
+        if item.get("top_tokens"):
+            item["top_tokens"] = json.loads(item["top_tokens"])
+        result.append(item)
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return result, next_cursor
+
+
 def fetch_history(limit: int = 20) -> List[Dict[str, Any]]:
-    conn = _get_conn()
+    items, _ = fetch_history_page(limit=limit)
+    return items
+
+
+SEARCH_SORTS = ("relevance", "newest")
+# bm25 weights for (title, content): a hit in the headline counts more
+SEARCH_WEIGHTS = (2.0, 1.0)
+SEARCH_SNIPPET_TOKENS = 16
+
+
+def fts_query(text: str) -> str:
+    """Plain keywords -> FTS5 query matching rows that contain every one of them."""
+    terms = text.split()
+    if not terms:
+        raise ValueError("Search query is empty")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_history(
+    query: str,
+    label: Optional[str] = None,
+    model_version: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    sort: str = "relevance",
+    limit: int = 20,
+    offset: int = 0,
+    fields: Optional[List[str]] = None,
+    raw_query: bool = False,
+    rank_window: int = HISTORY_SEARCH_RANK_WINDOW,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Full-text search over history titles and article text.
+
+    query is a list of keywords that must all appear, or FTS5 query syntax
+    (phrases, OR/NOT, NEAR, prefix*) with raw_query. created_from/created_to
+    are ISO-8601 bounds on created_at (inclusive/exclusive). Results are
+    ranked by bm25 or, with sort="newest", newest first. Returns
+    (items, next_offset); each item has the projected fields plus "score"
+    (higher is better) and a highlighted "snippet". next_offset is None on
+    the last page.
+
+    bm25 has to score every match before it can pick the best ones, so for
+    terms found in most of the history relevance sorting only ranks the
+    newest rank_window matches (that pass the filters); FTS5 walks those in
+    rowid order and stops there.
+    """
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    fields = list(fields) if fields else [f for f in HISTORY_FIELDS if f != "content"]
+    unknown = [f for f in fields if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown history fields: {', '.join(unknown)}")
+    match = query.strip() if raw_query else fts_query(query)
+    if not match:
+        raise ValueError("Search query is empty")
+
+    # 1. Matching ids and scores only; the index drives the join into predictions
+    weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+    matches = (
+        f"SELECT p.id, bm25(history_fts, {weights}) AS score "
+        "FROM history_fts JOIN predictions p ON p.id = history_fts.rowid WHERE history_fts MATCH ?"
+    )
+    params: List[Any] = [match]
+    if label is not None:
+        matches += " AND p.label = ?"
+        params.append(label)
+    if model_version is not None:
+        matches += " AND p.model_version = ?"
+        params.append(model_version)
+    if created_from is not None:
+        matches += " AND p.created_ts >= " + _CREATED_TS_SQL.format("?")
+        params.append(created_from)
+    if created_to is not None:
+        matches += " AND p.created_ts < " + _CREATED_TS_SQL.format("?")
+        params.append(created_to)
+    # rowid order is insertion order, which FTS5 walks without sorting
+    if sort == "newest":
+        sql = matches + " ORDER BY history_fts.rowid DESC LIMIT ? OFFSET ?"
+    elif rank_window > 0:
+        sql = (
+            f"SELECT id, score FROM ({matches} ORDER BY history_fts.rowid DESC LIMIT {int(rank_window)}) "
+            "ORDER BY score, id DESC LIMIT ? OFFSET ?"
+        )
+    else:
+        sql = matches + " ORDER BY score, p.id DESC LIMIT ? OFFSET ?"
+    params += [limit + 1, offset]
+
+    conn = _pooled_conn()
+    start = time.perf_counter()
     try:
+        hits = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        if raw_query and "fts5" in str(e):
+            raise ValueError(f"Invalid search query: {e}")
+        raise
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    if not hits:
+        observe_stage("db_read", time.perf_counter() - start)
+        return [], None
+
+    # 2. Columns and snippets for this page only (snippets decompress the body)
+    ids = [row_id for row_id, _ in hits]
+    placeholders = ",".join("?" * len(ids))
+    columns = [CONTENT_SQL if f == "content" else f"p.{f}" for f in fields]
+    rows = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            f"SELECT p.id, {', '.join(columns)} FROM predictions p WHERE p.id IN ({placeholders})", ids
+        )
+    }
+    snippets = dict(
+        conn.execute(
+            f"SELECT rowid, snippet(history_fts, -1, '[', ']', '...', {SEARCH_SNIPPET_TOKENS}) "
+            f"FROM history_fts WHERE history_fts MATCH ? AND rowid IN ({placeholders})",
+            [match] + ids,
+        )
+    )
+    observe_stage("db_read", time.perf_counter() - start)
+
+    result = []
+    for row_id, score in hits:
+        item = dict(zip(fields, rows[row_id]))
+        if item.get("top_tokens"):
+            item["top_tokens"] = json.loads(item["top_tokens"])
+        item["score"] = round(-score, 6)
+        item["snippet"] = snippets.get(row_id)
+        result.append(item)
+    return result, (offset + limit if has_more else None)
+
+
+def _ms_to_iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def fetch_stats(
+    bucket: str = "hour",
+    model_version: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Per-bucket prediction volume from the rollups (never scans predictions),
+    oldest bucket first, one item per (bucket, model_version) with totals
+    and a per-label breakdown. created_from/created_to are ISO-8601 bounds
+    (inclusive/exclusive) aligned down to whole hours.
+    """
+    if bucket not in STATS_BUCKET_MS:
+        raise ValueError(f"Unknown stats bucket: {bucket}")
+    width = STATS_BUCKET_MS[bucket]
+    sql = (
+        f"SELECT bucket_ts - bucket_ts % {width} AS bucket_start, model_version, label, "
+        "SUM(count), SUM(probability_sum) FROM prediction_stats WHERE 1"
+    )
+    params: List[Any] = []
+    for bound, op in ((created_from, ">="), (created_to, "<")):
+        if bound is not None:
+            # the hour containing the bound (same rounding as the rollup key)
+            hour = STATS_BUCKET_MS["hour"]
+            sql += f" AND bucket_ts {op} (({_CREATED_TS_SQL.format('?')}) / {hour}) * {hour}"
+            params.append(bound)
+    if model_version is not None:
+        sql += " AND model_version = ?"
+        params.append(model_version)
+    sql += " GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+
+    start = time.perf_counter()
+    rows = _pooled_conn().execute(sql, params).fetchall()
+    observe_stage("db_read", time.perf_counter() - start)
+
+    groups: Dict[Tuple[int, str], List[tuple]] = {}
+    for bucket_start, version, label, count, probability_sum in rows:
+        groups.setdefault((bucket_start, version), []).append((label, count, probability_sum))
+
+    items = []
+    for (bucket_start, version), labels in groups.items():
+        total = sum(count for _, count, _ in labels)
+        items.append({
+            "bucket_start": _ms_to_iso(bucket_start),
+            "model_version": version,
+            "count": total,
+            "mean_probability": round(sum(p for _, _, p in labels) / total, 6),
+            "labels": {
+                label: {"count": count, "mean_probability": round(probability_sum / count, 6)}
+                for label, count, probability_sum in labels
+            },
+        })
+    return items
+
+
+def record_feedback(prediction_id: str, label: str, verified_at: str) -> Optional[int]:
+    """Store a verified label on the prediction's history row; returns its feedback_seq, or None if unknown."""
+    conn = _pooled_conn()
+    with conn:
         cur = conn.execute(
-            """
-            SELECT prediction_id, title, content, label, probability, model_version, top_tokens, created_at
-            FROM predictions
-            ORDER BY datetime(created_at) DESC
-            LIMIT ?
-            """,
-            (limit,),
+            "UPDATE predictions SET verified_label = ?, verified_at = ?, "
+            "feedback_seq = (SELECT COALESCE(MAX(feedback_seq), 0) + 1 FROM predictions) "
+            "WHERE prediction_id = ?",
+            (label, verified_at, prediction_id),
         )
-        rows = cur.fetchall()
-        result = []
-        for row in rows:
-            top_tokens = json.loads(row[6]) if row[6] else None
-            result.append(
-                {
-                    "prediction_id": row[0],
-                    "title": row[1],
-                    "content": row[2],
-                    "label": row[3],
-                    "probability": row[4],
-                    "model_version": row[5],
-                    "top_tokens": top_tokens,
-                    "created_at": row[7],
-                }
+        if cur.rowcount == 0:
+            return None
+        return conn.execute(
+            "SELECT MAX(feedback_seq) FROM predictions WHERE prediction_id = ?", (prediction_id,)
+        ).fetchone()[0]
+
+
+def fetch_feedback(after_seq: int, limit: int) -> List[tuple]:
+    """(feedback_seq, title, content, verified_label) rows labelled after after_seq, oldest first."""
+    return _pooled_conn().execute(
+        f"SELECT p.feedback_seq, p.title, {CONTENT_SQL}, p.verified_label FROM predictions p "
+        "WHERE p.feedback_seq > ? ORDER BY p.feedback_seq LIMIT ?",
+        (after_seq, limit),
+    ).fetchall()
+
+
+def count_feedback(after_seq: int = 0) -> int:
+    return _pooled_conn().execute(
+        "SELECT COUNT(*) FROM predictions WHERE feedback_seq > ?", (after_seq,)
+    ).fetchone()[0]
+
+
+def fetch_minhash_rows(limit: int) -> List[tuple]:
+    """
+    Newest `limit` rows that carry a signature, returned oldest first as
+    (prediction_id, label, probability, top_tokens, model_version, minhash).
+    """
+    rows = _pooled_conn().execute(
+        "SELECT prediction_id, label, probability, top_tokens, model_version, minhash FROM predictions "
+        "WHERE minhash IS NOT NULL ORDER BY created_ts DESC, id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [
+        (pid, label, prob, json.loads(tokens) if tokens else None, version, blob)
+        for pid, label, prob, tokens, version, blob in reversed(rows)
+    ]
+
+
+def existing_prediction_ids(prediction_ids: List[str], batch_size: int = 500) -> set:
+    """The subset of prediction_ids that still have a history row."""
+    conn = _pooled_conn()
+    found = set()
+    for start in range(0, len(prediction_ids), batch_size):
+        batch = prediction_ids[start:start + batch_size]
+        placeholders = ",".join("?" * len(batch))
+        found.update(
+            row[0] for row in conn.execute(
+                f"SELECT prediction_id FROM predictions WHERE prediction_id IN ({placeholders})", batch
             )
-        return result
+        )
+    return found
+
+
+def backfill_minhash(signature_fn, only_missing: bool = True, batch_size: int = 1000) -> int:
+    """Compute signature_fn(title, content) for history rows; returns rows updated."""
+    conn = _get_conn()
+    try:
+        sql = f"SELECT p.id, p.title, {CONTENT_SQL} FROM predictions p WHERE p.id > ?"
+        if only_missing:
+            sql += " AND p.minhash IS NULL"
+        sql += " ORDER BY p.id LIMIT ?"
+        last_id, updated = 0, 0
+        while True:
+            rows = conn.execute(sql, (last_id, batch_size)).fetchall()
+            if not rows:
+                return updated
+            params = []
+            for row_id, title, content in rows:
+                signature = signature_fn(title, content or "")
+                if signature is not None:
+                    params.append((signature.tobytes(), row_id))
+            with conn:
+                conn.executemany("UPDATE predictions SET minhash = ? WHERE id = ?", params)
+            updated += len(params)
+            last_id = rows[-1][0]
     finally:
         conn.close()
+
+
+class HistoryWriter:
+    """
+    Background thread that drains a bounded queue of prediction records and
+    commits them in batches over one persistent connection.
+
+    submit() never blocks longer than put_timeout; when the queue stays full
+    the record is dropped and counted (history is best effort, latency is not).
+    """
+
+    def __init__(
+        self,
+        queue_size: int = HISTORY_WRITER_QUEUE_SIZE,
+        batch_size: int = HISTORY_WRITER_BATCH_SIZE,
+        flush_interval: float = HISTORY_WRITER_FLUSH_INTERVAL,
+        put_timeout: float = HISTORY_WRITER_PUT_TIMEOUT,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()  # counters are updated from request threads and the writer thread
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.last_batch_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("History queue full; dropping record %s", record.get("prediction_id"))
+            return False
+        depth = self._queue.qsize()
+        with self._lock:
+            self.submitted += 1
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted before this call is committed."""
+        if not self.running:
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush pending records and stop the writer thread."""
+        if not self.running:
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        conn = _get_conn()
+        try:
+            while not self._stop.is_set():
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                batch, markers = [], []
+                while True:
+                    if isinstance(item, threading.Event):
+                        markers.append(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                self._commit(conn, batch)
+                for marker in markers:
+                    marker.set()
+            # Drain anything submitted while stopping
+            leftovers = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    item.set()
+                else:
+                    leftovers.append(item)
+            self._commit(conn, leftovers)
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            _write_rows(conn, batch)
+        except Exception:
+            with self._lock:
+                self.failed += len(batch)
+            logger.exception("Failed to write %d history records", len(batch))
+        else:
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        with self._lock:
+            self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_batch_ms": round(self.last_batch_ms, 3),
+            }
+
+
+_writer: Optional[HistoryWriter] = None
+
+
+def start_writer(**kwargs) -> HistoryWriter:
+    """Start the shared background writer (idempotent)."""
+    global _writer
+    if _writer is None:
+        _writer = HistoryWriter(**kwargs)
+        atexit.register(stop_writer)
+    _writer.start()
+    return _writer
+
+
+def stop_writer(timeout: Optional[float] = 10.0) -> None:
+    if _writer is not None:
+        _writer.stop(timeout)
+
+
+def _submit(records: List[Dict[str, Any]]) -> None:
+    if _writer is None or not _writer.running:
+        insert_predictions(records)
+        return
+    for record in records:
+        _writer.submit(record)
+
+
+def submit_predictions(records: List[Dict[str, Any]]) -> None:
+    """Queue records for the background writer, or write inline if it is not running."""
+    _submit(records)
+
+
+def submit_stats(records: List[Dict[str, Any]]) -> None:
+    """
+    Count predictions in the stats rollups without storing them in history
+    (created_at, model_version, label, probability), through the same
+    writer as submit_predictions.
+    """
+    _submit([dict(record, stats_only=True) for record in records])
+
+
+def flush_writer(timeout: Optional[float] = 5.0) -> bool:
+    """Wait until queued history records are committed (no-op without a writer)."""
+    if _writer is None or not _writer.running:
+        return True
+    return _writer.flush(timeout)
+
+
+def writer_stats() -> Optional[Dict[str, Any]]:
+    return _writer.stats() if _writer is not None else None
@@ -0,0 +1,101 @@
+# backend/executors.py
+"""
+Dedicated thread pools for the blocking stages of a request.
+
+CPU-bound preprocessing + inference and SQLite I/O each get their own
+executor so they can be sized separately and never starve one another
+(or the event loop). Each stage reports queue depth, in-flight work and
+timeouts for the health endpoint.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class StageTimeoutError(RuntimeError):
+    pass
+
+
+class StageExecutor:
+    def __init__(self, name: str, max_workers: int, timeout: Optional[float] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-stage")
+        self._lock = threading.Lock()
+        self._pending = 0  # submitted, not finished (queued + active)
+        self._active = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def _tracked(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._pending -= 1
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on this stage's pool without blocking the loop.
+        Raises StageTimeoutError after `timeout` seconds (defaults to the
+        stage timeout); the worker thread still finishes the call.
+        """
+        with self._lock:
+            self._pending += 1
+            queued = self._pending - self._active
+            if queued > self.max_queued:
+                self.max_queued = queued
+        call = functools.partial(self._tracked, fn, *args, **kwargs)
+        try:
+            future = asyncio.wrap_future(self._pool.submit(call))
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            # shield: a timed-out call keeps its slot accounting consistent
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise StageTimeoutError(f"{self.name} stage timed out after {timeout}s")
+
+    @property
+    def idle_workers(self) -> int:
+        """Workers that would start a newly submitted call right away."""
+        with self._lock:
+            return max(0, self.max_workers - self._pending)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "timeout_s": self.timeout,
+                "active": self._active,
+                "queue_depth": self._pending - self._active,
+                "max_queue_depth": self.max_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+            }
@@ -0,0 +1,244 @@
+# backend/history_maintenance.py
+"""
+Retention, compaction and storage migration for history.db.
+
+  python history_maintenance.py --migrate                 # one-shot: inline bodies -> contents table
+  python history_maintenance.py --compact                 # retention + orphan cleanup + VACUUM
+  python history_maintenance.py --compact --retention-days 30 --max-rows 1000000
+  python history_maintenance.py --rebuild-stats [--since 2025-01-01T00:00:00Z]
+
+Retention never deletes rows that carry a verified label (they are training
+data for online_learner.py). Article bodies are dropped once no prediction
+references them. VACUUM only runs when enough of the file is free pages to
+be worth rewriting it. The API runs the same compaction in the background
+when HISTORY_COMPACT_INTERVAL is set, and then also drops the deleted rows
+from its near-duplicate index. A separate CLI run cannot reach that index;
+running APIs keep matching pruned rows until they restart.
+
+Retention does not touch the hourly stats rollups. --rebuild-stats
+recomputes them from the rows still in history, so use --since to leave
+pruned hours as they are. Near-duplicate responses are counted in the
+rollups but have no history row, so rebuilt hours lose them.
+"""
+
+import argparse
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import db
+from config import HISTORY_MAX_ROWS, HISTORY_RETENTION_DAYS
+
+logger = logging.getLogger("history-maintenance")
+
+DELETE_BATCH = 5000
+# VACUUM rewrites the whole file, so only when at least this share of it is free pages
+VACUUM_MIN_FREE_FRACTION = 0.1
+
+
+def migrate_inline_content(batch_size: int = 1000) -> int:
+    """Move bodies stored in predictions.content into the contents table; resumable. Returns rows moved."""
+    conn = db._get_conn()
+    moved = 0
+    try:
+        while True:
+            rows = conn.execute(
+                "SELECT id, content FROM predictions WHERE content IS NOT NULL ORDER BY id LIMIT ?",
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                return moved
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                hashes = db.store_contents(conn, [content for _, content in rows])
+                conn.executemany(
+                    "UPDATE predictions SET content = NULL, content_hash = ? WHERE id = ?",
+                    [(h, row_id) for h, (row_id, _) in zip(hashes, rows)],
+                )
+            moved += len(rows)
+            logger.info("Migrated %d history rows to deduplicated storage", moved)
+    finally:
+        conn.close()
+
+
+def _delete_in_batches(conn, select_ids_sql: str, params: tuple) -> int:
+    """Delete the rows select_ids_sql returns, DELETE_BATCH per transaction so writers are not blocked for long."""
+    deleted = 0
+    while True:
+        with conn:
+            cur = conn.execute(
+                f"DELETE FROM predictions WHERE id IN ({select_ids_sql} LIMIT {DELETE_BATCH})", params
+            )
+        deleted += cur.rowcount
+        if cur.rowcount < DELETE_BATCH:
+            return deleted
+
+
+def apply_retention(conn, retention_days: float = 0, max_rows: int = 0, now: Optional[float] = None) -> int:
+    deleted = 0
+    if retention_days > 0:
+        cutoff_ms = int(((now if now is not None else time.time()) - retention_days * 86400) * 1000)
+        deleted += _delete_in_batches(
+            conn,
+            "SELECT id FROM predictions WHERE created_ts < ? AND verified_label IS NULL",
+            (cutoff_ms,),
+        )
+    if max_rows > 0:
+        # Unlabelled rows past the newest max_rows (one boundary lookup, then ranged deletes)
+        boundary = conn.execute(
+            "SELECT created_ts, id FROM predictions ORDER BY created_ts DESC, id DESC LIMIT 1 OFFSET ?",
+            (max_rows - 1,),
+        ).fetchone()
+        if boundary is not None:
+            deleted += _delete_in_batches(
+                conn,
+                "SELECT id FROM predictions WHERE (created_ts < ? OR (created_ts = ? AND id < ?)) "
+                "AND verified_label IS NULL",
+                (boundary[0], boundary[0], boundary[1]),
+            )
+    return deleted
+
+
+def delete_orphan_contents(conn) -> int:
+    with conn:
+        cur = conn.execute(
+            "DELETE FROM contents WHERE NOT EXISTS "
+            "(SELECT 1 FROM predictions p WHERE p.content_hash = contents.hash)"
+        )
+    return cur.rowcount
+
+
+def vacuum_if_worthwhile(conn, min_free_fraction: float = VACUUM_MIN_FREE_FRACTION) -> bool:
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if not pages or free / pages < min_free_fraction:
+        return False
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    return True
+
+
+def compact_history(
+    retention_days: float = HISTORY_RETENTION_DAYS,
+    max_rows: int = HISTORY_MAX_ROWS,
+    vacuum: bool = True,
+    min_free_fraction: float = VACUUM_MIN_FREE_FRACTION,
+) -> Dict[str, Any]:
+    """Retention + orphaned-body cleanup + (maybe) VACUUM; returns what was done."""
+    start = time.perf_counter()
+    conn = db._get_conn()
+    try:
+        deleted = apply_retention(conn, retention_days, max_rows)
+        orphans = delete_orphan_contents(conn)
+        vacuumed = vacuum_if_worthwhile(conn, min_free_fraction) if vacuum else False
+    finally:
+        conn.close()
+    result = {
+        "deleted_rows": deleted,
+        "deleted_contents": orphans,
+        "vacuumed": vacuumed,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    logger.info("History compaction: %s", result)
+    return result
+
+
+def storage_stats() -> Dict[str, Any]:
+    conn = db._pooled_conn()
+    rows, inline = conn.execute(
+        "SELECT COUNT(*), COUNT(content) FROM predictions"
+    ).fetchone()
+    contents, raw_bytes, stored_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length(data)), 0) FROM contents"
+    ).fetchone()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return {
+        "rows": rows,
+        "inline_rows": inline,
+        "distinct_contents": contents,
+        "content_chars": raw_bytes,
+        "content_compressed_bytes": stored_bytes,
+        "file_bytes": conn.execute("PRAGMA page_count").fetchone()[0] * page_size,
+        "free_bytes": conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size,
+    }
+
+
+class HistoryCompactor:
+    """
+    Run compact_history() every `interval` seconds on a daemon thread, then
+    on_compact(result) whenever a run deleted rows.
+    """
+
+    def __init__(self, interval: float, on_compact: Optional[Callable[[Dict[str, Any]], None]] = None, **kwargs):
+        self.interval = interval
+        self._on_compact = on_compact
+        self._kwargs = kwargs
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> None:
+        try:
+            self.last_result = compact_history(**self._kwargs)
+            self.last_error = None
+            if self._on_compact is not None and self.last_result["deleted_rows"]:
+                self._on_compact(self.last_result)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.exception("History compaction failed")
+        self.runs += 1
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="history-compactor", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"runs": self.runs, "last_result": self.last_result, "last_error": self.last_error}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="history.db migration and compaction")
+    parser.add_argument("--migrate", action="store_true", help="Move inline article bodies into the contents table")
+    parser.add_argument("--compact", action="store_true", help="Apply retention, drop unused bodies, VACUUM")
+    parser.add_argument("--retention-days", type=float, default=HISTORY_RETENTION_DAYS)
+    parser.add_argument("--max-rows", type=int, default=HISTORY_MAX_ROWS)
+    parser.add_argument("--force-vacuum", action="store_true", help="VACUUM even when little space is free")
+    parser.add_argument("--rebuild-stats", action="store_true", help="Recompute the hourly stats rollups from history")
+    parser.add_argument("--since", default=None, help="With --rebuild-stats: only hours from this ISO-8601 time on")
+    args = parser.parse_args()
+    if not (args.migrate or args.compact or args.rebuild_stats):
+        parser.error("nothing to do; pass --migrate, --compact and/or --rebuild-stats")
+
+    db.init_db()
+    if args.rebuild_stats:
+        print(f"Wrote {db.rebuild_stats(args.since)} stats rollup rows")
+        if not (args.migrate or args.compact):
+            raise SystemExit(0)
+    before = storage_stats()
+    if args.migrate:
+        print(f"Moved {migrate_inline_content()} rows to deduplicated storage")
+    # After a migration the freed inline bodies are always worth a VACUUM
+    result = compact_history(
+        args.retention_days if args.compact else 0,
+        args.max_rows if args.compact else 0,
+        min_free_fraction=0.0 if (args.force_vacuum or args.migrate) else VACUUM_MIN_FREE_FRACTION,
+    )
+    print(result)
+    after = storage_stats()
+    print(f"history.db: {before['file_bytes']} -> {after['file_bytes']} bytes")
@@ -6,17 +6,34 @@ predict(text) -> (label, probability, top_tokens)
 
 import os
 import joblib
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.pipeline import Pipeline
 import json
 import numpy as np
 from typing import Tuple, List, Optional
-from config import TFIDF_PATH, MODEL_PATH, METADATA_PATH, MODEL_VERSION
+from config import (
+    TFIDF_PATH,
+    MODEL_PATH,
+    METADATA_PATH,
+    MODEL_VERSION,
+    COMPACT_ARTIFACTS_DIR,
+    ARTIFACT_FORMAT,
+    SCORER,
+)
+import compact
+from linear_scorer import TermAccumulator, build_scorer, build_term_vectorizer
 import logging
+import time
+from metrics import observe_stage
 
 logger = logging.getLogger("model-server")
 
 # 🔧 Adjusted threshold to reduce false FAKE predictions
 FAKE_THRESHOLD = 0.6
 
+# Default number of explanation tokens returned per document
+TOP_K_TOKENS = 6
+
 
 class ModelNotLoadedError(RuntimeError):
     pass
@@ -27,18 +44,49 @@ class ModelServer:
         self.tfidf = None
         self.model = None
         self.model_version = None
+        self.artifact_format = None
+        self.vectorizer_kind = None  # "tfidf" (fitted vocabulary) | "hashing"
+        self.scorer_kind = None  # "numpy" (LinearScorer) | "sklearn"
         self.loaded = False
+        self._scorer = None
+        self._stream_vectorizer = None  # bounded streaming without the numpy scorer
+        self._class_idx = None  # (FAKE, REAL) column in predict_proba output
+        # Explanation metadata, cached once per load (see _cache_explain_metadata)
+        self._feature_names = None
+        self._class_coefs = None
+        self._hashing = None
         self._load_artifacts()
 
-    def _load_artifacts(self):
+    def _load_compact(self) -> bool:
+        if ARTIFACT_FORMAT == "pickle" or not compact.has_compact_artifacts(COMPACT_ARTIFACTS_DIR):
+            return False
         try:
-            if os.path.exists(TFIDF_PATH) and os.path.exists(MODEL_PATH):
-                logger.info("Loading TF-IDF vectorizer from %s", TFIDF_PATH)
-                self.tfidf = joblib.load(TFIDF_PATH)
+            logger.info("Loading compact artifacts from %s", COMPACT_ARTIFACTS_DIR)
+            self.tfidf, self.model, _ = compact.load_compact(COMPACT_ARTIFACTS_DIR)
+            self.artifact_format = "compact"
+            return True
+        except Exception:
+            logger.exception("Failed to load compact artifacts; falling back to pickle")
+            self.tfidf = None
+            self.model = None
+            return False
+
+    def _load_pickle(self) -> bool:
+        if ARTIFACT_FORMAT == "compact":
+            return False
+        if not (os.path.exists(TFIDF_PATH) and os.path.exists(MODEL_PATH)):
+            return False
+        logger.info("Loading TF-IDF vectorizer from %s", TFIDF_PATH)
+        self.tfidf = joblib.load(TFIDF_PATH)
 
-                logger.info("Loading model from %s", MODEL_PATH)
-                self.model = joblib.load(MODEL_PATH)
+        logger.info("Loading model from %s", MODEL_PATH)
+        self.model = joblib.load(MODEL_PATH)
+        self.artifact_format = "pickle"
+        return True
 
+    def _load_artifacts(self):
+        try:
+            if self._load_compact() or self._load_pickle():
                 if os.path.exists(METADATA_PATH):
                     try:
                         with open(METADATA_PATH, "r", encoding="utf-8") as fh:
@@ -46,19 +94,39 @@ class ModelServer:
                             self.model_version = meta.get(
                                 "model_version", MODEL_VERSION
                             )
+                            if meta.get("vectorizer"):
+                                self.vectorizer_kind = meta["vectorizer"]
                     except Exception:
                         self.model_version = MODEL_VERSION
                 else:
                     self.model_version = MODEL_VERSION
 
+                self._hashing = self._find_hashing_vectorizer()
+                detected = "hashing" if self._hashing is not None else "tfidf"
+                if self.vectorizer_kind and self.vectorizer_kind != detected:
+                    logger.warning(
+                        "metadata.json says vectorizer=%s but artifacts are %s",
+                        self.vectorizer_kind,
+                        detected,
+                    )
+                self.vectorizer_kind = detected
+
+                self._cache_explain_metadata()
+                self._scorer = self._build_scorer()
+                self.scorer_kind = "numpy" if self._scorer is not None else "sklearn"
+                self._stream_vectorizer = self._build_stream_vectorizer() if self._scorer is None else None
                 self.loaded = True
                 logger.info(
-                    "Model server loaded successfully. version=%s",
+                    "Model server loaded successfully. version=%s format=%s vectorizer=%s scorer=%s",
                     self.model_version,
+                    self.artifact_format,
+                    self.vectorizer_kind,
+                    self.scorer_kind,
                 )
             else:
                 logger.warning(
-                    "Model artifacts not found. TFIDF: %s, Model: %s",
+                    "Model artifacts not found. Compact: %s, TFIDF: %s, Model: %s",
+                    COMPACT_ARTIFACTS_DIR,
                     TFIDF_PATH,
                     MODEL_PATH,
                 )
@@ -67,62 +135,244 @@ class ModelServer:
             logger.exception("Failed to load model artifacts: %s", e)
             self.loaded = False
 
+    def _build_scorer(self):
+        """LinearScorer for the loaded artifacts, or None to use sklearn (SCORER=sklearn or unsupported model)."""
+        if SCORER == "sklearn":
+            return None
+        try:
+            return build_scorer(self.tfidf, self.model)
+        except Exception as e:
+            if SCORER == "numpy":
+                logger.warning("SCORER=numpy but the model is not supported (%s); using sklearn", e)
+            return None
+
+    def _build_stream_vectorizer(self):
+        """TermVectorizer that streamed documents are counted with when the numpy scorer is off, or None."""
+        try:
+            return build_term_vectorizer(self.tfidf)
+        except Exception as e:
+            logger.warning("Streamed documents will be buffered whole: %s", e)
+            return None
+
+    def _resolve_label(self, probs: np.ndarray) -> Tuple[str, float, int]:
+        """
+        Apply FAKE_THRESHOLD to one row of predict_proba output.
+        Returns (label, probability, class index of the label)
+        """
+        if self._class_idx is None:
+            classes = list(self.model.classes_)
+            self._class_idx = (classes.index("FAKE"), classes.index("REAL"))
+        fake_idx, real_idx = self._class_idx
+
+        fake_prob = float(probs[fake_idx])
+        real_prob = float(probs[real_idx])
+
+        if fake_prob >= FAKE_THRESHOLD:
+            return "FAKE", fake_prob, fake_idx
+        return "REAL", real_prob, real_idx
+
+    def _find_hashing_vectorizer(self) -> Optional[HashingVectorizer]:
+        """The HashingVectorizer of a hashing + IDF pipeline, else None."""
+        if isinstance(self.tfidf, HashingVectorizer):
+            return self.tfidf
+        if isinstance(self.tfidf, Pipeline) and isinstance(self.tfidf.steps[0][1], HashingVectorizer):
+            return self.tfidf.steps[0][1]
+        return None
+
+    def _hashed_feature_names(self, text: str) -> dict:
+        """
+        Column -> n-gram for one document under the hashing variant. There is
+        no vocabulary to invert, so the document's own n-grams are hashed
+        (one vectorized call) to see which column each one landed in.
+        """
+        grams = list(dict.fromkeys(self._hashing.build_analyzer()(text)))
+        if not grams:
+            return {}
+        H = self._hashing.transform(grams).tocsr()
+        names = {}
+        for i, gram in enumerate(grams):
+            for col in H.indices[H.indptr[i]:H.indptr[i + 1]]:
+                names.setdefault(int(col), gram)
+        return names
+
+    def _cache_explain_metadata(self):
+        """
+        Cache feature names and per-class coefficient vectors so explanations
+        never rebuild them per request. Leaves both as None for models
+        without linear coefficients.
+        """
+        self._feature_names = None
+        self._class_coefs = None
+        try:
+            if not hasattr(self.model, "coef_"):
+                return
+            coefs = np.asarray(self.model.coef_, dtype=np.float64)
+            if coefs.ndim == 1:
+                coefs = coefs.reshape(1, -1)
+            if coefs.shape[0] == 1 and len(self.model.classes_) == 2:
+                # Binary models store one row pointing towards classes_[1]
+                self._class_coefs = {0: -coefs[0], 1: coefs[0]}
+            else:
+                self._class_coefs = {i: coefs[i] for i in range(coefs.shape[0])}
+            if self._hashing is None:
+                self._feature_names = self.tfidf.get_feature_names_out()
+        except Exception:
+            logger.exception("Could not cache explanation metadata")
+            self._feature_names = None
+            self._class_coefs = None
+
+    def _explain_row(
+        self, X, row: int, pred_idx: int, top_k: int, text: Optional[str] = None, names: Optional[dict] = None
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Top-k (token, contribution) pairs for one CSR row, computed only over
+        the row's non-zero features. Only tokens pushing towards the
+        predicted class are returned, highest contribution first. names
+        (column -> n-gram) stands in for text under the hashing variant.
+        """
+        if self._class_coefs is None or pred_idx not in self._class_coefs:
+            return None
+        if top_k <= 0:
+            return []
+
+        start, end = X.indptr[row], X.indptr[row + 1]
+        cols = X.indices[start:end]
+        contrib = X.data[start:end] * self._class_coefs[pred_idx][cols]
+
+        positive = contrib > 0
+        cols, contrib = cols[positive], contrib[positive]
+        if len(contrib) > top_k:
+            part = np.argpartition(-contrib, top_k - 1)[:top_k]
+        else:
+            part = np.arange(len(contrib))
+        order = part[np.argsort(-contrib[part], kind="stable")]
+        if self._feature_names is not None:
+            names = self._feature_names
+        elif self._hashing is not None and names is not None:
+            pass
+        elif self._hashing is not None and text is not None:
+            names = self._hashed_feature_names(text)
+        else:
+            return None
+        return [(str(names[cols[i]]), float(contrib[i])) for i in order]
+
     def predict(
-        self, preprocessed_text: str
-    ) -> Tuple[str, float, Optional[List[str]]]:
+        self,
+        preprocessed_text: str,
+        top_k: int = TOP_K_TOKENS,
+        return_scores: bool = False,
+    ) -> Tuple:
         """
         preprocessed_text is expected to be cleaned text
-        Returns (label, probability, top_tokens)
+        Returns (label, probability, top_tokens), or
+        (label, probability, top_tokens, token_scores) when return_scores is set
+        """
+        return self.predict_batch(
+            [preprocessed_text], top_k=top_k, return_scores=return_scores
+        )[0]
+
+    def predict_batch(
+        self,
+        preprocessed_texts: List[str],
+        top_k: int = TOP_K_TOKENS,
+        return_scores: bool = False,
+    ) -> List[Tuple]:
+        """
+        Score many preprocessed texts with one transform + one predict_proba call.
+        Returns a list of predict() tuples in input order.
         """
 
         if not self.loaded or self.tfidf is None or self.model is None:
             raise ModelNotLoadedError("Model artifacts not loaded")
 
-        # Vectorize input
-        X = self.tfidf.transform([preprocessed_text])
+        if not preprocessed_texts:
+            return []
+
+        # Vectorize the whole batch into a single sparse matrix
+        # (CSR triplet arrays on the numpy scorer path)
+        scorer = self._scorer
+        start = time.perf_counter()
+        if scorer is not None:
+            X = scorer.transform(preprocessed_texts)
+        else:
+            X = self.tfidf.transform(preprocessed_texts).tocsr()
+        observe_stage("vectorize", time.perf_counter() - start)
+        return self._score(X, scorer, preprocessed_texts, top_k, return_scores)
 
-        # Predict probabilities
-        if hasattr(self.model, "predict_proba"):
-            probs = self.model.predict_proba(X)[0]
+    def _score(
+        self, X, scorer, texts: Optional[List[str]], top_k: int, return_scores: bool, names: Optional[dict] = None
+    ) -> List[Tuple]:
+        """predict() tuples for vectorized rows X (texts, or names for one row, only feed hashing explanations)."""
+        vectorized = time.perf_counter()
+        results = []
+        if scorer is not None:
+            for row in scorer.predict_proba(X):
+                results.append(self._resolve_label(row))
+        elif hasattr(self.model, "predict_proba"):
+            probs = self.model.predict_proba(X)
+            for row in probs:
+                results.append(self._resolve_label(row))
+        else:
+            for label_val in self.model.predict(X):
+                results.append((str(label_val), 1.0, 0))
+        scored = time.perf_counter()
+        observe_stage("inference", scored - vectorized)
 
-            classes = list(self.model.classes_)
-            fake_idx = classes.index("FAKE")
-            real_idx = classes.index("REAL")
-
-            fake_prob = float(probs[fake_idx])
-            real_prob = float(probs[real_idx])
-            
-            # print("fake probability", fake_prob);
-            # print(real_prob);
-
-            if fake_prob >= FAKE_THRESHOLD:
-                label_val = "FAKE"
-                prob = fake_prob
-                pred_idx = fake_idx
+        out = []
+        for row, (label_val, prob, pred_idx) in enumerate(results):
+            # Per-document explanation from the sparse feature row
+            try:
+                explained = self._explain_row(
+                    X, row, pred_idx, top_k, texts[row] if texts is not None else None, names
+                )
+            except Exception:
+                explained = None
+
+            top_tokens = [t for t, _ in explained] if explained is not None else None
+            if return_scores:
+                token_scores = [c for _, c in explained] if explained is not None else None
+                out.append((label_val, prob, top_tokens, token_scores))
             else:
-                label_val = "REAL"
-                prob = real_prob
-                pred_idx = real_idx
-        else:
-            label_val = str(self.model.predict(X)[0])
-            prob = 1.0
-            pred_idx = 0
+                out.append((label_val, prob, top_tokens))
+        observe_stage("explain", time.perf_counter() - scored)
+        return out
 
-        # Extract top contributing tokens
-        top_tokens = None
-        try:
-            if hasattr(self.model, "coef_") and hasattr(
-                self.tfidf, "get_feature_names_out"
-            ):
-                feature_names = self.tfidf.get_feature_names_out()
-                coefs = self.model.coef_
+    def stream_accumulator(self):
+        """
+        Collector for one long document fed as preprocessed chunks (add(text)),
+        scored with predict_accumulated(). Only per-column term counts are
+        kept, so memory is bounded by the vocabulary, not the article: with
+        the numpy scorer, and otherwise for TF-IDF vocabularies and the
+        hashing + IDF variant (scored by sklearn from the final row). Only a
+        vectorizer build_term_vectorizer() rejects (e.g. char n-grams) falls
+        back to buffering the whole text.
+        """
+        if not self.loaded:
+            raise ModelNotLoadedError("Model artifacts not loaded")
+        if self._scorer is not None:
+            return self._scorer.accumulator()
+        if self._stream_vectorizer is not None:
+            return TermAccumulator(self._stream_vectorizer, track_names=self._hashing is not None)
+        return _TextAccumulator()
 
-                if coefs.ndim > 1:
-                    coefs = coefs[pred_idx]
+    def predict_accumulated(self, accumulator, top_k: int = TOP_K_TOKENS, return_scores: bool = False) -> Tuple:
+        if isinstance(accumulator, _TextAccumulator):
+            return self.predict(accumulator.text(), top_k=top_k, return_scores=return_scores)
+        if self._scorer is not None:
+            return self._score(accumulator.rows(), self._scorer, None, top_k, return_scores)[0]
+        X = accumulator.rows().tocsr(self._stream_vectorizer.n_features)
+        return self._score(X, None, None, top_k, return_scores, accumulator.names)[0]
 
-                top_idx = np.argsort(coefs)[-6:][::-1]
-                top_tokens = [feature_names[i] for i in top_idx]
-        except Exception:
-            top_tokens = None
 
-        return label_val, prob, top_tokens   # ✅ FIXED
\ No newline at end of file
+class _TextAccumulator:
+    def __init__(self):
+        self._parts: List[str] = []
+        self.tokens = 0
+
+    def add(self, text: str) -> None:
+        if text:
+            self._parts.append(text)
+            self.tokens += len(text.split())
+
+    def text(self) -> str:
+        return " ".join(self._parts)
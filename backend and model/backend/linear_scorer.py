@@ -0,0 +1,349 @@
+# backend/linear_scorer.py
+"""
+LinearScorer: TF-IDF + binary linear model scoring in plain numpy.
+
+For one short article most of TfidfVectorizer.transform + predict_proba is
+sklearn bookkeeping (parameter/array validation, sparse matrix construction,
+class lookups), not arithmetic. LinearScorer is built once per load from the
+fitted artifacts (pickled or compact). It keeps the idf vector, a single
+contiguous coefficient row pointing towards classes[1], the intercept and
+the class labels, and scores straight from each document's (column, value)
+arrays:
+
+    p(classes[1]) = sigmoid(sum(tfidf_values * coef[columns]) + intercept)
+
+transform() returns SparseRows, which has the indptr/indices/data
+attributes of a CSR matrix that ModelServer's explanations read, so no
+scipy matrix is built per request.
+
+TermAccumulator builds the same row for one very long document fed in
+consecutive chunks: only the per-column counts (bounded by the vocabulary)
+and the last ngram_range[1] - 1 tokens are kept between chunks.
+
+The vectorizer half (tokenize, count, weight) is TermVectorizer, which
+build_term_vectorizer() also makes for models LinearScorer cannot serve,
+including the hashing + IDF variant, so their streamed rows stay bounded
+too and only the final row goes through sklearn.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from compact import CompactLinearModel, CompactVectorizer
+
+
+class SparseRows:
+    """Minimal CSR triplet (sorted columns per row)."""
+
+    __slots__ = ("indptr", "indices", "data")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def row_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+
+    def tocsr(self, n_features: int) -> sp.csr_matrix:
+        return sp.csr_matrix((self.data, self.indices, self.indptr), shape=(self.n_rows, n_features))
+
+
+class TermVectorizer:
+    """
+    TF-IDF rows of a word n-gram vectorizer. lookup maps one term to its
+    column (-1 when unknown); lookup_many, when given, maps a list of terms
+    at once (the hashing variant hashes a whole chunk in one call).
+    """
+
+    def __init__(
+        self,
+        tokenize: Callable[[str], List[str]],
+        ngram_range: Tuple[int, int],
+        lookup: Optional[Callable[[str], int]],
+        idf: Optional[np.ndarray] = None,
+        norm: Optional[str] = "l2",
+        binary: bool = False,
+        sublinear_tf: bool = False,
+        n_features: Optional[int] = None,
+        lookup_many: Optional[Callable[[List[str]], np.ndarray]] = None,
+    ):
+        if norm not in (None, "l1", "l2"):
+            raise ValueError(f"unsupported norm: {norm!r}")
+        self._tokenize = tokenize
+        self.ngram_range = tuple(ngram_range)
+        self._lookup = lookup
+        self._lookup_many = lookup_many
+        self.idf = np.ascontiguousarray(idf, dtype=np.float64) if idf is not None else None
+        self.norm = norm
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.n_features = n_features
+
+    def _count_grams(self, tokens: List[str], counts: Dict[str, int], first: int = 0) -> None:
+        """Count the word n-grams of tokens that end at or after index first (sklearn's _word_ngrams order)."""
+        min_n, max_n = self.ngram_range
+        for n in range(min_n, max_n + 1):
+            if n == 1:
+                for token in tokens[first:]:
+                    counts[token] = counts.get(token, 0) + 1
+                continue
+            for i in range(max(0, first - n + 1), len(tokens) - n + 1):
+                gram = " ".join(tokens[i:i + n])
+                counts[gram] = counts.get(gram, 0) + 1
+
+    def _gram_columns(self, grams: List[str]) -> np.ndarray:
+        if self._lookup_many is not None:
+            return np.asarray(self._lookup_many(grams), dtype=np.int64)
+        lookup = self._lookup
+        return np.fromiter((lookup(gram) for gram in grams), dtype=np.int64, count=len(grams))
+
+    def _lookup_counts(self, counts: Dict[str, int]):
+        """Sorted vocabulary columns and term counts, like CountVectorizer's CSR rows."""
+        cols = self._gram_columns(list(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        known = cols >= 0
+        cols, tf = cols[known], tf[known]
+        order = np.argsort(cols, kind="stable")
+        return cols[order], tf[order]
+
+    def _columns(self, doc: str):
+        counts: Dict[str, int] = {}
+        self._count_grams(self._tokenize(doc), counts)
+        return self._lookup_counts(counts)
+
+    def accumulator(self) -> "TermAccumulator":
+        return TermAccumulator(self)
+
+    def transform(self, docs: Sequence[str]) -> SparseRows:
+        indptr = np.zeros(len(docs) + 1, dtype=np.int64)
+        cols_list, counts_list = [], []
+        for i, doc in enumerate(docs):
+            cols, counts = self._columns(doc)
+            cols_list.append(cols)
+            counts_list.append(counts)
+            indptr[i + 1] = indptr[i] + len(cols)
+
+        indices = np.concatenate(cols_list) if cols_list else np.zeros(0, dtype=np.int64)
+        data = np.concatenate(counts_list) if counts_list else np.zeros(0)
+        return self._weight(SparseRows(indptr, indices, data))
+
+    def _weight(self, rows: SparseRows) -> SparseRows:
+        """Raw term counts -> TF-IDF values, in place."""
+        indices, data, n_rows = rows.indices, rows.data, rows.n_rows
+        if self.binary:
+            data[:] = 1.0
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1
+        if self.idf is not None:
+            data *= self.idf[indices]
+        if self.norm and len(data):
+            row_ids = rows.row_ids()
+            if self.norm == "l2":
+                norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n_rows))
+            else:
+                norms = np.bincount(row_ids, weights=np.abs(data), minlength=n_rows)
+            norms[norms == 0.0] = 1.0
+            data /= norms[row_ids]
+        return rows
+
+
+class LinearScorer(TermVectorizer):
+    def __init__(
+        self,
+        tokenize: Callable[[str], List[str]],
+        ngram_range: Tuple[int, int],
+        lookup: Callable[[str], int],
+        coef: np.ndarray,
+        intercept: float,
+        classes: Sequence,
+        idf: Optional[np.ndarray] = None,
+        norm: Optional[str] = "l2",
+        binary: bool = False,
+        sublinear_tf: bool = False,
+    ):
+        super().__init__(tokenize, ngram_range, lookup, idf, norm, binary, sublinear_tf)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.n_features = len(self.coef)
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+
+    def decision_function(self, rows: SparseRows) -> np.ndarray:
+        weighted = rows.data * self.coef[rows.indices]
+        return np.bincount(rows.row_ids(), weights=weighted, minlength=rows.n_rows) + self.intercept
+
+    def predict_proba(self, rows: SparseRows) -> np.ndarray:
+        pos = 1.0 / (1.0 + np.exp(-self.decision_function(rows)))
+        return np.column_stack([1.0 - pos, pos])
+
+
+class TermAccumulator:
+    """
+    One document's TF-IDF row, built from consecutive preprocessed chunks.
+    With track_names, the first n-gram seen in each column is kept too
+    (explanations for the hashing variant, which has no vocabulary).
+    """
+
+    def __init__(self, scorer: TermVectorizer, track_names: bool = False):
+        self._scorer = scorer
+        self._counts: Dict[int, float] = {}
+        self._tail: List[str] = []  # n-grams may span a chunk boundary
+        self.tokens = 0
+        self.names: Optional[Dict[int, str]] = {} if track_names else None
+
+    def add(self, text: str) -> None:
+        scorer = self._scorer
+        new_tokens = scorer._tokenize(text)
+        if not new_tokens:
+            return
+        self.tokens += len(new_tokens)
+        tokens = self._tail + new_tokens
+        grams: Dict[str, int] = {}
+        scorer._count_grams(tokens, grams, first=len(self._tail))
+        counts = self._counts
+        cols = scorer._gram_columns(list(grams))
+        for col, tf in zip(cols.tolist(), grams.values()):
+            if col >= 0:
+                counts[col] = counts.get(col, 0.0) + tf
+        if self.names is not None:
+            for col, gram in zip(cols.tolist(), grams):
+                self.names.setdefault(col, gram)
+        keep = scorer.ngram_range[1] - 1
+        self._tail = tokens[-keep:] if keep > 0 else []
+
+    def rows(self) -> SparseRows:
+        cols = np.fromiter(sorted(self._counts), dtype=np.int64, count=len(self._counts))
+        data = np.fromiter((self._counts[c] for c in cols), dtype=np.float64, count=len(cols))
+        return self._scorer._weight(SparseRows(np.array([0, len(cols)], dtype=np.int64), cols, data))
+
+
+def _binary_linear_parts(model):
+    classes = getattr(model, "classes_", None)
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    if classes is None or coef is None or intercept is None:
+        raise ValueError(f"{type(model).__name__} is not a fitted linear model")
+    coef = np.asarray(coef)
+    if len(classes) != 2 or coef.ndim != 2 or coef.shape[0] != 1:
+        raise ValueError("only binary linear models with one coefficient row are supported")
+    # predict_proba is sigmoid(decision) only for these binary log-loss models
+    if isinstance(model, LogisticRegression):
+        sigmoid = getattr(model, "multi_class", "auto") != "multinomial"
+    elif isinstance(model, SGDClassifier):
+        sigmoid = model.loss == "log_loss"
+    else:
+        sigmoid = isinstance(model, CompactLinearModel) and model.multi_class == "binary"
+    if not sigmoid:
+        raise ValueError(f"{type(model).__name__} probabilities are not a plain sigmoid of the decision")
+    return coef[0], float(np.ravel(intercept)[0]), list(classes)
+
+
+def _sklearn_tokenizer(vectorizer) -> Callable[[str], List[str]]:
+    """sklearn's own preprocessor/tokenizer/stop words; n-grams are built by TermVectorizer."""
+    if vectorizer.analyzer != "word":
+        raise ValueError("only analyzer='word' vectorizers are supported")
+    preprocess = vectorizer.build_preprocessor()
+    tokenizer = vectorizer.build_tokenizer()
+    stop_words = vectorizer.get_stop_words()
+
+    def tokenize(doc: str) -> List[str]:
+        tokens = tokenizer(preprocess(doc))
+        if stop_words:
+            tokens = [t for t in tokens if t not in stop_words]
+        return tokens
+
+    return tokenize
+
+
+def _vocabulary_settings(vectorizer) -> Tuple[Dict[str, Any], int]:
+    """(TermVectorizer arguments, n_features) for a fitted-vocabulary vectorizer, or ValueError."""
+    if isinstance(vectorizer, CompactVectorizer):
+        lookup, n_features = vectorizer.vocabulary.lookup, len(vectorizer.vocabulary)
+        tokenize = vectorizer._tokenize
+    elif isinstance(vectorizer, TfidfVectorizer) and hasattr(vectorizer, "vocabulary_"):
+        get = vectorizer.vocabulary_.get
+        lookup, n_features = (lambda term: get(term, -1)), len(vectorizer.vocabulary_)
+        tokenize = _sklearn_tokenizer(vectorizer)
+    else:
+        raise ValueError(f"{type(vectorizer).__name__} has no fixed vocabulary to score against")
+    settings = {
+        "tokenize": tokenize,
+        "ngram_range": vectorizer.ngram_range,
+        "lookup": lookup,
+        "idf": vectorizer.idf_ if vectorizer.use_idf else None,
+        "norm": vectorizer.norm,
+        "binary": vectorizer.binary,
+        "sublinear_tf": vectorizer.sublinear_tf,
+    }
+    return settings, n_features
+
+
+def _single_term(term: str) -> List[str]:
+    return [term]
+
+
+def _hashing_term_vectorizer(vectorizer) -> TermVectorizer:
+    """TermVectorizer for a HashingVectorizer, alone or followed by a TfidfTransformer."""
+    steps = [step for _, step in vectorizer.steps] if isinstance(vectorizer, Pipeline) else [vectorizer]
+    hashing, weighting = steps[0], steps[1:]
+    if hashing.alternate_sign:
+        raise ValueError("signed hashing (alternate_sign=True) is not supported")
+    if weighting and (len(weighting) > 1 or not isinstance(weighting[0], TfidfTransformer)):
+        raise ValueError("only a TfidfTransformer may follow the HashingVectorizer")
+    if weighting and hashing.norm is not None:
+        raise ValueError("a normalizing HashingVectorizer before TF-IDF is not supported")
+
+    # Hash a chunk's n-grams in one call, one n-gram per row
+    hasher = HashingVectorizer(
+        n_features=hashing.n_features, analyzer=_single_term, alternate_sign=False, norm=None
+    )
+
+    def lookup_many(grams: List[str]) -> np.ndarray:
+        if not grams:
+            return np.zeros(0, dtype=np.int64)
+        return hasher.transform(grams).indices
+
+    if weighting:
+        tfidf = weighting[0]
+        idf = tfidf.idf_ if tfidf.use_idf else None
+        norm, sublinear_tf = tfidf.norm, tfidf.sublinear_tf
+    else:
+        idf, norm, sublinear_tf = None, hashing.norm, False
+    return TermVectorizer(
+        _sklearn_tokenizer(hashing),
+        hashing.ngram_range,
+        None,
+        idf=idf,
+        norm=norm,
+        binary=hashing.binary,
+        sublinear_tf=sublinear_tf,
+        n_features=hashing.n_features,
+        lookup_many=lookup_many,
+    )
+
+
+def build_term_vectorizer(vectorizer) -> TermVectorizer:
+    """TermVectorizer equivalent to vectorizer.transform (hashing + IDF pipelines included), or ValueError."""
+    if isinstance(vectorizer, HashingVectorizer) or (
+        isinstance(vectorizer, Pipeline) and isinstance(vectorizer.steps[0][1], HashingVectorizer)
+    ):
+        return _hashing_term_vectorizer(vectorizer)
+    settings, n_features = _vocabulary_settings(vectorizer)
+    return TermVectorizer(n_features=n_features, **settings)
+
+
+def build_scorer(vectorizer, model) -> LinearScorer:
+    """LinearScorer equivalent to vectorizer.transform + model.predict_proba, or ValueError."""
+    coef, intercept, classes = _binary_linear_parts(model)
+    settings, _ = _vocabulary_settings(vectorizer)
+    return LinearScorer(coef=coef, intercept=intercept, classes=classes, **settings)
@@ -0,0 +1,249 @@
+# backend/metrics.py
+"""
+Lightweight in-process metrics rendered in the Prometheus text format.
+
+Counters and histograms keep plain Python numbers behind one lock per
+metric; an observation is a bisect over the bucket bounds plus a few
+additions, so instrumentation stays cheap enough to leave on in production
+(~1µs per observe). Gauges are read from callbacks only at scrape time.
+
+Stage latencies share one histogram, labelled by stage:
+  preprocess | vectorize | inference | explain | db_write | db_read | batch_wait
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+LENGTH_BUCKETS = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [per-bucket counts (last = +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        return _Timer(self, labelvalues)
+
+    def snapshot(self, *labelvalues: str) -> Dict[str, float]:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": series[2], "sum": series[1]}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        bounds = self.buckets + (math.inf,)
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            base = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labelvalues", "_start")
+
+    def __init__(self, histogram: Histogram, labelvalues: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labelvalues = labelvalues
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labelvalues)
+        return False
+
+
+class GaugeCallback:
+    """Gauge family whose samples come from fn() -> {labelvalues tuple: value} at scrape time."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], fn: Callable):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self._fn() or {}
+        except Exception:
+            samples = {}
+        for labelvalues, value in sorted(samples.items()):
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Re-registering a name replaces it (module reloads, tests)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics: Iterable = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "fakenews_stage_latency_seconds", "Latency of each prediction-path stage.", ("stage",)
+))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "fakenews_request_latency_seconds", "End-to-end HTTP request latency.", ("endpoint", "method")
+))
+REQUESTS = REGISTRY.register(Counter(
+    "fakenews_http_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "method", "status")
+))
+PREDICTIONS = REGISTRY.register(Counter(
+    "fakenews_predictions_total", "Articles scored, by predicted label and model version.", ("endpoint", "label", "model_version")
+))
+PREDICTION_ERRORS = REGISTRY.register(Counter(
+    "fakenews_prediction_errors_total", "Failed predictions by reason and model version.", ("endpoint", "reason", "model_version")
+))
+INPUT_LENGTH = REGISTRY.register(Histogram(
+    "fakenews_input_length_chars", "Length of title + content sent for scoring.", ("endpoint",), buckets=LENGTH_BUCKETS
+))
+MICRO_BATCH_SIZE = REGISTRY.register(Histogram(
+    "fakenews_micro_batch_size", "Single-article requests scored together by the micro-batcher.",
+    buckets=BATCH_SIZE_BUCKETS,
+))
+DB_ROWS_WRITTEN = REGISTRY.register(Counter(
+    "fakenews_history_rows_written_total", "Prediction history rows committed to SQLite."
+))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_LATENCY.observe(seconds, stage)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: request latency + status counts per route template.
+    Unmatched paths share one "unmatched" label so scans can't explode cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            endpoint = getattr(scope.get("route"), "path", "unmatched")
+            method = scope.get("method", "")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint, method)
+            REQUESTS.inc(endpoint, method, str(status[0]))
@@ -0,0 +1,178 @@
+# backend/micro_batch.py
+"""
+Adaptive micro-batching for concurrent single-article predictions.
+
+Each /api/v1/predict call still preprocesses its own article, but the
+scoring step goes through MicroBatcher.predict(). Callers wait on an
+asyncio future, so a queued request holds no thread. Queued requests are
+sent to the inference pool as one ModelServer.predict_batch call:
+
+  - at once while fewer than max_inflight batches are running and the
+    pool has an idle worker, so a quiet server adds no latency;
+  - otherwise when max_batch requests are queued or the oldest one has
+    waited `window` seconds, whichever comes first;
+  - but never while max_inflight batches are running: the queue then goes
+    out as soon as one of them finishes.
+
+So batching only happens when requests would have queued anyway. Then a
+group shares one vectorizer pass and one predict_proba. Scoring is mostly
+GIL-bound Python, so by default only one batch runs at a time and the
+other workers stay free for preprocessing.
+
+Groups are keyed by model server (a hot reload can land mid-window) and
+top_k. Each caller gets exactly what server.predict() would have returned.
+
+Backpressure: once max_queue requests are waiting, predict() raises
+QueueFullError (the API answers 503) instead of growing the queue, and a
+caller that has no result after `timeout` seconds gets StageTimeoutError;
+its request is dropped if it was still queued.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import metrics
+from executors import StageExecutor, StageTimeoutError
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class _Pending(NamedTuple):
+    server: Any
+    text: str
+    top_k: int
+    future: asyncio.Future
+    enqueued: float
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        executor: StageExecutor,
+        window: float,
+        max_batch: int,
+        max_inflight: int = 1,
+        max_queue: int = 0,
+        timeout: Optional[float] = None,
+    ):
+        self.executor = executor
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)  # 0: unbounded
+        self.timeout = timeout
+        self._queue: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = 0
+        self._tasks: Set[asyncio.Future] = set()  # running batches, referenced until done
+        self.requests = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.batches = 0
+        self.batched = 0
+        self.max_batch_seen = 0
+        self.flushes = {"idle": 0, "full": 0, "window": 0}
+
+    async def predict(self, server, preprocessed_text: str, top_k: int, return_scores: bool = False) -> Tuple:
+        """server.predict(preprocessed_text, top_k, return_scores), scored together with concurrent callers."""
+        if self.max_queue and len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"micro-batch queue is full ({self.max_queue} waiting)")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        item = _Pending(server, preprocessed_text, top_k, future, time.perf_counter())
+        self._queue.append(item)
+        self.requests += 1
+        if self._can_dispatch():
+            self._flush("idle")
+        elif len(self._queue) >= self.max_batch:
+            self._flush("full")
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, "window")
+        try:
+            prediction = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # Still queued: never scored, so do not spend a batch slot on it
+            self._queue = [queued for queued in self._queue if queued is not item]
+            raise StageTimeoutError(f"micro-batch: no result within {self.timeout}s") from None
+        return prediction if return_scores else prediction[:3]
+
+    def _can_dispatch(self) -> bool:
+        return self._inflight < self.max_inflight and self.executor.idle_workers > 0
+
+    def _flush(self, reason: str) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        slots = self.max_inflight - self._inflight
+        if not self._queue or slots <= 0:
+            return  # a running batch re-flushes when it finishes
+        queued = self._queue
+        groups: Dict[Tuple[int, int], List[_Pending]] = {}
+        for item in queued:
+            groups.setdefault((id(item.server), item.top_k), []).append(item)
+        batches = [
+            group[start:start + self.max_batch]
+            for group in groups.values()
+            for start in range(0, len(group), self.max_batch)
+        ]
+        # What does not fit in the free slots stays queued, in arrival order
+        left = {id(item) for batch in batches[slots:] for item in batch}
+        self._queue = [item for item in queued if id(item) in left]
+        self.flushes[reason] += 1
+        for batch in batches[:slots]:
+            # Counted before the task starts, so requests later in this loop tick see the slot taken
+            self._inflight += 1
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: List[_Pending]) -> None:
+        now = time.perf_counter()
+        for item in items:
+            metrics.observe_stage("batch_wait", now - item.enqueued)
+        metrics.MICRO_BATCH_SIZE.observe(len(items))
+        self.batches += 1
+        self.batched += len(items)
+        self.max_batch_seen = max(self.max_batch_seen, len(items))
+        try:
+            results = await self.executor.run(
+                items[0].server.predict_batch, [item.text for item in items], top_k=items[0].top_k, return_scores=True
+            )
+        except Exception as e:
+            for item in items:
+                if not item.future.done():  # the caller may have gone away
+                    item.future.set_exception(e)
+        else:
+            for item, result in zip(items, results):
+                if not item.future.done():
+                    item.future.set_result(result)
+        finally:
+            self._inflight -= 1
+            # Requests that queued behind this batch can use the slot it freed
+            if self._queue:
+                if self._can_dispatch():
+                    self._flush("idle")
+                elif self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(self.window, self._flush, "window")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "max_batch": self.max_batch,
+            "max_inflight": self.max_inflight,
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue or None,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "inflight_batches": self._inflight,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched / self.batches, 3) if self.batches else None,
+            "max_batch_size": self.max_batch_seen,
+            "flushes": dict(self.flushes),
+        }
@@ -0,0 +1,212 @@
+# backend/model_manager.py
+"""
+Zero-downtime model reloads.
+
+ModelManager owns the serving ModelServer. reload() builds a fresh
+ModelServer from the artifact files in a background thread, warms it up
+on sample articles and only then swaps it in with a single reference
+assignment, so requests that already hold the old server finish on it and
+new requests see the new one. The replaced server is kept as `previous`
+for an instant rollback().
+
+MetadataWatcher polls metadata.json (train_baseline.py writes it after the
+pickles and compact files) and triggers reload() when it changes, which is
+how every worker of a multi-process deployment picks up a new model.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from inference import ModelServer, TOP_K_TOKENS
+from preprocessing import preprocess_fast
+
+logger = logging.getLogger("model-manager")
+
+WARMUP_TEXTS = (
+    "Shocking secret cure that doctors do not want you to know about, revealed in a leaked video.",
+    "The central bank raised interest rates by a quarter point on Tuesday, officials said.",
+    "Parliament passed the annual budget bill after a lengthy debate over public spending. " * 20,
+    "BREAKING!!! Celebrity insider claims aliens control the government http://example.com/x",
+)
+
+
+class ReloadInProgressError(RuntimeError):
+    pass
+
+
+class ModelManager:
+    def __init__(
+        self,
+        server: Optional[ModelServer] = None,
+        loader: Callable[[], ModelServer] = ModelServer,
+        on_swap: Optional[Callable[[ModelServer], None]] = None,
+        warmup_texts=WARMUP_TEXTS,
+    ):
+        self._loader = loader
+        self._on_swap = on_swap
+        self._warmup_texts = list(warmup_texts)
+        self._lock = threading.Lock()  # guards current/previous
+        self._reload_lock = threading.Lock()  # one reload at a time
+        self._thread: Optional[threading.Thread] = None
+        self.current = server if server is not None else loader()
+        self.previous: Optional[ModelServer] = None
+        self.state = "idle"  # idle | loading | failed
+        self.last_error: Optional[str] = None
+        self.last_swap_at: Optional[str] = None
+        self.last_warmup_ms: Optional[float] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.rollbacks = 0
+
+    def _warm_up(self, server: ModelServer) -> None:
+        """Exercise transform + predict_proba + explanations; raise if the model looks broken."""
+        start = time.perf_counter()
+        prepped = [preprocess_fast(t) for t in self._warmup_texts]
+        results = server.predict_batch(prepped, top_k=TOP_K_TOKENS)
+        if len(results) != len(prepped):
+            raise RuntimeError("warm-up returned the wrong number of predictions")
+        for label, prob, _ in results:
+            if not label or not math.isfinite(float(prob)) or not 0.0 <= float(prob) <= 1.0:
+                raise RuntimeError(f"warm-up produced an invalid prediction: {label!r} {prob!r}")
+        self.last_warmup_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    def _swap(self, server: ModelServer, previous: Optional[ModelServer]) -> None:
+        with self._lock:
+            self.previous = previous
+            self.current = server
+            self.last_swap_at = datetime.utcnow().isoformat() + "Z"
+        if self._on_swap is not None:
+            self._on_swap(server)
+
+    def _reload(self) -> None:
+        try:
+            candidate = self._loader()
+            if not candidate.loaded:
+                raise RuntimeError("new artifacts failed to load (see model-server log)")
+            self._warm_up(candidate)
+            self._swap(candidate, self.current)
+            self.reloads += 1
+            self.state = "idle"
+            self.last_error = None
+            logger.info("Model reloaded: now serving version=%s", candidate.model_version)
+        except Exception as e:
+            self.failed_reloads += 1
+            self.state = "failed"
+            self.last_error = str(e)
+            logger.exception("Model reload failed; still serving the previous model")
+        finally:
+            self._reload_lock.release()
+
+    def reload(self, wait: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Load, warm up and swap in the artifacts currently on disk.
+        Raises ReloadInProgressError if a reload is already running. With
+        wait=True blocks until it finishes and returns whether it succeeded.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("a model reload is already in progress")
+        self.state = "loading"
+        self._thread = threading.Thread(target=self._reload, name="model-reload", daemon=True)
+        self._thread.start()
+        if wait:
+            return self.wait(timeout)
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the running reload (if any) ends; True when the last reload succeeded."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.state == "idle"
+
+    def rollback(self) -> ModelServer:
+        """Swap the previous model back in (the current one becomes `previous`)."""
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("a model reload is in progress")
+        try:
+            if self.previous is None:
+                raise ValueError("no previous model to roll back to")
+            self._swap(self.previous, self.current)
+            self.rollbacks += 1
+            logger.info("Rolled back to model version=%s", self.current.model_version)
+            return self.current
+        finally:
+            self._reload_lock.release()
+
+    def status(self) -> Dict[str, Any]:
+        def describe(server: Optional[ModelServer]) -> Optional[Dict[str, Any]]:
+            if server is None:
+                return None
+            return {
+                "loaded": server.loaded,
+                "model_version": server.model_version,
+                "artifact_format": getattr(server, "artifact_format", None),
+                "vectorizer": getattr(server, "vectorizer_kind", None),
+                "scorer": getattr(server, "scorer_kind", None),
+            }
+
+        return {
+            "state": self.state,
+            "current": describe(self.current),
+            "previous": describe(self.previous),
+            "last_swap_at": self.last_swap_at,
+            "last_warmup_ms": self.last_warmup_ms,
+            "last_error": self.last_error,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "rollbacks": self.rollbacks,
+        }
+
+
+class MetadataWatcher:
+    """Poll a file's (mtime, size) and call on_change() when it changes."""
+
+    def __init__(self, path: str, interval: float, on_change: Callable[[], None]):
+        self.path = path
+        self.interval = interval
+        self._on_change = on_change
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last = self._signature()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def poll(self) -> bool:
+        signature = self._signature()
+        if signature is None or signature == self._last:
+            return False
+        self._last = signature
+        try:
+            self._on_change()
+        except ReloadInProgressError:
+            # Picked up again on the next poll once the running reload ends
+            self._last = None
+        except Exception:
+            logger.exception("Metadata change handler failed")
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="metadata-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+            self._thread = None
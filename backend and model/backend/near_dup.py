@@ -0,0 +1,225 @@
+# backend/near_dup.py
+"""
+MinHash / LSH index of scored articles, for near-duplicate short-circuiting.
+
+Syndicated stories come back with a different byline, trailing boilerplate
+or tracking text. Their preprocessed token streams still share almost all
+word 3-shingles, so the MinHash signature of an incoming article lets us
+find an earlier prediction whose estimated Jaccard similarity is above
+NEAR_DUP_THRESHOLD and reuse its result. That avoids both re-scoring the
+article and storing another history row.
+
+Signatures are stored alongside each history row (predictions.minhash), so
+the in-memory index is rebuilt from the DB at startup. Rows written before
+the column existed can be backfilled with:
+  python near_dup.py --backfill
+"""
+
+import argparse
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SHINGLE_SIZE = 3
+# Odd 64-bit multipliers that mix neighbouring token hashes into one shingle hash
+_SHINGLE_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F), np.uint64(1))
+
+
+def shingle_hashes(preprocessed_text: str, k: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Distinct 64-bit hashes of the word k-shingles of preprocess_for_vectorizer
+    output (unigrams for texts shorter than k). Tokens are crc32-hashed once
+    and combined with numpy, so no shingle strings are built.
+    """
+    tokens = preprocessed_text.split()
+    token_hashes = np.fromiter(
+        (zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens)
+    )
+    if len(tokens) < k:
+        return np.unique(token_hashes)
+    n = len(tokens) - k + 1
+    with np.errstate(over="ignore"):
+        combined = token_hashes[:n] * _SHINGLE_MIX[0]
+        for offset in range(1, k):
+            combined += token_hashes[offset:offset + n] * _SHINGLE_MIX[min(offset, len(_SHINGLE_MIX) - 1)]
+    return np.unique(combined)
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm whose LSH S-curve midpoint
+    (1/b)^(1/r) sits just below threshold, favouring recall; candidates are
+    verified against the full signature afterwards.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # multiply-shift hash family: h(x) = (a*x + b mod 2^64) >> 32, a odd
+        self._a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, preprocessed_text: str) -> Optional[np.ndarray]:
+        hashes = shingle_hashes(preprocessed_text)
+        if not len(hashes):
+            return None
+        with np.errstate(over="ignore"):
+            permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+@dataclass
+class IndexedPrediction:
+    prediction_id: str
+    label: str
+    probability: float
+    top_tokens: Optional[List[str]]
+    model_version: str
+    signature: np.ndarray
+
+
+class NearDuplicateIndex:
+    """Thread-safe LSH index; keeps the newest max_entries predictions."""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, max_entries: int = 20000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self._entries: "OrderedDict[str, IndexedPrediction]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def signature(self, preprocessed_text: str) -> Optional[np.ndarray]:
+        return self.hasher.signature(preprocessed_text)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, entry: IndexedPrediction) -> None:
+        with self._lock:
+            if entry.prediction_id in self._entries:
+                return
+            self._entries[entry.prediction_id] = entry
+            for key in self._band_keys(entry.signature):
+                self._buckets.setdefault(key, []).append(entry.prediction_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        prediction_id, old = self._entries.popitem(last=False)
+        self._unbucket(prediction_id, old)
+
+    def _unbucket(self, prediction_id: str, old: IndexedPrediction) -> None:
+        for key in self._band_keys(old.signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.remove(prediction_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def query(self, signature: np.ndarray, model_version: str) -> Optional[Tuple[IndexedPrediction, float]]:
+        """Most similar indexed prediction from model_version at or above threshold, else None."""
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            best, best_sim = None, self.threshold
+            for prediction_id in candidates:
+                entry = self._entries[prediction_id]
+                if entry.model_version != model_version:
+                    continue
+                sim = MinHasher.similarity(signature, entry.signature)
+                if sim >= best_sim:
+                    best, best_sim = entry, sim
+            if best is None:
+                return None
+            self.hits += 1
+            return best, best_sim
+
+    def load(self, rows: Iterable[tuple]) -> int:
+        """Bulk-add (prediction_id, label, probability, top_tokens, model_version, signature bytes), oldest first."""
+        loaded = 0
+        for prediction_id, label, probability, top_tokens, model_version, blob in rows:
+            signature = np.frombuffer(blob, dtype=np.uint32)
+            if len(signature) != self.hasher.num_perm:
+                continue  # written with a different NEAR_DUP_NUM_PERM
+            self.add(IndexedPrediction(prediction_id, label, probability, top_tokens, model_version, signature))
+            loaded += 1
+        return loaded
+
+    def prediction_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def remove(self, prediction_ids: Iterable[str]) -> int:
+        """Drop the given predictions (e.g. history rows deleted by retention); returns how many were indexed."""
+        removed = 0
+        with self._lock:
+            for prediction_id in prediction_ids:
+                old = self._entries.pop(prediction_id, None)
+                if old is not None:
+                    self._unbucket(prediction_id, old)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows_per_band": self.rows,
+                "lookups": self.lookups,
+                "hits": self.hits,
+            }
+
+
+if __name__ == "__main__":
+    import db
+    from config import NEAR_DUP_NUM_PERM
+    from preprocessing import preprocess_fast
+
+    parser = argparse.ArgumentParser(description="Backfill MinHash signatures for history rows")
+    parser.add_argument("--backfill", action="store_true", help="Compute signatures for rows that lack one")
+    parser.add_argument("--recompute", action="store_true", help="Recompute every signature (e.g. after changing NEAR_DUP_NUM_PERM)")
+    args = parser.parse_args()
+    if not (args.backfill or args.recompute):
+        parser.error("nothing to do; pass --backfill or --recompute")
+
+    db.init_db()
+    hasher = MinHasher(NEAR_DUP_NUM_PERM)
+    updated = db.backfill_minhash(
+        lambda title, content: hasher.signature(preprocess_fast(f"{title} {content}" if title else content)),
+        only_missing=not args.recompute,
+    )
+    print(f"Updated {updated} history rows")
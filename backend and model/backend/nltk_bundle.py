@@ -0,0 +1,117 @@
+# backend/nltk_bundle.py
+"""
+Precompiled, offline copy of the NLTK data preprocessing needs.
+
+The bundle is a gzipped JSON file holding the English stopword list plus the
+WordNet noun lemmas and noun exception list, which is everything
+WordNetLemmatizer.lemmatize(word) (pos="n") consults. BundleLemmatizer
+replays WordNet's morphy rules over that data, so serving needs neither
+network access nor the WordNet corpus reader.
+
+Build it wherever the NLTK corpora are installed (e.g. at image build time):
+  python nltk_bundle.py --out nltk_bundle.json.gz
+"""
+
+import argparse
+import gzip
+import json
+from typing import Dict, FrozenSet, List
+
+FORMAT_VERSION = 1
+
+# Same noun rules as nltk.corpus.reader.wordnet.WordNetCorpusReader.MORPHOLOGICAL_SUBSTITUTIONS
+NOUN_SUBSTITUTIONS = (
+    ("s", ""),
+    ("ses", "s"),
+    ("ves", "f"),
+    ("xes", "x"),
+    ("zes", "z"),
+    ("ches", "ch"),
+    ("shes", "sh"),
+    ("men", "man"),
+    ("ies", "y"),
+)
+
+
+class BundleLemmatizer:
+    """Drop-in for WordNetLemmatizer().lemmatize(word) with the default noun POS."""
+
+    def __init__(self, noun_lemmas: FrozenSet[str], noun_exceptions: Dict[str, List[str]]):
+        self._lemmas = noun_lemmas
+        self._exceptions = noun_exceptions
+
+    def _filter(self, forms: List[str]) -> List[str]:
+        result = []
+        for form in forms:
+            if form in self._lemmas and form not in result:
+                result.append(form)
+        return result
+
+    @staticmethod
+    def _apply_rules(forms: List[str]) -> List[str]:
+        return [
+            form[: -len(old)] + new
+            for form in forms
+            for old, new in NOUN_SUBSTITUTIONS
+            if form.endswith(old)
+        ]
+
+    def _morphy(self, form: str) -> List[str]:
+        if form in self._exceptions:
+            return self._filter([form] + self._exceptions[form])
+        forms = self._apply_rules([form])
+        results = self._filter([form] + forms)
+        if results:
+            return results
+        while forms:
+            forms = self._apply_rules(forms)
+            results = self._filter(forms)
+            if results:
+                return results
+        return []
+
+    def lemmatize(self, word: str, pos: str = "n") -> str:
+        if pos != "n":
+            raise ValueError("BundleLemmatizer only carries noun data")
+        lemmas = self._morphy(word)
+        return min(lemmas, key=len) if lemmas else word
+
+
+def build_bundle(out_path: str) -> Dict[str, int]:
+    """Extract stopwords + WordNet noun data from the installed NLTK corpora."""
+    from nltk.corpus import stopwords, wordnet
+
+    wordnet.ensure_loaded()
+    noun_lemmas = sorted(
+        lemma for lemma, by_pos in wordnet._lemma_pos_offset_map.items() if "n" in by_pos
+    )
+    noun_exceptions = {form: list(lemmas) for form, lemmas in wordnet._exception_map["n"].items()}
+    payload = {
+        "format_version": FORMAT_VERSION,
+        "stopwords": sorted(set(stopwords.words("english"))),
+        "noun_lemmas": noun_lemmas,
+        "noun_exceptions": noun_exceptions,
+    }
+    with gzip.open(out_path, "wt", encoding="utf-8") as fh:
+        json.dump(payload, fh, separators=(",", ":"))
+    return {k: len(v) for k, v in payload.items() if isinstance(v, (list, dict))}
+
+
+def load_bundle(path: str):
+    """Returns (stopwords frozenset, BundleLemmatizer)."""
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        payload = json.load(fh)
+    if payload.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported NLTK bundle version: {payload.get('format_version')}")
+    lemmatizer = BundleLemmatizer(frozenset(payload["noun_lemmas"]), payload["noun_exceptions"])
+    return frozenset(payload["stopwords"]), lemmatizer
+
+
+if __name__ == "__main__":
+    from config import NLTK_BUNDLE_PATH
+
+    parser = argparse.ArgumentParser(description="Build the offline NLTK preprocessing bundle")
+    parser.add_argument("--out", type=str, default=NLTK_BUNDLE_PATH)
+    args = parser.parse_args()
+    counts = build_bundle(args.out)
+    print(f"Wrote {args.out}: {counts}")
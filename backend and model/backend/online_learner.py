@@ -0,0 +1,360 @@
+# backend/online_learner.py
+"""
+Incremental model updates from verified feedback labels.
+
+POST /api/v1/feedback stores a verified label on a history row and stamps
+it with an increasing feedback_seq. OnlineLearner.step() reads the labels
+after its cursor, preprocesses and vectorizes only those articles with the
+*fixed* vectorizer from the last full training run (tfidf.pkl; new words
+are ignored unless that run used --vectorizer hashing), and applies
+SGDClassifier.partial_fit on them. The cost of an update depends only on
+the size of the new batch, never on the original corpus.
+
+The SGD model starts from the trained LogisticRegression weights, since
+log-loss SGD with the same coef_/intercept_ gives identical probabilities.
+A base model without coefficients (ComplementNB, see train_baseline.py
+--allow-nonlinear) cannot be continued: the learner logs that once and
+stays idle until a linear base is published.
+Its state (sgd.pkl + state.json) lives in model_artifacts/online/. Each
+update is published into the regular artifacts: model.pkl and the compact
+copy are written first, metadata.json last with model_version
+"<base>+online<N>". That makes it a normal new version for ModelServer,
+and MODEL_WATCH_INTERVAL or POST /api/v1/admin/reload picks it up.
+
+When train_baseline.py publishes a new base model, the learner starts over
+from it; feedback consumed before that point is not replayed. The base is
+recognised by the sha256 of tfidf.pkl and model.pkl, not by model_version,
+since a retrain usually keeps the same version string.
+
+Run it next to the API:
+  python online_learner.py             # poll every 60s
+  python online_learner.py --once      # single update, e.g. from cron
+or set ONLINE_LEARNER_INTERVAL to run it inside a (single-worker) API process.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+import db
+from compact import _proba_mode, export_compact
+from config import (
+    MODEL_ARTIFACTS_DIR,
+    MODEL_VERSION,
+    ONLINE_ALPHA,
+    ONLINE_BATCH_SIZE,
+    ONLINE_LEARNING_RATE,
+    ONLINE_MAX_BATCH,
+    ONLINE_PASSES,
+)
+from preprocessing import preprocess_fast
+
+logger = logging.getLogger("online-learner")
+
+STATE_NAME = "state.json"
+MODEL_NAME = "sgd.pkl"
+
+
+def _write_atomic(path: str, write: Callable[[str], None]) -> None:
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+
+    _write_atomic(path, write)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UnsupportedModelError(ValueError):
+    """The base model cannot be continued with log-loss SGD."""
+
+
+def sgd_from_linear(model, learning_rate: float = ONLINE_LEARNING_RATE, alpha: float = ONLINE_ALPHA) -> SGDClassifier:
+    """
+    Log-loss SGDClassifier with the given learning rate/alpha that starts
+    from (and predicts exactly like) a fitted linear model, SGD included.
+    """
+    if not hasattr(model, "coef_") or not hasattr(model, "intercept_"):
+        raise UnsupportedModelError(f"cannot continue training a {type(model).__name__}; a linear model is required")
+    coef = np.array(model.coef_, dtype=np.float64)
+    intercept = np.array(model.intercept_, dtype=np.float64)
+    try:
+        mode = _proba_mode(model, len(model.classes_))
+    except ValueError as e:
+        raise UnsupportedModelError(f"cannot continue training a {type(model).__name__}: {e}") from e
+    if mode == "multinomial":
+        if coef.shape[0] != 1:
+            raise UnsupportedModelError("cannot continue a multi-class multinomial model with one-vs-rest SGD")
+        coef, intercept = 2.0 * coef, 2.0 * intercept  # binary softmax is sigmoid(2d)
+    sgd = SGDClassifier(loss="log_loss", learning_rate="constant", eta0=learning_rate, alpha=alpha)
+    sgd.classes_ = np.array(model.classes_)
+    sgd.coef_ = coef
+    sgd.intercept_ = intercept
+    sgd.n_features_in_ = sgd.coef_.shape[1]
+    return sgd
+
+
+class OnlineLearner:
+    def __init__(
+        self,
+        artifacts_dir: str = MODEL_ARTIFACTS_DIR,
+        batch_size: int = ONLINE_BATCH_SIZE,
+        max_batch: int = ONLINE_MAX_BATCH,
+        passes: int = ONLINE_PASSES,
+        learning_rate: float = ONLINE_LEARNING_RATE,
+        alpha: float = ONLINE_ALPHA,
+    ):
+        self.artifacts_dir = str(artifacts_dir)
+        self.online_dir = os.path.join(self.artifacts_dir, "online")
+        self.batch_size = max(1, batch_size)
+        self.max_batch = max(self.batch_size, max_batch)
+        self.passes = max(1, passes)
+        self.learning_rate = learning_rate
+        self.alpha = alpha
+        self.vectorizer = None
+        self.model: Optional[SGDClassifier] = None
+        self.state: Dict[str, Any] = {}
+        self.last_error: Optional[str] = None
+        self.disabled = False  # base model cannot be trained online
+        self._lock = threading.Lock()  # one step at a time
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.artifacts_dir, name)
+
+    def _metadata(self) -> Dict[str, Any]:
+        try:
+            with open(self._path("metadata.json"), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _digests(self) -> Dict[str, str]:
+        return {
+            "vectorizer_sha256": file_digest(self._path("tfidf.pkl")),
+            "model_sha256": file_digest(self._path("model.pkl")),
+        }
+
+    def _is_ours(self, digests: Dict[str, str]) -> bool:
+        """Served artifacts are the base we started from, or what we last published on top of it."""
+        return (
+            self.state.get("vectorizer_sha256") == digests["vectorizer_sha256"]
+            and self.state.get("model_sha256") == digests["model_sha256"]
+        )
+
+    def _sync(self) -> None:
+        """Load the learner state, or start over from the served base model when it changed."""
+        digests = self._digests()
+        if self.model is not None and self._is_ours(digests):
+            return
+
+        state_path = os.path.join(self.online_dir, STATE_NAME)
+        model_path = os.path.join(self.online_dir, MODEL_NAME)
+        saved: Dict[str, Any] = {}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+        self.state = saved
+        self.vectorizer = joblib.load(self._path("tfidf.pkl"))
+        if saved and self._is_ours(digests) and os.path.exists(model_path):
+            self.model = joblib.load(model_path)
+            return
+
+        version = self._metadata().get("model_version", MODEL_VERSION)
+        logger.info("Online learner: starting from base model version=%s", version)
+        self.model = sgd_from_linear(joblib.load(self._path("model.pkl")), self.learning_rate, self.alpha)
+        self.state = {
+            "base_version": version,
+            "published_version": version,
+            "cursor": saved.get("cursor", 0),  # earlier feedback is not replayed on a new base
+            "updates": 0,
+            "samples": 0,
+            **digests,
+        }
+
+    def step(self) -> Optional[str]:
+        """
+        Train on the next batch of verified labels and publish the result.
+        Returns the new model version, or None when fewer than batch_size
+        labels are pending.
+        """
+        with self._lock:
+            self._sync()
+            rows = db.fetch_feedback(self.state["cursor"], self.max_batch)
+            if len(rows) < self.batch_size:
+                return None
+
+            classes = set(self.model.classes_.tolist())
+            rows_known = [r for r in rows if r[3] in classes]
+            if rows_known:
+                start = time.perf_counter()
+                texts = [preprocess_fast(f"{title} {content}".strip() if title else content.strip())
+                         for _, title, content, _ in rows_known]
+                X = self.vectorizer.transform(texts)
+                y = np.array([r[3] for r in rows_known])
+                rng = np.random.RandomState(self.state["updates"])
+                for _ in range(self.passes):
+                    order = rng.permutation(len(y))
+                    self.model.partial_fit(X[order], y[order])
+                logger.info(
+                    "Online update on %d labels in %.3fs", len(rows_known), time.perf_counter() - start
+                )
+
+            self.state["cursor"] = rows[-1][0]
+            self.state["updates"] += 1
+            self.state["samples"] += len(rows_known)
+            version = f"{self.state['base_version']}+online{self.state['updates']}"
+            self._publish(version, len(rows_known))
+            return version
+
+    def _publish(self, version: str, batch_samples: int) -> None:
+        os.makedirs(self.online_dir, exist_ok=True)
+        self.state["published_version"] = version
+        self.state["published_at"] = datetime.utcnow().isoformat() + "Z"
+        _write_atomic(os.path.join(self.online_dir, MODEL_NAME), lambda p: joblib.dump(self.model, p))
+        _write_atomic(self._path("model.pkl"), lambda p: joblib.dump(self.model, p))
+        # The published model.pkl is what the next _sync must recognise as ours
+        self.state["model_sha256"] = file_digest(self._path("model.pkl"))
+        _write_json(os.path.join(self.online_dir, STATE_NAME), self.state)
+
+        # Replace the compact copy as a whole so it never mixes old and new weights;
+        # if it cannot be exported, remove it so it cannot shadow model.pkl
+        compact_dir = self._path("compact")
+        staging_dir = compact_dir + ".tmp"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        try:
+            export_compact(self.vectorizer, self.model, staging_dir)
+        except ValueError:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            shutil.rmtree(compact_dir, ignore_errors=True)
+        else:
+            retired_dir = compact_dir + ".old"
+            shutil.rmtree(retired_dir, ignore_errors=True)
+            if os.path.exists(compact_dir):
+                os.replace(compact_dir, retired_dir)
+            os.replace(staging_dir, compact_dir)
+            shutil.rmtree(retired_dir, ignore_errors=True)
+
+        # metadata.json goes last: it is what reloads key on
+        metadata = self._metadata()
+        metadata["model_version"] = version
+        metadata["online"] = {
+            "base_version": self.state["base_version"],
+            "updates": self.state["updates"],
+            "samples": self.state["samples"],
+            "batch_samples": batch_samples,
+            "feedback_cursor": self.state["cursor"],
+            "published_at": self.state["published_at"],
+        }
+        _write_json(self._path("metadata.json"), metadata)
+        logger.info("Published online model version=%s", version)
+
+    def status(self) -> Dict[str, Any]:
+        state = dict(self.state)
+        try:
+            state["pending_feedback"] = db.count_feedback(state.get("cursor", 0))
+        except Exception:
+            state["pending_feedback"] = None
+        state["running"] = self._thread is not None
+        state["disabled"] = self.disabled
+        state["last_error"] = self.last_error
+        return state
+
+    def run_once(self, on_publish: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """step() that logs failures instead of raising (for loops)."""
+        try:
+            version = self.step()
+            self.last_error = None
+            self.disabled = False
+        except UnsupportedModelError as e:
+            if not self.disabled:  # once per base, not every interval
+                logger.warning("Online learner disabled: %s", e)
+            self.disabled = True
+            self.last_error = str(e)
+            return None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.exception("Online update failed")
+            return None
+        if version is not None and on_publish is not None:
+            on_publish(version)
+        return version
+
+    def _check_base(self) -> None:
+        """Load the served base now, so an unsupported one is reported (and the learner disabled) at startup."""
+        try:
+            with self._lock:
+                self._sync()
+        except UnsupportedModelError as e:
+            logger.warning("Online learner disabled: %s", e)
+            self.disabled = True
+            self.last_error = str(e)
+        except Exception:
+            pass  # e.g. no artifacts yet; step() reports it
+
+    def start(self, interval: float, on_publish: Optional[Callable[[str], None]] = None) -> None:
+        if self._thread is not None:
+            return
+        self._check_base()
+        if self.disabled:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.run_once(on_publish)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="online-learner", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Apply verified feedback labels to the served model")
+    parser.add_argument("--once", action="store_true", help="Run a single update and exit")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between checks for new feedback")
+    parser.add_argument("--artifacts-dir", default=MODEL_ARTIFACTS_DIR)
+    parser.add_argument("--batch-size", type=int, default=ONLINE_BATCH_SIZE, help="Minimum new labels per update")
+    args = parser.parse_args()
+
+    db.init_db()
+    learner = OnlineLearner(args.artifacts_dir, batch_size=args.batch_size)
+    if args.once:
+        print(learner.step() or "Not enough new feedback; nothing published")
+    else:
+        learner.start(args.interval)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            learner.stop()
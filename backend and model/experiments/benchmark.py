@@ -0,0 +1,303 @@
+# experiments/benchmark.py
+"""
+Latency / throughput benchmarks for every stage of the prediction path.
+
+Stages (each at several synthetic article lengths where it applies):
+  clean_text, preprocess_for_vectorizer, preprocess_fast, tfidf.transform,
+  ModelServer.predict (incl. top-token extraction), db.insert_prediction,
+  db.fetch_history (at several table sizes) and a full POST /api/v1/predict
+  through TestClient.
+
+Everything runs against synthetic articles and, unless --artifacts-dir is
+given, a small TF-IDF + LogisticRegression model trained on them in a temp
+directory, so no real training data is needed. The history DB is a temp file.
+
+Results are written as JSON (p50/p99/mean latency in ms and ops/sec per
+benchmark). --compare BASELINE.json flags benchmarks whose p50 or p99 got
+slower than the baseline by more than --threshold and exits non-zero.
+
+Usage:
+  python experiments/benchmark.py --out bench.json [--quick]
+  python experiments/benchmark.py --compare bench.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+ARTICLE_LENGTHS = {"short": 60, "medium": 400, "long": 2500}  # words
+HISTORY_TABLE_SIZES = (1_000, 10_000, 100_000)
+
+_FAKE_WORDS = (
+    "shocking secret miracle cure exposed hoax conspiracy insider banned truth "
+    "hidden celebrity unbelievable scandal leaked viral outrage claims doctors hate"
+).split()
+_REAL_WORDS = (
+    "parliament minister budget committee reported officials agreement percent "
+    "economy court ruling election statement quarter analysts policy spokesperson"
+).split()
+_COMMON_WORDS = (
+    "the a of to and in that is was for on with as by at from this it be are were "
+    "have has had not people year government country city week says said told new "
+    "running studies women children buses leaves stories analyses wolves"
+).split()
+
+
+def synthetic_article(rng: random.Random, n_words: int, fake: bool) -> str:
+    """Article-like text: mixed case, punctuation, the odd URL / email / HTML tag."""
+    topical = _FAKE_WORDS if fake else _REAL_WORDS
+    words = []
+    for i in range(n_words):
+        roll = rng.random()
+        if roll < 0.3:
+            word = rng.choice(topical)
+        elif roll < 0.995:
+            word = rng.choice(_COMMON_WORDS)
+        else:
+            word = rng.choice(("https://example.com/a?id=%d" % i, "tips@example.org", "<b>", "www.example.net/x"))
+        if i % 12 == 0:
+            word = word.capitalize()
+        words.append(word)
+        if i % 15 == 14:
+            words[-1] += rng.choice((".", ",", "!", "?", ";"))
+    return " ".join(words)
+
+
+def synthetic_corpus(rng: random.Random, n_docs: int, n_words: int) -> List[str]:
+    return [synthetic_article(rng, n_words, fake=i % 2 == 0) for i in range(n_docs)]
+
+
+def train_synthetic_artifacts(out_dir: Path, rng: random.Random) -> None:
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from preprocessing import preprocess_fast
+
+    texts = [preprocess_fast(t) for t in synthetic_corpus(rng, 400, 200)]
+    labels = ["FAKE" if i % 2 == 0 else "REAL" for i in range(len(texts))]
+    tfidf = TfidfVectorizer(ngram_range=(1, 2), max_features=20000)
+    model = LogisticRegression(max_iter=1000).fit(tfidf.fit_transform(texts), labels)
+    joblib.dump(tfidf, out_dir / "tfidf.pkl")
+    joblib.dump(model, out_dir / "model.pkl")
+    with open(out_dir / "metadata.json", "w", encoding="utf-8") as fh:
+        json.dump({"model_version": "bench_synthetic"}, fh)
+
+
+def measure(fn: Callable, inputs: Sequence, iterations: int, warmup: int = 3) -> Dict[str, float]:
+    """Time fn(x) per call, cycling through inputs. Returns latency stats in ms."""
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        x = inputs[i % len(inputs)]
+        t0 = time.perf_counter_ns()
+        fn(x)
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+    total = time.perf_counter() - start
+    samples.sort()
+    return {
+        "n": iterations,
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "ops_per_sec": round(iterations / total, 1) if total > 0 else None,
+    }
+
+
+def _history_record(rng: random.Random, created_at: datetime) -> Dict:
+    return {
+        "prediction_id": str(uuid.uuid4()),
+        "title": "Synthetic title",
+        "content": synthetic_article(rng, 300, fake=rng.random() < 0.5),
+        "label": rng.choice(("FAKE", "REAL")),
+        "probability": round(rng.random(), 4),
+        "model_version": "bench_synthetic",
+        "top_tokens": ["secret", "miracle", "budget"],
+        "created_at": created_at.isoformat() + "Z",
+    }
+
+
+def _fill_history(db, rng: random.Random, target_rows: int, have: int) -> int:
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(have, target_rows):
+        batch.append(_history_record(rng, start + timedelta(seconds=i)))
+        if len(batch) >= 5000:
+            db.insert_predictions(batch)
+            batch = []
+    db.insert_predictions(batch)
+    return target_rows
+
+
+def run_benchmarks(args) -> Dict:
+    rng = random.Random(args.seed)
+    scale = 0.2 if args.quick else 1.0
+
+    def iters(n: int) -> int:
+        return max(20, int(n * scale))
+
+    workdir = Path(tempfile.mkdtemp(prefix="fakenews-bench-"))
+    artifacts_dir = Path(args.artifacts_dir) if args.artifacts_dir else workdir / "artifacts"
+    # Backend config reads these at import time
+    os.environ["MODEL_ARTIFACTS_DIR"] = str(artifacts_dir)
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"  # measure the full path, not cache hits
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import db
+    import preprocessing
+    from inference import ModelServer
+
+    preprocessing.warm_up()
+    if not args.artifacts_dir:
+        artifacts_dir.mkdir(parents=True, exist_ok=True)
+        train_synthetic_artifacts(artifacts_dir, random.Random(args.seed + 1))
+    db.HISTORY_DB_PATH = str(workdir / "history.db")
+    db.init_db()
+
+    server = ModelServer()
+    if not server.loaded:
+        raise SystemExit(f"Model artifacts not loaded from {artifacts_dir}")
+
+    selected = set(args.only or [])
+
+    def wanted(name: str) -> bool:
+        return not selected or any(name.startswith(s) for s in selected)
+
+    results: Dict[str, Dict] = {}
+
+    def record(name: str, stats: Dict) -> None:
+        results[name] = stats
+        print(f"{name:42s} p50={stats['p50_ms']:9.3f}ms p99={stats['p99_ms']:9.3f}ms {stats['ops_per_sec']:>10} ops/s")
+
+    per_length = {"short": 400, "medium": 150, "long": 40}
+    for length, n_words in ARTICLE_LENGTHS.items():
+        raw = synthetic_corpus(rng, 50, n_words)
+        prepped = [preprocessing.preprocess_fast(t) for t in raw]
+        n = iters(per_length[length])
+        if wanted("clean_text"):
+            record(f"clean_text[{length}]", measure(preprocessing.clean_text, raw, n))
+        if wanted("preprocess_for_vectorizer"):
+            record(f"preprocess_for_vectorizer[{length}]", measure(preprocessing.preprocess_for_vectorizer, raw, n))
+        if wanted("preprocess_fast"):
+            record(f"preprocess_fast[{length}]", measure(preprocessing.preprocess_fast, raw, n))
+        if wanted("tfidf_transform"):
+            record(f"tfidf_transform[{length}]", measure(lambda t: server.tfidf.transform([t]), prepped, n))
+        if wanted("model_predict"):
+            record(f"model_predict[{length}]", measure(lambda t: server.predict(t, top_k=6), prepped, n))
+
+    if wanted("db_insert_prediction"):
+        created = datetime(2023, 1, 1)
+        records = [_history_record(rng, created + timedelta(seconds=i)) for i in range(50)]
+        record("db_insert_prediction", measure(db.insert_prediction, records, iters(500)))
+
+    if wanted("db_fetch_history"):
+        rows = db._pooled_conn().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        sizes = HISTORY_TABLE_SIZES[:2] if args.quick else HISTORY_TABLE_SIZES
+        for size in sizes:
+            rows = _fill_history(db, rng, size, rows)
+            record(f"db_fetch_history[rows={size}]", measure(lambda limit: db.fetch_history(limit), [20], iters(300)))
+
+    if wanted("api_predict"):
+        import app as app_module
+        from fastapi.testclient import TestClient
+
+        app_module.model_server = server
+        client = TestClient(app_module.app)
+
+        def post(payload):
+            resp = client.post("/api/v1/predict", json=payload)
+            if resp.status_code != 200:
+                raise RuntimeError(f"predict failed: {resp.status_code} {resp.text}")
+
+        for length in ("short", "medium"):
+            payloads = [
+                {"title": "Synthetic title", "content": t}
+                for t in synthetic_corpus(rng, 50, ARTICLE_LENGTHS[length])
+            ]
+            record(f"api_predict[{length}]", measure(post, payloads, iters(per_length[length])))
+        db.stop_writer()
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": bool(args.quick),
+            "seed": args.seed,
+            "model_version": server.model_version,
+            "artifact_format": server.artifact_format,
+            "scorer": server.scorer_kind,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Rows for benchmarks in both reports; 'regression' when p50 or p99 grew past threshold."""
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        row = {"name": name, "regression": False}
+        for metric in ("p50_ms", "p99_ms"):
+            ratio = cur[metric] / base[metric] if base[metric] else float("inf")
+            row[metric] = {"baseline": base[metric], "current": cur[metric], "ratio": round(ratio, 3)}
+            if ratio > 1.0 + threshold:
+                row["regression"] = True
+        rows.append(row)
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the prediction path")
+    parser.add_argument("--out", type=str, default=None, help="Write results JSON here")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline results JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--artifacts-dir", type=str, default=None, help="Benchmark real artifacts instead of a synthetic model")
+    parser.add_argument("--only", nargs="*", help="Benchmark name prefixes to run (e.g. model_predict db_)")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and smaller history tables")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        rows = compare(report, baseline, args.threshold)
+        regressions = [r for r in rows if r["regression"]]
+        print(f"\nCompared {len(rows)} benchmarks against {args.compare} (threshold {args.threshold:.0%})")
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else "ok"
+            print(
+                f"{r['name']:42s} p50 x{r['p50_ms']['ratio']:<6} p99 x{r['p99_ms']['ratio']:<6} {flag}"
+            )
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
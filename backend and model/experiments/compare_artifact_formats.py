@@ -0,0 +1,86 @@
+# experiments/compare_artifact_formats.py
+"""
+Compare cold-start time and resident memory of ModelServer for the pickle
+and compact (mmap) artifact formats. Each format is loaded in a fresh
+subprocess so import caches and page cache effects don't leak between runs.
+
+Usage:
+  python experiments/compare_artifact_formats.py --artifacts-dir backend/model_artifacts [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+_CHILD = r"""
+import json, os, resource, time
+
+def rss_mb():
+    with open("/proc/self/statm") as fh:
+        pages = int(fh.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+import numpy, scipy.sparse, sklearn.linear_model, sklearn.feature_extraction.text  # noqa: F401
+import inference
+before = rss_mb()
+t0 = time.perf_counter()
+server = inference.ModelServer()
+load_s = time.perf_counter() - t0
+t0 = time.perf_counter()
+server.predict("warm up request text for the model")
+first_predict_s = time.perf_counter() - t0
+print(json.dumps({
+    "format": server.artifact_format,
+    "loaded": server.loaded,
+    "load_seconds": round(load_s, 4),
+    "first_predict_seconds": round(first_predict_s, 4),
+    "rss_delta_mb": round(rss_mb() - before, 2),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+}))
+"""
+
+
+def run_once(fmt: str, artifacts_dir: str) -> dict:
+    env = dict(os.environ, ARTIFACT_FORMAT=fmt, MODEL_ARTIFACTS_DIR=artifacts_dir)
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=str(BACKEND_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(args):
+    artifacts_dir = str(Path(args.artifacts_dir).resolve())
+    report = {}
+    for fmt in ("pickle", "compact"):
+        runs = [run_once(fmt, artifacts_dir) for _ in range(args.repeat)]
+        if not all(r["loaded"] and r["format"] == fmt for r in runs):
+            print(f"{fmt}: artifacts not available in {artifacts_dir}")
+            continue
+        best = min(runs, key=lambda r: r["load_seconds"])
+        report[fmt] = best
+        print(
+            f"{fmt:8s} load={best['load_seconds']:.3f}s first_predict={best['first_predict_seconds']:.4f}s "
+            f"rss_delta={best['rss_delta_mb']:.1f}MB"
+        )
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifacts-dir", type=str, default=str(BACKEND_DIR / "model_artifacts"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json-out", type=str, default=None)
+    main(parser.parse_args())
@@ -1,3 +1,22 @@
+"""
+Merge the raw source CSVs into one deduplicated, shuffled text/label file.
+
+The default mode loads every source into memory. --streaming reads the sources
+in chunks instead and drops duplicates against a set of 64-bit content hashes.
+It appends each chunk to the output as it goes, so peak memory scales with the
+number of unique rows rather than the total text size. A .parquet output
+(requires pyarrow) is written row group by row group.
+
+Both modes write the same rows: clean_rows() drops rows without content and
+strips it, then the first row of each (content, label) pair is kept. Only the
+order differs: the default mode shuffles the whole output, --streaming only
+shuffles within each chunk (training splits shuffle again).
+
+  python merge_all.py --streaming [--chunk-size 20000] [--output data_merged_text_label.parquet]
+"""
+
+import argparse
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -38,7 +57,118 @@ def _normalize_frame(df: pd.DataFrame, forced_label: str | None, text_col_hint:
     return df[["content", "label"]]
 
 
+def clean_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows without content and strip it; both merge modes apply this before deduplicating."""
+    df = df.dropna(subset=["content"])
+    return df.assign(content=df["content"].astype(str).str.strip())
+
+
+def _hash_rows(df: pd.DataFrame) -> np.ndarray:
+    # 64-bit hash of (content, label); the collision odds stay negligible at millions of rows
+    return pd.util.hash_pandas_object(df[["content", "label"]], index=False).to_numpy()
+
+
+class _ChunkWriter:
+    """Appends normalized chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.rows = 0
+        self._pq = None
+        self._parquet = None
+        if path.suffix == ".parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)")
+            self._pa, self._pq = pa, pq
+        if path.exists():
+            path.unlink()
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        if self._pq is not None:
+            table = self._pa.Table.from_pandas(df.astype(str), preserve_index=False)
+            if self._parquet is None:
+                self._parquet = self._pq.ParquetWriter(str(self.path), table.schema)
+            self._parquet.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a", header=self.rows == 0, index=False, encoding="utf-8")
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def stream_merge(
+    sources: list[dict],
+    output_path: Path,
+    chunk_size: int = 20000,
+    random_state: int = 42,
+    normalize=_normalize_frame,
+) -> pd.Series:
+    """
+    Chunked merge + dedupe of sources into output_path. normalize(chunk, label,
+    text_col) must return a frame with at least content/label columns. Rows are
+    shuffled within each chunk only (training splits shuffle again). Returns
+    the label counts.
+    """
+    seen: set[int] = set()
+    label_counts: dict[str, int] = {}
+    rng = np.random.default_rng(random_state)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    writer = _ChunkWriter(output_path)
+    try:
+        for src in sources:
+            path = src["path"]
+            if not path.exists():
+                print(f"Skipping missing file: {path}")
+                continue
+            print(f"Streaming {path}")
+            for chunk in pd.read_csv(path, chunksize=chunk_size):
+                try:
+                    chunk = normalize(chunk, src["label"], src["text_col"])
+                except Exception as exc:
+                    raise SystemExit(f"Failed to normalize {path}: {exc}")
+                chunk = clean_rows(chunk)
+
+                keep = np.zeros(len(chunk), dtype=bool)
+                for i, h in enumerate(_hash_rows(chunk).tolist()):
+                    if h not in seen:
+                        seen.add(h)
+                        keep[i] = True
+                chunk = chunk[keep]
+                chunk = chunk.iloc[rng.permutation(len(chunk))]
+
+                writer.write(chunk)
+                for label, count in chunk["label"].value_counts().items():
+                    label_counts[label] = label_counts.get(label, 0) + int(count)
+    finally:
+        writer.close()
+
+    if writer.rows == 0:
+        raise SystemExit("No data loaded; nothing to merge")
+    return pd.Series(label_counts, name="label").sort_index()
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge source CSVs into one text/label dataset")
+    parser.add_argument("--streaming", action="store_true", help="Chunked, hash-deduplicated merge with bounded memory")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Rows per chunk in --streaming mode")
+    parser.add_argument("--output", type=str, default=str(OUTPUT_PATH), help="Output .csv or .parquet path")
+    args = parser.parse_args()
+    output_path = Path(args.output)
+
+    if args.streaming:
+        label_counts = stream_merge(SOURCES, output_path, chunk_size=args.chunk_size)
+        print(f"Merged rows: {int(label_counts.sum())}")
+        print("Label distribution:\n", label_counts)
+        print(f"Saved to: {output_path}")
+        return
+
     frames: list[pd.DataFrame] = []
 
     for src in SOURCES:
@@ -57,20 +187,20 @@ def main() -> None:
     if not frames:
         raise SystemExit("No data loaded; nothing to merge")
 
-    merged = pd.concat(frames, ignore_index=True)
-    merged.dropna(subset=["content", "label"], inplace=True)
-    merged["content"] = merged["content"].astype(str).str.strip()
-    merged["label"] = merged["label"].astype(str).str.upper().apply(lambda x: "REAL" if "REAL" in x else "FAKE")
+    merged = clean_rows(pd.concat(frames, ignore_index=True))
 
-    # Remove duplicates and shuffle
+    # Remove duplicates (first occurrence wins, as in --streaming) and shuffle
     merged = merged.drop_duplicates(subset=["content", "label"]).sample(frac=1.0, random_state=42)
 
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    merged.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix == ".parquet":
+        merged.to_parquet(output_path, index=False)
+    else:
+        merged.to_csv(output_path, index=False, encoding="utf-8")
 
     print(f"Merged rows: {len(merged)}")
     print("Label distribution:\n", merged["label"].value_counts())
-    print(f"Saved to: {OUTPUT_PATH}")
+    print(f"Saved to: {output_path}")
 
 
 if __name__ == "__main__":
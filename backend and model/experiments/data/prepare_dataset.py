@@ -1,5 +1,15 @@
 # experiments/data/prepare_dataset.py
+"""
+Build data.csv (title, content, label) from Fake.csv + True.csv.
 
+Rows without content are dropped, content is stripped, and only the first
+row of each (content, label) pair is kept (see merge_all.clean_rows). The
+default mode loads both files and shuffles the whole output; --streaming
+reads them in chunks with bounded memory and writes the same rows, shuffled
+within each chunk only.
+"""
+
+import argparse
 import pandas as pd
 from pathlib import Path
 
@@ -9,7 +19,30 @@ FAKE_PATH = DATA_DIR / "Fake.csv"
 TRUE_PATH = DATA_DIR / "True.csv"
 OUTPUT_PATH = DATA_DIR / "data.csv"
 
-def main():
+def _normalize_chunk(df, label, text_col):
+    df = df.rename(columns={text_col: "content"})
+    df["label"] = label
+    df["title"] = df["title"].fillna("") if "title" in df.columns else ""
+    return df[["title", "content", "label"]]
+
+
+def main_streaming(output_path, chunk_size):
+    # Chunked read + content-hash dedupe; memory scales with unique rows, not corpus size
+    from merge_all import stream_merge
+
+    sources = [
+        {"path": FAKE_PATH, "label": "FAKE", "text_col": "text"},
+        {"path": TRUE_PATH, "label": "REAL", "text_col": "text"},
+    ]
+    label_counts = stream_merge(sources, output_path, chunk_size=chunk_size, normalize=_normalize_chunk)
+    print("Total samples after merge:", int(label_counts.sum()))
+    print("Label distribution:")
+    print(label_counts)
+    print(f"Saved to: {output_path}")
+
+def main_in_memory(output_path):
+    from merge_all import clean_rows
+
     print("Loading datasets...")
 
     if not FAKE_PATH.exists():
@@ -24,23 +57,13 @@ def main():
     print("Fake samples:", len(fake_df))
     print("True samples:", len(true_df))
 
-    # Add labels
-    fake_df["label"] = "FAKE"
-    true_df["label"] = "REAL"
-
-    # Standardize column names
-    fake_df = fake_df.rename(columns={"text": "content"})
-    true_df = true_df.rename(columns={"text": "content"})
-
-    # Keep only required columns
-    fake_df = fake_df[["title", "content", "label"]]
-    true_df = true_df[["title", "content", "label"]]
+    # Label, standardize column names and keep only required columns
+    fake_df = _normalize_chunk(fake_df, "FAKE", "text")
+    true_df = _normalize_chunk(true_df, "REAL", "text")
 
-    # Merge datasets
-    combined_df = pd.concat([fake_df, true_df], ignore_index=True)
-
-    # Drop missing values
-    combined_df.dropna(subset=["content", "label"], inplace=True)
+    # Merge datasets, drop missing content, strip it, and remove duplicates (same rows as --streaming)
+    combined_df = clean_rows(pd.concat([fake_df, true_df], ignore_index=True))
+    combined_df = combined_df.drop_duplicates(subset=["content", "label"])
 
     # Shuffle dataset
     combined_df = combined_df.sample(frac=1.0, random_state=42).reset_index(drop=True)
@@ -50,10 +73,25 @@ def main():
     print(combined_df["label"].value_counts())
 
     # Save final dataset
-    combined_df.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
+    if output_path.suffix == ".parquet":
+        combined_df.to_parquet(output_path, index=False)
+    else:
+        combined_df.to_csv(output_path, index=False, encoding="utf-8")
 
     print(f"\n✅ Dataset prepared successfully!")
-    print(f"Saved to: {OUTPUT_PATH}")
+    print(f"Saved to: {output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build data.csv from Fake.csv + True.csv")
+    parser.add_argument("--streaming", action="store_true", help="Chunked, deduplicated merge with bounded memory")
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--output", type=str, default=str(OUTPUT_PATH), help="Output .csv or .parquet path")
+    args = parser.parse_args()
+    if args.streaming:
+        main_streaming(Path(args.output), args.chunk_size)
+        return
+
+    main_in_memory(Path(args.output))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,323 @@
+# experiments/model_search.py
+"""
+Hyperparameter search on cached features (train_baseline.py --search).
+
+Each vectorizer configuration is fitted on the training split once. Its
+train/val/test matrices are cached under experiments/.cache/features/,
+keyed by the preprocessed texts, the split and the vectorizer settings. A
+rerun that only tries other classifiers or another C never re-vectorizes.
+
+Every classifier candidate is cross-validated on the cached training
+matrix, with all (candidate, fold) fits running in parallel across cores.
+The vectorizer itself is fitted on the whole training split, so its
+vocabulary/IDF have seen each validation fold. That is the price of
+vectorizing once; the held-out val/test splits are unaffected.
+
+Each candidate is then refitted on the full training split and costed the
+way it would be served:
+  - single-article latency through ModelServer's scoring path (the numpy
+    LinearScorer when the model supports it, sklearn otherwise)
+  - batch throughput
+  - pickled artifact size
+
+select_candidate() takes the most accurate candidate, unless a cheaper one
+is within `tolerance` cross-validated accuracy of it. Only LINEAR_CLASSIFIERS
+are selectable by default: compact export, token explanations and the online
+learner all need coef_/intercept_, which ComplementNB does not have.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import ComplementNB
+from sklearn.pipeline import Pipeline
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
+from linear_scorer import build_scorer
+from preprocess_cache import dataset_hash
+
+DEFAULT_FEATURE_CACHE_DIR = PROJECT_ROOT / "experiments" / ".cache" / "features"
+
+# Default grid per classifier family; every combination is one candidate
+DEFAULT_GRIDS = {
+    "logreg": {"C": [0.25, 1.0, 4.0]},
+    "sgd": {"alpha": [1e-5, 1e-4]},
+    "complement_nb": {"alpha": [0.1, 1.0]},
+}
+# Families with coef_/intercept_ that every serving path supports
+LINEAR_CLASSIFIERS = ("logreg", "sgd")
+
+# Articles scored one at a time for the latency figure
+LATENCY_DOCS = 200
+# Relative latency difference treated as noise when selecting
+LATENCY_TIE = 0.1
+
+
+@dataclass
+class VectorizerConfig:
+    kind: str = "tfidf"  # tfidf | hashing
+    ngram_range: Tuple[int, int] = (1, 2)
+    max_features: Optional[int] = 20000
+    n_features: int = 2 ** 20
+
+    def build(self):
+        if self.kind == "hashing":
+            # alternate_sign=False keeps counts non-negative so TF-IDF weighting stays meaningful
+            return Pipeline([
+                ("hashing", HashingVectorizer(n_features=self.n_features, ngram_range=tuple(self.ngram_range), alternate_sign=False, norm=None)),
+                ("tfidf", TfidfTransformer()),
+            ])
+        return TfidfVectorizer(max_features=self.max_features, ngram_range=tuple(self.ngram_range))
+
+    def describe(self) -> Dict[str, Any]:
+        size = {"n_features": self.n_features} if self.kind == "hashing" else {"max_features": self.max_features}
+        return {"vectorizer": self.kind, "ngram_range": list(self.ngram_range), **size}
+
+    @property
+    def name(self) -> str:
+        size = self.n_features if self.kind == "hashing" else self.max_features
+        return f"{self.kind}-{self.ngram_range[0]}{self.ngram_range[1]}-{size}"
+
+
+@dataclass
+class Candidate:
+    vectorizer: VectorizerConfig
+    classifier: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.vectorizer.name}/{self.classifier}({params})"
+
+
+def build_classifier(classifier: str, params: Dict[str, Any], random_state: int = 42):
+    if classifier == "logreg":
+        return LogisticRegression(max_iter=1000, class_weight="balanced", random_state=random_state, **params)
+    if classifier == "sgd":
+        # log loss: predict_proba works and the numpy scorer can serve it
+        return SGDClassifier(loss="log_loss", class_weight="balanced", random_state=random_state, **params)
+    if classifier == "complement_nb":
+        return ComplementNB(**params)
+    raise ValueError(f"Unknown classifier: {classifier}")
+
+
+def expand_grid(classifiers: Sequence[str], vectorizers: Sequence[VectorizerConfig], overrides: Optional[Dict[str, Dict[str, list]]] = None) -> List[Candidate]:
+    candidates = []
+    for vec in vectorizers:
+        for classifier in classifiers:
+            grid = dict(DEFAULT_GRIDS.get(classifier, {}))
+            grid.update((overrides or {}).get(classifier, {}))
+            combos: List[Dict[str, Any]] = [{}]
+            for key, values in grid.items():
+                combos = [dict(c, **{key: v}) for c in combos for v in values]
+            candidates.extend(Candidate(vec, classifier, params) for params in combos)
+    return candidates
+
+
+def vectorize_cached(
+    config: VectorizerConfig,
+    splits: Dict[str, List[str]],
+    cache_dir: Optional[Path] = DEFAULT_FEATURE_CACHE_DIR,
+) -> Dict[str, Any]:
+    """
+    Fit config on splits["train"] and transform every split; returns
+    {"vectorizer", "train", "val", "test", "fit_seconds"}, loaded from
+    cache_dir when the same texts were vectorized the same way before.
+    """
+    cache_path = None
+    if cache_dir is not None:
+        parts = [dataset_hash(splits[name]) for name in ("train", "val", "test")]
+        parts.append(json.dumps(config.describe(), sort_keys=True))
+        parts.append(sklearn.__version__)
+        key = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+        cache_path = Path(cache_dir) / f"{config.name}-{key}.joblib"
+        if cache_path.exists():
+            print(f"Loaded {config.name} features from cache {cache_path}")
+            return joblib.load(cache_path)
+
+    start = time.perf_counter()
+    vectorizer = config.build()
+    features = {"vectorizer": vectorizer, "train": vectorizer.fit_transform(splits["train"]).tocsr()}
+    for name in ("val", "test"):
+        features[name] = vectorizer.transform(splits[name]).tocsr()
+    features["fit_seconds"] = round(time.perf_counter() - start, 3)
+    print(f"Vectorized {config.name}: {features['train'].shape[1]} features in {features['fit_seconds']:.1f}s")
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        joblib.dump(features, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return features
+
+
+def _fit(classifier: str, params: Dict[str, Any], random_state: int, X, y, rows=None):
+    if rows is not None:
+        X, y = X[rows], y[rows]
+    model = build_classifier(classifier, params, random_state)
+    start = time.perf_counter()
+    model.fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def _fit_fold(classifier, params, random_state, X, y, train_rows, test_rows, pos_label):
+    model, seconds = _fit(classifier, params, random_state, X, y, train_rows)
+    y_pred = model.predict(X[test_rows])
+    y_true = y[test_rows]
+    return accuracy_score(y_true, y_pred), f1_score(y_true, y_pred, pos_label=pos_label), seconds
+
+
+def _artifact_bytes(obj) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.tell()
+
+
+def measure_serving_cost(vectorizer, model, texts: Sequence[str]) -> Dict[str, Any]:
+    """Per-article latency and batch throughput on ModelServer's scoring path, plus artifact sizes."""
+    try:
+        scorer = build_scorer(vectorizer, model)
+    except ValueError:
+        scorer = None
+
+    def score(docs):
+        if scorer is not None:
+            return scorer.predict_proba(scorer.transform(docs))
+        return model.predict_proba(vectorizer.transform(docs))
+
+    docs = list(texts[:LATENCY_DOCS])
+    score(docs[:5])  # warm up
+    timings = []
+    for doc in docs:
+        start = time.perf_counter()
+        score([doc])
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    score(list(texts))
+    batch_seconds = time.perf_counter() - start
+    return {
+        "scorer": "numpy" if scorer is not None else "sklearn",
+        "latency_us_p50": round(float(np.median(timings)) * 1e6, 1) if timings else None,
+        "latency_us_p95": round(float(np.percentile(timings, 95)) * 1e6, 1) if timings else None,
+        "batch_docs_per_sec": round(len(texts) / batch_seconds, 1) if batch_seconds > 0 else None,
+        "vectorizer_bytes": _artifact_bytes(vectorizer),
+        "model_bytes": _artifact_bytes(model),
+        "explanations": hasattr(model, "coef_"),
+    }
+
+
+def _mark_pareto(results: List[Dict[str, Any]]) -> None:
+    """pareto=True for candidates no other candidate beats on accuracy, latency and size at once."""
+    def cost(r):
+        return (-r["cv_accuracy_mean"], r["latency_us_p50"], r["vectorizer_bytes"] + r["model_bytes"])
+
+    for r in results:
+        mine = cost(r)
+        r["pareto"] = not any(
+            all(a <= b for a, b in zip(cost(o), mine)) and cost(o) != mine for o in results if o is not r
+        )
+
+
+def select_candidate(results: List[Dict[str, Any]], tolerance: float = 0.005, allow_nonlinear: bool = False) -> Dict[str, Any]:
+    """
+    Among candidates within tolerance of the best cv accuracy, the fastest
+    one. Latencies within LATENCY_TIE of the fastest count as equal (timing
+    noise), and those are decided by accuracy, then size. Candidates outside
+    LINEAR_CLASSIFIERS are only considered with allow_nonlinear.
+    """
+    if not allow_nonlinear:
+        results = [r for r in results if r["classifier"] in LINEAR_CLASSIFIERS]
+        if not results:
+            raise ValueError(f"No selectable candidate: only {', '.join(LINEAR_CLASSIFIERS)} are allowed without allow_nonlinear")
+    best = max(r["cv_accuracy_mean"] for r in results)
+    eligible = [r for r in results if r["cv_accuracy_mean"] >= best - tolerance]
+    fastest = min(r["latency_us_p50"] for r in eligible)
+    tied = [r for r in eligible if r["latency_us_p50"] <= fastest * (1 + LATENCY_TIE)]
+    return min(tied, key=lambda r: (-r["cv_accuracy_mean"], r["vectorizer_bytes"] + r["model_bytes"], r["latency_us_p50"]))
+
+
+def run_search(
+    candidates: Sequence[Candidate],
+    splits: Dict[str, List[str]],
+    labels: Dict[str, np.ndarray],
+    cv_folds: int = 5,
+    n_jobs: Optional[int] = None,
+    random_state: int = 42,
+    cache_dir: Optional[Path] = DEFAULT_FEATURE_CACHE_DIR,
+    pos_label: str = "REAL",
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Cross-validate, refit and cost every candidate. Returns (results, fitted)
+    where results are JSON-ready dicts in candidate order and fitted maps a
+    candidate name to its (vectorizer, model, features).
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    y_train = labels["train"]
+    folds = list(StratifiedKFold(cv_folds, shuffle=True, random_state=random_state).split(np.zeros(len(y_train)), y_train))
+
+    features: Dict[str, Dict[str, Any]] = {}
+    for candidate in candidates:
+        if candidate.vectorizer.name not in features:
+            features[candidate.vectorizer.name] = vectorize_cached(candidate.vectorizer, splits, cache_dir)
+
+    # Every (candidate, fold) fit, then every full refit, spread over the cores
+    print(f"Cross-validating {len(candidates)} candidates x {cv_folds} folds on {n_jobs} job(s) ...")
+    start = time.perf_counter()
+    with Parallel(n_jobs=n_jobs) as parallel:
+        fold_scores = parallel(
+            delayed(_fit_fold)(c.classifier, c.params, random_state, features[c.vectorizer.name]["train"], y_train, tr, te, pos_label)
+            for c in candidates for tr, te in folds
+        )
+        refits = parallel(
+            delayed(_fit)(c.classifier, c.params, random_state, features[c.vectorizer.name]["train"], y_train)
+            for c in candidates
+        )
+    print(f"Fitted {len(fold_scores) + len(refits)} models in {time.perf_counter() - start:.1f}s")
+
+    results, fitted = [], {}
+    for i, candidate in enumerate(candidates):
+        scores = np.array(fold_scores[i * cv_folds:(i + 1) * cv_folds])
+        model, fit_seconds = refits[i]
+        feats = features[candidate.vectorizer.name]
+        result = {
+            "name": candidate.name,
+            **candidate.vectorizer.describe(),
+            "classifier": candidate.classifier,
+            "params": candidate.params,
+            "cv_accuracy_mean": round(float(scores[:, 0].mean()), 5),
+            "cv_accuracy_std": round(float(scores[:, 0].std()), 5),
+            "cv_f1_mean": round(float(scores[:, 1].mean()), 5),
+            "cv_fit_seconds_mean": round(float(scores[:, 2].mean()), 3),
+            "fit_seconds": round(fit_seconds, 3),
+            "vectorizer_fit_seconds": feats["fit_seconds"],
+            "val_accuracy": round(float(accuracy_score(labels["val"], model.predict(feats["val"]))), 5),
+        }
+        result.update(measure_serving_cost(feats["vectorizer"], model, splits["val"]))
+        results.append(result)
+        fitted[candidate.name] = (feats["vectorizer"], model, feats)
+        print(
+            f"  {candidate.name}: cv acc {result['cv_accuracy_mean']:.4f}±{result['cv_accuracy_std']:.4f}, "
+            f"{result['latency_us_p50']}µs/article ({result['scorer']}), "
+            f"{(result['vectorizer_bytes'] + result['model_bytes']) / 1e6:.1f}MB"
+        )
+    _mark_pareto(results)
+    return results, fitted
@@ -0,0 +1,91 @@
+# experiments/preprocess_cache.py
+"""
+Parallel, disk-cached preprocessing for training runs.
+
+preprocess_corpus() runs preprocess_fast over every text on all cores and
+caches the result under a key made of
+  - a hash of the input texts themselves, and
+  - a hash of the preprocessing code (backend/preprocessing.py + nltk_bundle.py),
+so experiments that only change vectorizer/model settings skip straight to
+vectorization, while any data or preprocessing change invalidates the cache.
+"""
+
+import hashlib
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import joblib
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
+from preprocessing import preprocess_fast
+
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "experiments" / ".cache" / "preprocessed"
+
+# Files whose source defines the preprocessing output
+_CODE_FILES = ("preprocessing.py", "nltk_bundle.py")
+
+
+def preprocessing_code_version() -> str:
+    digest = hashlib.sha256()
+    for name in _CODE_FILES:
+        path = BACKEND_DIR / name
+        if path.exists():
+            digest.update(name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def dataset_hash(texts: Sequence[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        raw = str(text).encode("utf-8")
+        digest.update(len(raw).to_bytes(8, "little"))
+        digest.update(raw)
+    return digest.hexdigest()[:16]
+
+
+def _preprocess_all(texts: Sequence[str], n_jobs: int) -> List[str]:
+    if n_jobs <= 1 or len(texts) < 1000:
+        return [preprocess_fast(t) for t in texts]
+    chunksize = max(1, len(texts) // (n_jobs * 8))
+    with Pool(n_jobs) as pool:
+        return pool.map(preprocess_fast, texts, chunksize=chunksize)
+
+
+def preprocess_corpus(
+    texts: Sequence[str],
+    n_jobs: Optional[int] = None,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+) -> List[str]:
+    """
+    Preprocess texts (order preserved). n_jobs defaults to all cores;
+    cache_dir=None disables the on-disk cache.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    texts = [str(t) for t in texts]
+
+    cache_path = None
+    if cache_dir is not None:
+        key = f"{dataset_hash(texts)}-{preprocessing_code_version()}"
+        cache_path = Path(cache_dir) / f"{key}.joblib"
+        if cache_path.exists():
+            print(f"Loaded preprocessed texts from cache {cache_path}")
+            return joblib.load(cache_path)
+
+    start = time.perf_counter()
+    result = _preprocess_all(texts, n_jobs)
+    print(f"Preprocessed {len(result)} texts with {n_jobs} job(s) in {time.perf_counter() - start:.1f}s")
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return result
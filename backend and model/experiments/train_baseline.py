@@ -2,15 +2,31 @@
 """
 Train a baseline TF-IDF + LogisticRegression model for Fake News detection.
 Saves tfidf.pkl, model.pkl, metadata.json to backend/model_artifacts/
+
+--vectorizer hashing swaps the fitted vocabulary for a stateless
+HashingVectorizer + TfidfTransformer pipeline (--n-features columns); it is
+saved as tfidf.pkl as well and recorded in metadata.json["vectorizer"].
+
+--search cross-validates a grid of vectorizer settings x classifiers on
+cached features (see model_search.py), records every candidate's accuracy,
+training time, latency and size in metadata.json["search"], and ships the
+selected one. Only linear classifiers are searched unless --allow-nonlinear
+is passed; a model the compact format cannot hold fails the run unless
+--skip-compact is given:
+  python experiments/train_baseline.py --data-path data.csv --search \
+      --search-ngram-ranges 1-1 1-2 --search-classifiers logreg sgd --search-C 0.5 1 2
 """
 
 import argparse
 import json
+import shutil
+import time
 from pathlib import Path
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
 import joblib
@@ -19,7 +35,9 @@ import sys
 # Ensure backend preprocessing module is importable
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT / "backend"))
-from preprocessing import preprocess_for_vectorizer
+from compact import export_compact
+from preprocess_cache import DEFAULT_CACHE_DIR, preprocess_corpus
+from model_search import DEFAULT_FEATURE_CACHE_DIR, DEFAULT_GRIDS, LINEAR_CLASSIFIERS, VectorizerConfig, expand_grid, run_search, select_candidate
 
 def evaluate_model(model, X, y, pos_label='REAL'):
     y_pred = model.predict(X)
@@ -29,13 +47,63 @@ def evaluate_model(model, X, y, pos_label='REAL'):
     f1 = f1_score(y, y_pred, pos_label=pos_label)
     return {"accuracy": acc, "precision": prec, "recall": rec, "f1": f1, "report": classification_report(y, y_pred), "confusion_matrix": confusion_matrix(y, y_pred).tolist()}
 
+def build_vectorizer(args):
+    if args.vectorizer == "hashing":
+        # alternate_sign=False keeps counts non-negative so TF-IDF weighting stays meaningful
+        return Pipeline([
+            ("hashing", HashingVectorizer(n_features=args.n_features, ngram_range=tuple(args.ngram_range), alternate_sign=False, norm=None)),
+            ("tfidf", TfidfTransformer()),
+        ])
+    return TfidfVectorizer(max_features=args.max_features, ngram_range=tuple(args.ngram_range))
+
+def measure_serving(tfidf, model, texts, tfidf_path, model_path):
+    # Rough per-variant serving cost: vectorize + score throughput and artifact sizes
+    start = time.perf_counter()
+    model.predict_proba(tfidf.transform(texts))
+    elapsed = time.perf_counter() - start
+    return {
+        "docs_per_sec": round(len(texts) / elapsed, 1) if elapsed > 0 else None,
+        "vectorizer_bytes": tfidf_path.stat().st_size,
+        "model_bytes": model_path.stat().st_size,
+    }
+
+def search_model(args, splits, labels):
+    """Run the --search grid; returns the selected (vectorizer, model, X_val, X_test) and the search record."""
+    vectorizers = [
+        VectorizerConfig(args.vectorizer, ngram_range, max_features, args.n_features)
+        for ngram_range in args.search_ngram_ranges
+        for max_features in (args.search_max_features if args.vectorizer == "tfidf" else [None])
+    ]
+    overrides = {"logreg": {"C": args.search_C}} if args.search_C else None
+    candidates = expand_grid(args.search_classifiers, vectorizers, overrides)
+    feature_cache = None if args.no_cache else Path(args.feature_cache_dir)
+    results, fitted = run_search(
+        candidates, splits, labels, cv_folds=args.cv_folds, n_jobs=args.n_jobs,
+        random_state=args.random_state, cache_dir=feature_cache,
+    )
+    chosen = select_candidate(results, args.search_tolerance, allow_nonlinear=args.allow_nonlinear)
+    print(f"Selected {chosen['name']} (cv accuracy {chosen['cv_accuracy_mean']:.4f}, {chosen['latency_us_p50']}µs/article)")
+
+    # The shipped artifacts describe the selected vectorizer
+    args.ngram_range = tuple(chosen["ngram_range"])
+    if args.vectorizer == "tfidf":
+        args.max_features = chosen["max_features"]
+    tfidf, model, features = fitted[chosen["name"]]
+    search = {
+        "cv_folds": args.cv_folds,
+        "tolerance": args.search_tolerance,
+        "selected": chosen["name"],
+        "candidates": results,
+    }
+    return tfidf, model, features["val"], features["test"], search
+
 def main(args):
     data_path = Path(args.data_path)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     print("Loading dataset:", data_path)
-    df = pd.read_csv(data_path)
+    df = pd.read_parquet(data_path) if data_path.suffix == ".parquet" else pd.read_csv(data_path)
     # Normalize columns - adjust if necessary
     if 'text' in df.columns and 'label' in df.columns:
         df = df.rename(columns={'text': 'content'})
@@ -50,33 +118,40 @@ def main(args):
     df['combined'] = title_series.astype(str) + ' ' + df['content'].astype(str)
     df['label'] = df['label'].astype(str).str.upper().apply(lambda x: 'REAL' if 'REAL' in x else 'FAKE')
 
-    X = df['combined'].values
     y = df['label'].values
 
-    # Splits
-    X_train_val, X_test, y_train_val, y_test = train_test_split(X, y, test_size=args.test_size, stratify=y, random_state=args.random_state)
+    # Preprocess once for the whole corpus (parallel, cached on disk by data + preprocessing code hash)
+    print("Preprocessing texts ...")
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    X_p = np.asarray(preprocess_corpus(df['combined'].tolist(), n_jobs=args.n_jobs, cache_dir=cache_dir), dtype=object)
+
+    # Splits (on row indices, so they match splitting the raw texts directly)
+    idx = np.arange(len(y))
+    idx_train_val, idx_test = train_test_split(idx, test_size=args.test_size, stratify=y, random_state=args.random_state)
     val_relative = args.val_size / (1 - args.test_size)
-    X_train, X_val, y_train, y_val = train_test_split(X_train_val, y_train_val, test_size=val_relative, stratify=y_train_val, random_state=args.random_state)
+    idx_train, idx_val = train_test_split(idx_train_val, test_size=val_relative, stratify=y[idx_train_val], random_state=args.random_state)
+    X_train_p, X_val_p, X_test_p = X_p[idx_train].tolist(), X_p[idx_val].tolist(), X_p[idx_test].tolist()
+    y_train, y_val, y_test = y[idx_train], y[idx_val], y[idx_test]
 
-    print("Sizes -> train:", len(X_train), "val:", len(X_val), "test:", len(X_test))
+    print("Sizes -> train:", len(X_train_p), "val:", len(X_val_p), "test:", len(X_test_p))
 
-    # Preprocess
-    print("Preprocessing texts ...")
-    X_train_p = [preprocess_for_vectorizer(t) for t in X_train]
-    X_val_p = [preprocess_for_vectorizer(t) for t in X_val]
-    X_test_p = [preprocess_for_vectorizer(t) for t in X_test]
-
-    # Vectorize
-    print("Fitting TF-IDF ...")
-    tfidf = TfidfVectorizer(max_features=args.max_features, ngram_range=tuple(args.ngram_range))
-    X_train_vec = tfidf.fit_transform(X_train_p)
-    X_val_vec = tfidf.transform(X_val_p)
-    X_test_vec = tfidf.transform(X_test_p)
-
-    # Train model
-    print("Training model ...")
-    model = LogisticRegression(max_iter=1000, class_weight='balanced', random_state=args.random_state)
-    model.fit(X_train_vec, y_train)
+    search = None
+    if args.search:
+        tfidf, model, X_val_vec, X_test_vec, search = search_model(
+            args, {"train": X_train_p, "val": X_val_p, "test": X_test_p}, {"train": y_train, "val": y_val}
+        )
+    else:
+        # Vectorize
+        print(f"Fitting {args.vectorizer} vectorizer ...")
+        tfidf = build_vectorizer(args)
+        X_train_vec = tfidf.fit_transform(X_train_p)
+        X_val_vec = tfidf.transform(X_val_p)
+        X_test_vec = tfidf.transform(X_test_p)
+
+        # Train model
+        print("Training model ...")
+        model = LogisticRegression(max_iter=1000, class_weight='balanced', random_state=args.random_state)
+        model.fit(X_train_vec, y_train)
 
     # Evaluate
     print("Evaluating on validation set ...")
@@ -93,6 +168,18 @@ def main(args):
     model_path = out_dir / "model.pkl"
     meta_path = out_dir / "metadata.json"
 
+    # Compact mmap-able copy for fast cold start (pickles stay the fallback).
+    # Drop any previous export first so a stale copy can never shadow these pickles,
+    # and export before writing them so a model the format cannot hold ships nothing.
+    shutil.rmtree(out_dir / "compact", ignore_errors=True)
+    if not args.skip_compact and args.vectorizer == "tfidf":
+        try:
+            export_compact(tfidf, model, out_dir / "compact")
+        except ValueError as exc:
+            shutil.rmtree(out_dir / "compact", ignore_errors=True)
+            raise SystemExit(f"Cannot export {type(model).__name__} in the compact format: {exc} (pass --skip-compact to ship pickles only)")
+        print(f"Exported compact artifacts to {out_dir / 'compact'}")
+
     joblib.dump(tfidf, tfidf_path)
     joblib.dump(model, model_path)
 
@@ -101,26 +188,55 @@ def main(args):
         "trained_on": str(data_path),
         "val_metrics": val_metrics,
         "test_metrics": {k: float(v) if isinstance(v, (np.floating, np.float64)) else v for k,v in test_metrics.items() if k in ("accuracy","precision","recall","f1")},
-        "max_features": args.max_features,
-        "ngram_range": args.ngram_range
+        "vectorizer": args.vectorizer,
+        "max_features": args.max_features if args.vectorizer == "tfidf" else None,
+        "n_features": args.n_features if args.vectorizer == "hashing" else len(tfidf.vocabulary_),
+        "ngram_range": args.ngram_range,
+        "serving": measure_serving(tfidf, model, X_test_p, tfidf_path, model_path),
     }
+    if search is not None:
+        metadata["classifier"] = type(model).__name__
+        metadata["search"] = search
     with open(meta_path, "w", encoding="utf-8") as fh:
         json.dump(metadata, fh, indent=2)
 
     print(f"Saved artifacts to {out_dir}")
     print("Done.")
 
-if __name__ == "__main__":
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
-    parser.add_argument("--data-path", type=str, required=True, help="Path to CSV dataset")
+    parser.add_argument("--data-path", type=str, required=True, help="Path to CSV (or .parquet) dataset")
     parser.add_argument("--out-dir", type=str, default=str(PROJECT_ROOT / "backend" / "model_artifacts"), help="Output directory for artifacts")
     parser.add_argument("--test-size", type=float, default=0.15)
     parser.add_argument("--val-size", type=float, default=0.15)
     parser.add_argument("--random-state", type=int, default=42)
     parser.add_argument("--max-features", type=int, default=20000)
+    parser.add_argument("--vectorizer", choices=("tfidf", "hashing"), default="tfidf", help="Fitted-vocabulary TF-IDF or stateless hashing + IDF")
+    parser.add_argument("--n-features", type=int, default=2 ** 20, help="Hashing space size for --vectorizer hashing")
     parser.add_argument("--ngram-range", nargs=2, type=int, default=(1,2), help="Two ints: min_n max_n")
     parser.add_argument("--model-version", type=str, default="baseline_v0.1")
-    args = parser.parse_args()
+    parser.add_argument("--skip-compact", action="store_true", help="Do not export the compact mmap artifact format")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Preprocessing processes (default: all cores)")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR), help="Preprocessed-text cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-run preprocessing; do not read or write the cache")
+    parser.add_argument("--search", action="store_true", help="Cross-validate a grid of vectorizers x classifiers and ship the best")
+    parser.add_argument("--search-ngram-ranges", nargs="+", default=["1-1", "1-2"], help="n-gram ranges to try, as min-max")
+    parser.add_argument("--search-max-features", nargs="+", type=int, default=None, help="TF-IDF vocabulary sizes to try (default: --max-features)")
+    parser.add_argument("--search-classifiers", nargs="+", choices=sorted(DEFAULT_GRIDS), default=list(LINEAR_CLASSIFIERS))
+    parser.add_argument("--allow-nonlinear", action="store_true", help="Also search/select classifiers without coefficients (ComplementNB); they get no compact export, token explanations or online updates")
+    parser.add_argument("--search-C", nargs="+", type=float, default=None, help="LogisticRegression C values (default: 0.25 1 4)")
+    parser.add_argument("--cv-folds", type=int, default=5)
+    parser.add_argument("--search-tolerance", type=float, default=0.005, help="Prefer a faster candidate within this cv accuracy of the best")
+    parser.add_argument("--feature-cache-dir", type=str, default=str(DEFAULT_FEATURE_CACHE_DIR), help="Vectorized-matrix cache for --search")
+    args = parser.parse_args(argv)
     # ensure ngram_range is tuple of ints
     args.ngram_range = (int(args.ngram_range[0]), int(args.ngram_range[1]))
-    main(args)
+    args.search_ngram_ranges = [tuple(int(n) for n in r.split("-")) for r in args.search_ngram_ranges]
+    args.search_max_features = args.search_max_features or [args.max_features]
+    nonlinear = sorted(set(args.search_classifiers) - set(LINEAR_CLASSIFIERS))
+    if nonlinear and not args.allow_nonlinear:
+        parser.error(f"--search-classifiers {' '.join(nonlinear)} requires --allow-nonlinear")
+    return args
+
+if __name__ == "__main__":
+    main(parse_args())
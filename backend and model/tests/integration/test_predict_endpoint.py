@@ -3,6 +3,8 @@ import sys
 from pathlib import Path
 import importlib
 import json
+import tempfile
+import uuid
 import pytest
 
 # Ensure backend dir is importable
@@ -11,6 +13,11 @@ BACKEND_DIR = ROOT / "backend"
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
+# The app opens history.db and starts its writer at import, so point it at a throwaway file first
+import db
+HISTORY_DIR = tempfile.TemporaryDirectory(prefix="history-test-")
+db.HISTORY_DB_PATH = str(Path(HISTORY_DIR.name) / "history.db")
+
 # Import the FastAPI app module (app.py should be in backend/)
 # When backend/ is on sys.path, the module name is "app"
 app_module = importlib.import_module("app")
@@ -19,6 +26,13 @@ from fastapi.testclient import TestClient
 client = TestClient(app_module.app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def history_db():
+    yield db.HISTORY_DB_PATH
+    db.stop_writer()
+    HISTORY_DIR.cleanup()
+
+
 def test_health_endpoint_reports_model_loaded_flag_false_or_true():
     # Health endpoint should return JSON with keys 'status' and 'model_loaded'
     resp = client.get("/api/v1/health")
@@ -41,7 +55,7 @@ def test_predict_endpoint_with_mocked_model_server(monkeypatch):
             self.loaded = True
             self.model_version = "test_v0"
 
-        def predict(self, preprocessed_text):
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
             # Return label, probability, top_tokens
             return "FAKE", 0.9234, ["token1", "token2", "token3"]
 
@@ -57,4 +71,397 @@ def test_predict_endpoint_with_mocked_model_server(monkeypatch):
     assert "model_version" in data
     assert "created_at" in data
     # top_tokens should be present (our DummyModelServer returns them)
-    assert isinstance(data.get("top_tokens"), list)
\ No newline at end of file
+    assert isinstance(data.get("top_tokens"), list)
+
+def test_predict_endpoint_scores_through_the_micro_batcher(monkeypatch):
+    from micro_batch import MicroBatcher
+
+    class DummyModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "batched_v0"
+            self.batches = []
+
+        def predict_batch(self, preprocessed_texts, top_k=6, return_scores=False):
+            self.batches.append(list(preprocessed_texts))
+            return [("FAKE", 0.77, ["token1"], [0.25]) for _ in preprocessed_texts]
+
+    server = DummyModelServer()
+    batcher = MicroBatcher(app_module.inference_executor, 0.005, 8)
+    monkeypatch.setattr(app_module, "model_server", server)
+    monkeypatch.setattr(app_module, "micro_batcher", batcher)
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: None)
+
+    payload = {"content": "Micro-batched article about a parliamentary budget vote.", "include_scores": True}
+    resp = client.post("/api/v1/predict", json=payload)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["label"] == "FAKE" and resp.json()["token_scores"] == [0.25]
+    assert len(server.batches) == 1
+    assert client.get("/api/v1/health").json()["micro_batcher"]["batches"] == 1
+
+    # Served from the prediction cache the second time, not re-scored
+    assert client.post("/api/v1/predict", json=payload).status_code == 200
+    assert len(server.batches) == 1
+
+
+def test_predict_endpoint_returns_503_when_the_batch_queue_is_full(monkeypatch):
+    from micro_batch import QueueFullError
+
+    class DummyModelServer:
+        loaded = True
+        model_version = "batched_full_v0"
+
+    class FullBatcher:
+        async def predict(self, server, text, top_k, return_scores=False):
+            raise QueueFullError("micro-batch queue is full (1 waiting)")
+
+    monkeypatch.setattr(app_module, "model_server", DummyModelServer())
+    monkeypatch.setattr(app_module, "micro_batcher", FullBatcher())
+    resp = client.post("/api/v1/predict", json={"content": "An article that finds the batch queue full."})
+    assert resp.status_code == 503
+    assert "busy" in resp.json()["detail"]
+
+
+def test_predict_batch_endpoint_reports_per_item_errors(monkeypatch):
+    class DummyModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "test_v0"
+
+        def predict_batch(self, preprocessed_texts, top_k=6, return_scores=False):
+            return [("REAL", 0.81, ["token1"], [0.5]) for _ in preprocessed_texts]
+
+    inserted = []
+    monkeypatch.setattr(app_module, "model_server", DummyModelServer())
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: inserted.extend(records))
+
+    payload = {
+        "items": [
+            {"title": "First", "content": "Some article content here."},
+            {"content": "   "},
+            {"content": "Another article body."},
+        ]
+    }
+    resp = client.post("/api/v1/predict/batch", json=payload)
+    assert resp.status_code == 200, resp.text
+    items = resp.json()["items"]
+    assert [item["index"] for item in items] == [0, 1, 2]
+    assert items[0]["result"]["label"] == "REAL"
+    assert items[1]["result"] is None and items[1]["error"]
+    assert items[2]["result"]["label"] == "REAL"
+    # one bulk insert holding only the successful items
+    assert len(inserted) == 2
+
+
+def test_repeated_predict_is_served_from_cache(monkeypatch):
+    calls = []
+
+    class CountingModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "cache_test_v0"
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            calls.append(preprocessed_text)
+            return "REAL", 0.77, ["cached"]
+
+    monkeypatch.setattr(app_module, "model_server", CountingModelServer())
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: None)
+
+    payload = {"title": "Wire story", "content": "The same syndicated wire story text."}
+    first = client.post("/api/v1/predict", json=payload)
+    second = client.post("/api/v1/predict", json=payload)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["label"] == second.json()["label"] == "REAL"
+    assert len(calls) == 1
+
+    stats = client.get("/api/v1/health").json()["prediction_cache"]
+    assert stats["results"]["hits"] >= 1
+
+
+def test_history_endpoint_paginates_with_cursor():
+    resp = client.get("/api/v1/history", params={"limit": 1, "summary": True, "fields": "prediction_id,content"})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert "items" in data and "next_cursor" in data
+
+    bad = client.get("/api/v1/history", params={"fields": "nope"})
+    assert bad.status_code == 400
+
+
+def test_history_search_endpoint_filters_and_validates():
+    resp = client.get(
+        "/api/v1/history/search",
+        params={"q": "election", "label": "FAKE", "created_from": "2024-01-01T00:00:00Z", "sort": "newest", "limit": 5},
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert "items" in data and "next_offset" in data
+
+    assert client.get("/api/v1/history/search", params={"q": "NEAR(", "syntax": True}).status_code == 400
+    assert client.get("/api/v1/history/search", params={"q": "x", "sort": "oldest"}).status_code == 422
+    assert client.get("/api/v1/history/search", params={"q": "x", "fields": "nope"}).status_code == 400
+
+
+def test_stats_endpoint_reads_rollups():
+    resp = client.get("/api/v1/stats", params={"bucket": "day", "created_from": "2024-01-01T00:00:00Z"})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["bucket"] == "day" and isinstance(data["items"], list)
+    assert client.get("/api/v1/stats", params={"bucket": "minute"}).status_code == 422
+
+
+def test_metrics_endpoint_exposes_stage_and_request_metrics(monkeypatch):
+    class DummyModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "metrics_v0"
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            return "FAKE", 0.91, ["token1"]
+
+    monkeypatch.setattr(app_module, "model_server", DummyModelServer())
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: None)
+
+    resp = client.post("/api/v1/predict", json={"content": "A story only the metrics test sends."})
+    assert resp.status_code == 200, resp.text
+
+    metrics = client.get("/api/v1/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    body = metrics.text
+    assert 'fakenews_predictions_total{endpoint="predict",label="FAKE",model_version="metrics_v0"}' in body
+    assert 'fakenews_stage_latency_seconds_count{stage="preprocess"}' in body
+    assert 'fakenews_http_requests_total{endpoint="/api/v1/predict",method="POST",status="200"}' in body
+    assert 'fakenews_input_length_chars_bucket{endpoint="predict",le="+Inf"}' in body
+
+
+def test_admin_reload_swaps_model_and_rollback_restores_it(monkeypatch):
+    from model_manager import ModelManager
+
+    class DummyModelServer:
+        def __init__(self, version):
+            self.loaded = True
+            self.model_version = version
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            return "REAL", 0.7, ["token1"]
+
+        def predict_batch(self, preprocessed_texts, top_k=6, return_scores=False):
+            return [self.predict(t) for t in preprocessed_texts]
+
+    monkeypatch.setattr(app_module, "model_server", DummyModelServer("old_v"))
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: None)
+    manager = ModelManager(
+        app_module.model_server, loader=lambda: DummyModelServer("new_v"), on_swap=app_module._install_model
+    )
+    monkeypatch.setattr(app_module, "model_manager", manager)
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "")
+    assert client.post("/api/v1/admin/reload").status_code == 403
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/api/v1/admin/reload", headers={"X-Admin-Token": "nope"}).status_code == 401
+
+    headers = {"X-Admin-Token": "s3cret"}
+    resp = client.post("/api/v1/admin/reload", params={"wait": True}, headers=headers)
+    assert resp.status_code == 202, resp.text
+    assert resp.json()["current"]["model_version"] == "new_v"
+    pred = client.post("/api/v1/predict", json={"content": "Story scored after the reload."})
+    assert pred.json()["model_version"] == "new_v"
+
+    resp = client.post("/api/v1/admin/rollback", headers=headers)
+    assert resp.status_code == 200
+    assert app_module.model_server.model_version == "old_v"
+
+
+def test_near_duplicate_article_reuses_earlier_prediction(monkeypatch):
+    calls = []
+
+    class CountingModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "near_dup_v0"
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            calls.append(preprocessed_text)
+            return "REAL", 0.83, ["budget", "minister", "parliament", "committee", "spending", "plan"]
+
+    monkeypatch.setattr(app_module, "model_server", CountingModelServer())
+
+    story = " ".join(
+        f"The minister announced the budget plan in week {n}; the parliament committee reviewed the spending."
+        for n in ("one", "two", "three", "four", "five", "six", "seven", "eight")
+    )
+    first = client.post("/api/v1/predict", json={"title": "Budget", "content": story}).json()
+    db.flush_writer()  # indexed once the history row is committed
+    second = client.post(
+        "/api/v1/predict", json={"title": "Budget", "content": "By Staff Writer. " + story + " Subscribe now."}
+    ).json()
+
+    assert first["duplicate_of"] is None
+    assert second["duplicate_of"] == first["prediction_id"]
+    assert second["prediction_id"] != first["prediction_id"]
+    assert second["similarity"] >= app_module.NEAR_DUP_THRESHOLD
+    assert second["label"] == first["label"] and second["top_tokens"] == first["top_tokens"]
+    assert len(calls) == 1
+    db.flush_writer()
+    ids = [first["prediction_id"], second["prediction_id"]]
+    assert db.existing_prediction_ids(ids) == {first["prediction_id"]}
+
+
+def test_unwritten_prediction_is_not_indexed_as_near_duplicate(monkeypatch):
+    class FixedModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "near_dup_dropped_v0"
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            return "REAL", 0.7, ["river", "flood", "town", "rain", "bridge", "rescue"]
+
+    monkeypatch.setattr(app_module, "model_server", FixedModelServer())
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: None)  # writer dropped them
+    story = " ".join(
+        f"Heavy rain flooded the river town on day {n} and rescue teams closed the old bridge."
+        for n in ("one", "two", "three", "four", "five", "six", "seven", "eight")
+    )
+    first = client.post("/api/v1/predict", json={"content": story}).json()
+    second = client.post("/api/v1/predict", json={"content": story + " More soon."}).json()
+    assert first["prediction_id"] not in app_module.near_dup_index.prediction_ids()
+    assert second["duplicate_of"] is None
+
+
+def test_near_duplicate_predictions_are_counted_in_stats(monkeypatch):
+    version = f"near_dup_stats_{uuid.uuid4().hex[:8]}"
+
+    class FixedModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = version
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            return "FAKE", 0.9, ["miracle", "cure", "secret", "doctor", "hate", "shocking"]
+
+    monkeypatch.setattr(app_module, "model_server", FixedModelServer())
+    story = " ".join(
+        f"Doctors hate this secret miracle cure revealed in part {n} of the shocking leaked video."
+        for n in ("one", "two", "three", "four", "five", "six", "seven", "eight")
+    )
+    first = client.post("/api/v1/predict", json={"content": story}).json()
+    app_module.db.flush_writer()
+    second = client.post("/api/v1/predict", json={"content": story + " Share this now."}).json()
+    assert second["duplicate_of"] == first["prediction_id"]
+
+    app_module.db.flush_writer()
+    items = client.get("/api/v1/stats", params={"model_version": version}).json()["items"]
+    assert sum(item["count"] for item in items) == 2
+    assert sum(item["labels"]["FAKE"]["count"] for item in items) == 2
+
+
+def test_feedback_endpoint_stores_verified_label(monkeypatch):
+    class DummyModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "feedback_v0"
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            return "REAL", 0.64, ["token1"]
+
+    monkeypatch.setattr(app_module, "model_server", DummyModelServer())
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "s3cret")
+    headers = {"X-Admin-Token": "s3cret"}
+
+    pred = client.post("/api/v1/predict", json={"content": "Feedback test story about a miracle cure."}).json()
+    payload = {"prediction_id": pred["prediction_id"], "label": "FAKE"}
+    assert client.post("/api/v1/feedback", json=payload).status_code == 401
+    assert client.post("/api/v1/feedback", json={**payload, "label": "MAYBE"}, headers=headers).status_code == 422
+
+    resp = client.post("/api/v1/feedback", json=payload, headers=headers)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["verified_label"] == "FAKE" and data["feedback_seq"] >= 1
+    rows = app_module.db.fetch_feedback(data["feedback_seq"] - 1, 1)
+    assert rows[0][3] == "FAKE"
+
+    missing = client.post("/api/v1/feedback", json={"prediction_id": "nope", "label": "REAL"}, headers=headers)
+    assert missing.status_code == 404
+
+
+def test_stream_endpoint_scores_body_in_chunks(monkeypatch):
+    fed, stored = [], []
+
+    class Collector:
+        def __init__(self):
+            self.tokens = 0
+
+        def add(self, text):
+            fed.append(text)
+
+    class DummyModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "stream_v0"
+
+        def stream_accumulator(self):
+            return Collector()
+
+        def predict_accumulated(self, accumulator, top_k=6, return_scores=False):
+            return "REAL", 0.77, ["bank"]
+
+    monkeypatch.setattr(app_module, "model_server", DummyModelServer())
+    monkeypatch.setattr(app_module.db, "submit_predictions", lambda records: stored.extend(records))
+    monkeypatch.setattr(app_module, "STREAM_CHUNK_CHARS", 1000)
+    monkeypatch.setattr(app_module, "MAX_CONTENT_LENGTH", 50)
+
+    article = "The central bank raised interest rates again. " * 200
+
+    def body():
+        for i in range(0, len(article), 700):
+            yield article[i:i + 700].encode()
+
+    resp = client.post("/api/v1/predict/stream", params={"title": "Rates"}, content=body())
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["label"] == "REAL"
+    assert len(fed) > 2  # preprocessed incrementally, not in one piece
+    assert " ".join(t for t in fed if t).split() == app_module.preprocess_fast("Rates " + article).split()
+    assert stored[0]["title"] == "Rates" and stored[0]["content"] == article[:50]
+
+    assert client.post("/api/v1/predict/stream", content=b"   \n ").status_code == 400
+    monkeypatch.setattr(app_module, "STREAM_MAX_BYTES", 100)
+    assert client.post("/api/v1/predict/stream", content=article.encode()).status_code == 413
+
+
+def test_compaction_drops_deleted_rows_from_the_near_duplicate_index(monkeypatch):
+    from history_maintenance import HistoryCompactor
+
+    calls = []
+
+    class CountingModelServer:
+        def __init__(self):
+            self.loaded = True
+            self.model_version = "near_dup_compact_v0"
+
+        def predict(self, preprocessed_text, top_k=6, return_scores=False):
+            calls.append(preprocessed_text)
+            return "REAL", 0.8, ["council", "vote", "housing", "plan", "city", "budget"]
+
+    monkeypatch.setattr(app_module, "model_server", CountingModelServer())
+    story = " ".join(
+        f"The city council approved the housing plan in vote {n} after the budget hearing ended."
+        for n in ("one", "two", "three", "four", "five", "six", "seven", "eight")
+    )
+    first = client.post("/api/v1/predict", json={"content": story}).json()
+    client.post("/api/v1/predict", json={"content": "An unrelated newer article about football results."})
+    db.flush_writer()
+    assert first["prediction_id"] in app_module.near_dup_index.prediction_ids()
+
+    # Retention keeps only the newest row, so the first prediction's row is gone
+    compactor = HistoryCompactor(3600, on_compact=app_module._prune_near_dup_index, max_rows=1, vacuum=False)
+    compactor.run_once()
+    assert compactor.last_result["deleted_rows"] >= 1
+    assert first["prediction_id"] not in app_module.near_dup_index.prediction_ids()
+
+    again = client.post("/api/v1/predict", json={"content": story + " Read more."}).json()
+    assert again["duplicate_of"] is None
+    assert len(calls) == 3
+
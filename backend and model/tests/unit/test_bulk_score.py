@@ -0,0 +1,85 @@
+# tests/unit/test_bulk_score.py
+import sys
+import json
+from pathlib import Path
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bulk_score import score_file
+
+
+class RecordingServer:
+    model_version = "bulk_v0"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, preprocessed_texts, top_k=0):
+        self.batch_sizes.append(len(preprocessed_texts))
+        return [("FAKE" if "secret" in t else "REAL", 0.9, None) for t in preprocessed_texts]
+
+
+def _write_jsonl(path, n):
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(n):
+            content = "" if i == 3 else ("shocking secret story" if i % 2 else "budget passed parliament")
+            title = "" if i == 3 else "t"
+            fh.write(json.dumps({"id": f"a{i}", "title": title, "content": content}) + "\n")
+
+
+def test_score_file_streams_chunks_in_order(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(src, 25)
+    server = RecordingServer()
+    summary = score_file(str(src), str(out), server, chunk_size=10)
+
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert summary["rows"] == 25
+    assert [r["id"] for r in rows] == [f"a{i}" for i in range(25)]
+    assert rows[1]["label"] == "FAKE" and rows[0]["label"] == "REAL"
+    assert rows[3]["error"] == "empty content"
+    # one vectorized call per chunk, never the whole file
+    assert server.batch_sizes == [9, 10, 5]
+
+
+def test_score_file_resumes_without_duplicates(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.csv"
+    _write_jsonl(src, 25)
+    first = score_file(str(src), str(out), RecordingServer(), chunk_size=10, max_rows=10)
+    assert first["rows"] == 10
+
+    # simulate a crash after a partial, un-checkpointed write
+    with open(out, "a", encoding="utf-8") as fh:
+        fh.write("garbage,row\n")
+
+    second = score_file(str(src), str(out), RecordingServer(), chunk_size=10, resume=True)
+    assert second["rows"] == 15 and second["rows_total"] == 25
+
+    lines = out.read_text().splitlines()
+    assert lines[0].startswith("id,label")
+    ids = [line.split(",")[0] for line in lines[1:]]
+    assert ids == [f"a{i}" for i in range(25)]
+
+
+def test_malformed_jsonl_lines_become_error_rows(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text(
+        json.dumps({"id": "a0", "content": "budget passed parliament"}) + "\n"
+        + '{"id": "a1", "content": "cut off\n'
+        + "\n"
+        + '["not", "an", "object"]\n'
+        + json.dumps({"id": "a4", "content": "shocking secret story"}) + "\n",
+        encoding="utf-8",
+    )
+    summary = score_file(str(src), str(out), RecordingServer(), chunk_size=2)
+
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert summary["rows"] == 4
+    assert [r["label"] for r in rows] == ["REAL", None, None, "FAKE"]
+    assert rows[1]["error"].startswith("line 2: invalid JSON")
+    assert rows[2]["error"] == "line 4: expected a JSON object, got list"
+    assert json.loads((tmp_path / "out.jsonl.progress").read_text())["rows_done"] == 4
@@ -0,0 +1,60 @@
+# tests/unit/test_cache.py
+import sys
+from pathlib import Path
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import cache
+from cache import LRUCache, PredictionCache
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "a" becomes most recent
+    lru.put("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    stats = lru.stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_lru_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(maxsize=4, ttl=10)
+    lru.put("a", 1)
+    now[0] += 5
+    assert lru.get("a") == 1
+    now[0] += 6
+    assert lru.get("a") is None
+    assert lru.stats()["expirations"] == 1
+
+
+def test_prediction_cache_invalidates_on_model_version_change():
+    pc = PredictionCache(maxsize=8)
+    pc.ensure_version("v1")
+    pc.put_preprocessed("Raw Text!", "raw text")
+    key = pc.key("raw text", "v1", 6)
+    pc.put(key, ("FAKE", 0.9, ["raw"]))
+    assert pc.get_preprocessed("Raw Text!") == "raw text"
+    assert pc.get(key) == ("FAKE", 0.9, ["raw"])
+
+    pc.ensure_version("v2")
+    assert pc.get(key) is None
+    assert pc.get_preprocessed("Raw Text!") is None
+    assert pc.stats()["invalidations"] == 1
+
+
+def test_prediction_cache_without_raw_tier():
+    pc = PredictionCache(maxsize=8, raw_tier=False)
+    pc.put_preprocessed("x", "x")
+    assert pc.get_preprocessed("x") is None
+    assert pc.stats()["raw"] is None
@@ -0,0 +1,83 @@
+# tests/unit/test_dataset_merge.py
+import sys
+from pathlib import Path
+import pandas as pd
+import pytest
+
+# Ensure experiments/data is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+DATA_SCRIPTS_DIR = ROOT / "experiments" / "data"
+if str(DATA_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(DATA_SCRIPTS_DIR))
+
+import merge_all
+import prepare_dataset
+
+FAKE_ROWS = [
+    {"title": "Miracle", "text": "Secret cure revealed", "subject": "News"},
+    {"title": "Miracle again", "text": "  Secret cure revealed \n", "subject": "News"},  # same after strip
+    {"title": None, "text": "Aliens control the weather", "subject": "News"},
+    {"title": "Empty", "text": None, "subject": "News"},
+    {"title": "Shared", "text": "Budget passed", "subject": "News"},
+    {"title": "Aliens", "text": "Aliens control the weather", "subject": "News"},
+]
+TRUE_ROWS = [
+    {"title": "Budget", "text": "Budget passed", "subject": "politics"},  # same text, other label: kept
+    {"title": "Rates", "text": "Bank raised rates", "subject": "economy"},
+    {"title": "Rates", "text": "Bank raised rates", "subject": "economy"},
+]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    fake_path, true_path = tmp_path / "Fake.csv", tmp_path / "True.csv"
+    pd.DataFrame(FAKE_ROWS).to_csv(fake_path, index=False)
+    pd.DataFrame(TRUE_ROWS).to_csv(true_path, index=False)
+    return fake_path, true_path
+
+
+def _rows(path):
+    df = pd.read_csv(path)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_prepare_dataset_streaming_writes_the_same_rows(tmp_path, sources, monkeypatch):
+    monkeypatch.setattr(prepare_dataset, "FAKE_PATH", sources[0])
+    monkeypatch.setattr(prepare_dataset, "TRUE_PATH", sources[1])
+    prepare_dataset.main_in_memory(tmp_path / "in_memory.csv")
+    prepare_dataset.main_streaming(tmp_path / "streamed.csv", chunk_size=2)  # duplicates span chunks
+
+    in_memory, streamed = _rows(tmp_path / "in_memory.csv"), _rows(tmp_path / "streamed.csv")
+    pd.testing.assert_frame_equal(in_memory, streamed)
+    assert list(in_memory.columns) == ["title", "content", "label"]
+    assert sorted(zip(in_memory["content"], in_memory["label"])) == [
+        ("Aliens control the weather", "FAKE"),
+        ("Bank raised rates", "REAL"),
+        ("Budget passed", "FAKE"),
+        ("Budget passed", "REAL"),
+        ("Secret cure revealed", "FAKE"),
+    ]
+    # The first row of a duplicate pair wins
+    assert in_memory.loc[in_memory["content"] == "Secret cure revealed", "title"].tolist() == ["Miracle"]
+
+
+def test_merge_all_streaming_writes_the_same_rows(tmp_path, sources, monkeypatch):
+    labelled = tmp_path / "dataset.csv"
+    pd.DataFrame({
+        "content": ["Bank raised rates ", "Celebrity hoax", "Celebrity hoax", None],
+        "label": ["real", "Fake news", "FAKE", "REAL"],
+    }).to_csv(labelled, index=False)
+    monkeypatch.setattr(merge_all, "SOURCES", [
+        {"path": sources[0], "label": "FAKE", "text_col": "text"},
+        {"path": sources[1], "label": "REAL", "text_col": "text"},
+        {"path": labelled, "label": None, "text_col": None},
+        {"path": tmp_path / "missing.csv", "label": None, "text_col": None},
+    ])
+    for output, extra in (("in_memory.csv", []), ("streamed.csv", ["--streaming", "--chunk-size", "2"])):
+        monkeypatch.setattr(sys, "argv", ["merge_all.py", "--output", str(tmp_path / output)] + extra)
+        merge_all.main()
+
+    in_memory, streamed = _rows(tmp_path / "in_memory.csv"), _rows(tmp_path / "streamed.csv")
+    pd.testing.assert_frame_equal(in_memory, streamed)
+    assert len(in_memory) == 6
+    assert in_memory["content"].tolist().count("Celebrity hoax") == 1
@@ -0,0 +1,314 @@
+# tests/unit/test_db.py
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import db
+
+
+def _record(i):
+    return {
+        "prediction_id": f"id-{i}",
+        "title": f"title {i}",
+        "content": f"content {i}",
+        "label": "FAKE" if i % 2 else "REAL",
+        "probability": 0.5 + i / 1000,
+        "model_version": "test_v0",
+        "top_tokens": ["a", "b"],
+        "created_at": f"2025-01-01T00:00:{i % 60:02d}Z",
+    }
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    db.init_db()
+    return tmp_path / "history.db"
+
+
+def test_connection_uses_wal_journal(temp_db):
+    conn = db._pooled_conn()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db._pooled_conn() is conn
+
+
+def test_history_writer_batches_and_flushes(temp_db):
+    writer = db.HistoryWriter(queue_size=100, batch_size=8, flush_interval=0.01)
+    writer.start()
+    try:
+        for i in range(20):
+            assert writer.submit(_record(i))
+        assert writer.flush(timeout=5)
+        stats = writer.stats()
+        assert stats["written"] == 20
+        assert stats["dropped"] == 0
+        assert 3 <= stats["batches"] <= 20
+    finally:
+        writer.stop()
+    assert not writer.running
+    assert len(db.fetch_history(limit=100)) == 20
+
+
+def test_history_writer_drops_when_queue_is_full(temp_db):
+    # Not started, so nothing drains the queue
+    writer = db.HistoryWriter(queue_size=2, put_timeout=0.001)
+    assert writer.submit(_record(1))
+    assert writer.submit(_record(2))
+    assert not writer.submit(_record(3))
+    assert writer.stats()["dropped"] == 1
+    assert writer.stats()["queue_depth"] == 2
+
+
+def test_history_writer_counts_concurrent_submits_exactly(temp_db):
+    import threading
+
+    writer = db.HistoryWriter(queue_size=50, batch_size=16, flush_interval=0.01, put_timeout=0.0001)
+    writer.start()
+
+    def submit_many(offset):
+        for i in range(300):
+            writer.submit(_record(offset + i))
+
+    try:
+        threads = [threading.Thread(target=submit_many, args=(n * 1000,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert writer.flush(timeout=10)
+    finally:
+        writer.stop()
+    stats = writer.stats()
+    assert stats["submitted"] + stats["dropped"] == 8 * 300
+    assert stats["written"] == stats["submitted"] and stats["failed"] == 0
+    assert db._pooled_conn().execute("SELECT COUNT(*) FROM predictions").fetchone()[0] == stats["written"]
+
+
+def test_keyset_pagination_walks_history_newest_first(temp_db):
+    db.insert_predictions([_record(i) for i in range(25)])
+    seen, cursor = [], None
+    while True:
+        items, cursor = db.fetch_history_page(limit=10, cursor=cursor, fields=["prediction_id", "created_at"])
+        seen.extend(items)
+        if cursor is None:
+            break
+    assert len(seen) == 25
+    assert len({item["prediction_id"] for item in seen}) == 25
+    stamps = [item["created_at"] for item in seen]
+    assert stamps == sorted(stamps, reverse=True)
+    assert set(seen[0]) == {"prediction_id", "created_at"}
+
+
+def test_history_query_uses_created_ts_index(temp_db):
+    plan = db._pooled_conn().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM predictions ORDER BY created_ts DESC, id DESC LIMIT 10"
+    ).fetchall()
+    assert any("idx_predictions_created_ts" in row[-1] for row in plan)
+
+
+def test_summary_mode_truncates_content(temp_db):
+    record = _record(1)
+    record["content"] = "x" * (db.SUMMARY_CONTENT_CHARS * 3)
+    db.insert_prediction(record)
+    items, _ = db.fetch_history_page(limit=1, summary=True)
+    assert len(items[0]["content"]) == db.SUMMARY_CONTENT_CHARS
+    assert items[0]["top_tokens"] == ["a", "b"]
+
+
+def test_invalid_cursor_and_fields_are_rejected(temp_db):
+    with pytest.raises(ValueError):
+        db.fetch_history_page(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        db.fetch_history_page(fields=["content; DROP TABLE predictions"])
+
+
+def test_init_db_migrates_tables_without_created_ts(tmp_path, monkeypatch):
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE predictions (id INTEGER PRIMARY KEY AUTOINCREMENT, prediction_id TEXT, title TEXT, "
+        "content TEXT, label TEXT, probability REAL, model_version TEXT, top_tokens TEXT, created_at TEXT)"
+    )
+    legacy.executemany(
+        "INSERT INTO predictions (prediction_id, created_at) VALUES (?, ?)",
+        [("old", "2024-01-01T00:00:00Z"), ("new", "2024-06-01T00:00:00.5Z")],
+    )
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(db, "HISTORY_DB_PATH", str(path))
+    db.init_db()
+    items, _ = db.fetch_history_page(fields=["prediction_id"])
+    assert [item["prediction_id"] for item in items] == ["new", "old"]
+
+
+def test_feedback_is_stored_with_increasing_sequence(temp_db):
+    db.insert_predictions([_record(i) for i in range(3)])
+    assert db.record_feedback("missing", "FAKE", "2025-01-02T00:00:00Z") is None
+    first = db.record_feedback("id-2", "FAKE", "2025-01-02T00:00:00Z")
+    second = db.record_feedback("id-0", "REAL", "2025-01-02T00:00:01Z")
+    assert second > first
+    assert db.count_feedback() == 2
+    assert [row[0] for row in db.fetch_feedback(0, 10)] == [first, second]
+    assert db.fetch_feedback(first, 10) == [(second, "title 0", "content 0", "REAL")]
+    items, _ = db.fetch_history_page(limit=3, fields=["prediction_id", "verified_label"])
+    assert {item["prediction_id"]: item["verified_label"] for item in items}["id-2"] == "FAKE"
+
+
+def test_dedup_storage_keeps_each_body_once_compressed(temp_db, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_STORAGE", "dedup")
+    body = "Same syndicated article body. " * 100
+    records = [dict(_record(i), content=body) for i in range(5)] + [_record(99)]
+    db.insert_predictions(records)
+    db.insert_prediction(dict(_record(100), content=body))
+
+    conn = db._pooled_conn()
+    assert conn.execute("SELECT COUNT(*) FROM contents").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(content) FROM predictions").fetchone()[0] == 0
+    assert conn.execute("SELECT length(data) FROM contents WHERE size = ?", (len(body),)).fetchone()[0] < len(body) // 10
+
+    items, _ = db.fetch_history_page(limit=10)
+    assert [i["content"] for i in items].count(body) == 6
+    summary, _ = db.fetch_history_page(limit=1, fields=["content"], summary=True)
+    assert summary[0]["content"] == body[:db.SUMMARY_CONTENT_CHARS]
+
+
+def test_inline_and_dedup_rows_read_the_same(temp_db, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_STORAGE", "inline")
+    db.insert_prediction(_record(1))
+    monkeypatch.setattr(db, "HISTORY_STORAGE", "dedup")
+    db.insert_prediction(_record(2))
+    contents = {i["prediction_id"]: i["content"] for i in db.fetch_history(10)}
+    assert contents == {"id-1": "content 1", "id-2": "content 2"}
+    assert db.record_feedback("id-2", "FAKE", "2025-01-02T00:00:00Z") is not None
+    assert db.fetch_feedback(0, 10)[0][2] == "content 2"
+
+
+
+def test_search_ranks_filters_and_pages(temp_db, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_STORAGE", "dedup")
+    records = [_record(i) for i in range(6)]
+    records[1].update(title="Minister denies vaccine rumour", content="The minister said the vaccine claim was false.")
+    records[2].update(content="A vaccine story that mentions the word once.", model_version="test_v1")
+    records[3].update(content="Vaccine vaccine vaccine: the vaccine rumour spreads.", created_at="2025-02-01T00:00:00Z")
+    db.insert_predictions(records)
+
+    items, next_offset = db.search_history("vaccine")
+    assert {i["prediction_id"] for i in items} == {"id-1", "id-2", "id-3"}
+    assert items[-1]["prediction_id"] == "id-2"  # a single mention ranks last
+    assert next_offset is None
+    assert "content" not in items[0] and "[vaccine]" in items[0]["snippet"].lower()
+    assert items[0]["score"] >= items[-1]["score"]
+
+    assert [i["prediction_id"] for i in db.search_history("vaccine rumour")[0]] == ["id-1", "id-3"]
+    assert [i["prediction_id"] for i in db.search_history("vaccine", label="REAL")[0]] == ["id-2"]
+    assert [i["prediction_id"] for i in db.search_history("vaccine", model_version="test_v1")[0]] == ["id-2"]
+    assert [i["prediction_id"] for i in db.search_history("vaccine", created_from="2025-01-15")[0]] == ["id-3"]
+    assert "id-3" not in {i["prediction_id"] for i in db.search_history("vaccine", created_to="2025-01-15")[0]}
+    assert [i["prediction_id"] for i in db.search_history("vaccine", sort="newest")[0]] == ["id-3", "id-2", "id-1"]
+
+    first, next_offset = db.search_history("vaccine", limit=2)
+    rest, last = db.search_history("vaccine", limit=2, offset=next_offset)
+    assert next_offset == 2 and last is None
+    assert [i["prediction_id"] for i in first + rest] == [i["prediction_id"] for i in items]
+    assert db.search_history("vaccine", rank_window=1, fields=["content"])[0][0]["content"].startswith("Vaccine")
+
+    phrase = db.search_history('"minister denies" OR spreads', raw_query=True, sort="newest")[0]
+    assert [i["prediction_id"] for i in phrase] == ["id-3", "id-1"]
+    assert db.search_history('quote " and NEAR(') == ([], None)  # plain mode never trips FTS5 syntax
+    with pytest.raises(ValueError):
+        db.search_history('NEAR(', raw_query=True)
+    with pytest.raises(ValueError):
+        db.search_history("   ")
+
+
+def test_search_index_follows_deletes_and_existing_rows(tmp_path, monkeypatch):
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE predictions (id INTEGER PRIMARY KEY AUTOINCREMENT, prediction_id TEXT, title TEXT, "
+        "content TEXT, label TEXT, probability REAL, model_version TEXT, top_tokens TEXT, created_at TEXT)"
+    )
+    legacy.execute(
+        "INSERT INTO predictions (prediction_id, content, created_at) VALUES ('old', 'election fraud', '2024-01-01')"
+    )
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(db, "HISTORY_DB_PATH", str(path))
+    db.init_db()  # builds the index over rows that predate it
+    db.insert_prediction(dict(_record(1), content="election results announced"))
+    assert {i["prediction_id"] for i in db.search_history("election")[0]} == {"old", "id-1"}
+
+    conn = db._pooled_conn()
+    with conn:
+        conn.execute("DELETE FROM predictions WHERE prediction_id = 'old'")
+    assert [i["prediction_id"] for i in db.search_history("election")[0]] == ["id-1"]
+    assert db.search_history("fraud") == ([], None)
+    conn.execute("INSERT INTO history_fts (history_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_stats_rollups_are_maintained_on_insert(temp_db):
+    records = [
+        dict(_record(i), label=label, probability=prob, model_version=version, created_at=created_at)
+        for i, (label, prob, version, created_at) in enumerate([
+            ("FAKE", 0.9, "v1", "2025-01-01T10:05:00Z"),
+            ("FAKE", 0.7, "v1", "2025-01-01T10:55:00Z"),
+            ("REAL", 0.6, "v1", "2025-01-01T10:30:00Z"),
+            ("REAL", 0.8, "v2", "2025-01-01T10:30:00Z"),
+            ("FAKE", 0.5, "v1", "2025-01-01T11:00:00Z"),
+            ("REAL", 1.0, "v1", "2025-01-02T09:00:00Z"),
+        ])
+    ]
+    db.insert_predictions(records[:3])
+    for record in records[3:]:
+        db.insert_prediction(record)
+
+    hourly = db.fetch_stats(model_version="v1")
+    assert [(i["bucket_start"], i["count"]) for i in hourly] == [
+        ("2025-01-01T10:00:00Z", 3), ("2025-01-01T11:00:00Z", 1), ("2025-01-02T09:00:00Z", 1)
+    ]
+    assert hourly[0]["labels"] == {
+        "FAKE": {"count": 2, "mean_probability": 0.8},
+        "REAL": {"count": 1, "mean_probability": 0.6},
+    }
+    assert hourly[0]["mean_probability"] == pytest.approx(0.733333)
+
+    daily = db.fetch_stats("day", created_to="2025-01-02T00:00:00Z")
+    assert [(i["model_version"], i["count"]) for i in daily] == [("v1", 4), ("v2", 1)]
+    assert [i["bucket_start"] for i in db.fetch_stats(created_from="2025-01-01T11:30:00Z")] == [
+        "2025-01-01T11:00:00Z", "2025-01-02T09:00:00Z"
+    ]
+    with pytest.raises(ValueError):
+        db.fetch_stats("minute")
+
+
+def test_rebuild_stats_backfills_and_keeps_pruned_hours(temp_db):
+    db.insert_predictions([dict(_record(i), created_at=f"2025-01-0{1 + i % 3}T00:00:00Z") for i in range(9)])
+    expected = db.fetch_stats()
+    conn = db._pooled_conn()
+    with conn:
+        conn.execute("DELETE FROM prediction_stats")
+    assert db.fetch_stats() == []
+    db.rebuild_stats()
+    assert db.fetch_stats() == expected
+
+    with conn:
+        conn.execute("DELETE FROM predictions WHERE created_at LIKE '2025-01-01%'")  # retention
+    assert db.fetch_stats() == expected
+    db.rebuild_stats(since="2025-01-02T00:00:00Z")
+    assert db.fetch_stats() == expected
+    db.rebuild_stats()
+    assert db.fetch_stats() == expected[1:]
+    with pytest.raises(ValueError):
+        db.rebuild_stats(since="yesterday")
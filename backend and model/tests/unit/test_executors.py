@@ -0,0 +1,46 @@
+# tests/unit/test_executors.py
+import sys
+import time
+import asyncio
+from pathlib import Path
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from executors import StageExecutor, StageTimeoutError
+
+
+def test_stage_executor_runs_calls_and_counts_them():
+    stage = StageExecutor("test", max_workers=2)
+
+    async def main():
+        return await asyncio.gather(*(stage.run(pow, i, 2) for i in range(5)))
+
+    try:
+        assert asyncio.run(main()) == [0, 1, 4, 9, 16]
+        stats = stage.stats()
+        assert stats["completed"] == 5
+        assert stats["queue_depth"] == 0 and stats["active"] == 0
+    finally:
+        stage.shutdown()
+
+
+def test_stage_executor_times_out_and_keeps_accounting():
+    stage = StageExecutor("slow", max_workers=1, timeout=0.05)
+
+    async def main():
+        with pytest.raises(StageTimeoutError):
+            await stage.run(time.sleep, 0.3)
+
+    try:
+        asyncio.run(main())
+        assert stage.stats()["timeouts"] == 1
+    finally:
+        stage.shutdown(wait=True)
+    stats = stage.stats()
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
+    assert stats["completed"] == 1
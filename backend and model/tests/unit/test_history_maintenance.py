@@ -0,0 +1,89 @@
+# tests/unit/test_history_maintenance.py
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import db
+import history_maintenance as hm
+
+
+def _record(i, content, created_at="2025-01-01T00:00:00Z"):
+    return {
+        "prediction_id": f"id-{i}",
+        "title": f"title {i}",
+        "content": content,
+        "label": "REAL",
+        "probability": 0.7,
+        "model_version": "test_v0",
+        "top_tokens": ["a"],
+        "created_at": created_at,
+    }
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    db.init_db()
+    return tmp_path / "history.db"
+
+
+def test_migration_moves_inline_bodies_and_shrinks_the_file(temp_db, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_STORAGE", "inline")
+    body = "Resubmitted article text with plenty of words. " * 200
+    db.insert_predictions([_record(i, body if i % 2 else f"unique {i}") for i in range(400)])
+    before = hm.storage_stats()
+    assert before["inline_rows"] == 400
+
+    assert hm.migrate_inline_content(batch_size=64) == 400
+    assert hm.migrate_inline_content() == 0  # idempotent
+    result = hm.compact_history(0, 0, min_free_fraction=0.0)
+    assert result["vacuumed"]
+
+    after = hm.storage_stats()
+    assert after["inline_rows"] == 0
+    assert after["distinct_contents"] == 201
+    assert after["file_bytes"] < before["file_bytes"] / 5
+    assert {i["content"] for i in db.fetch_history(400)} == {body} | {f"unique {i}" for i in range(0, 400, 2)}
+
+
+def test_retention_by_age_and_row_count_keeps_labelled_rows(temp_db, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_STORAGE", "dedup")
+    now = time.time()
+    old = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - 10 * 86400))
+    db.insert_predictions([_record(i, f"old body {i}", old) for i in range(5)])
+    db.insert_predictions([
+        _record(10 + i, f"new body {i}", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - 60 + i)))
+        for i in range(5)
+    ])
+    db.record_feedback("id-0", "FAKE", "2025-01-02T00:00:00Z")
+
+    conn = db._get_conn()
+    try:
+        assert hm.apply_retention(conn, retention_days=7) == 4
+        assert hm.apply_retention(conn, max_rows=3) == 2  # newest 3 + the labelled row remain
+        assert hm.delete_orphan_contents(conn) == 6
+    finally:
+        conn.close()
+    remaining = {i["prediction_id"] for i in db.fetch_history(20)}
+    assert remaining == {"id-0", "id-12", "id-13", "id-14"}
+    assert db._pooled_conn().execute("SELECT COUNT(*) FROM contents").fetchone()[0] == 4
+
+
+def test_compactor_reports_deleted_rows_to_on_compact(temp_db):
+    db.insert_predictions([_record(i, f"body {i}") for i in range(5)])
+    results = []
+    compactor = hm.HistoryCompactor(3600, on_compact=results.append, max_rows=2, vacuum=False)
+
+    compactor.run_once()
+    assert [r["deleted_rows"] for r in results] == [3]
+    assert db.existing_prediction_ids([f"id-{i}" for i in range(5)]) == {"id-3", "id-4"}
+
+    compactor.run_once()  # nothing deleted, nothing to report
+    assert len(results) == 1 and compactor.runs == 2 and compactor.last_error is None
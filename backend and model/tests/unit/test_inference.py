@@ -0,0 +1,189 @@
+# tests/unit/test_inference.py
+import sys
+from pathlib import Path
+import joblib
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+import inference
+from inference import ModelServer, ModelNotLoadedError
+
+TRAIN_TEXTS = [
+    "shocking secret cure doctor hate",
+    "celebrity secret miracle shocking claim",
+    "aliens secretly control government shocking",
+    "miracle diet shocking secret revealed",
+    "parliament passed budget bill monday",
+    "central bank raised interest rate",
+    "minister announced trade agreement talk",
+    "court ruled election case appeal",
+]
+TRAIN_LABELS = ["FAKE"] * 4 + ["REAL"] * 4
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path, monkeypatch):
+    tfidf = TfidfVectorizer(ngram_range=(1, 2))
+    X = tfidf.fit_transform(TRAIN_TEXTS)
+    model = LogisticRegression(max_iter=1000).fit(X, TRAIN_LABELS)
+    joblib.dump(tfidf, tmp_path / "tfidf.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+    monkeypatch.setattr(inference, "TFIDF_PATH", str(tmp_path / "tfidf.pkl"))
+    monkeypatch.setattr(inference, "MODEL_PATH", str(tmp_path / "model.pkl"))
+    monkeypatch.setattr(inference, "METADATA_PATH", str(tmp_path / "metadata.json"))
+    monkeypatch.setattr(inference, "COMPACT_ARTIFACTS_DIR", str(tmp_path / "compact"))
+    return tmp_path
+
+
+@pytest.fixture
+def server(artifacts_dir):
+    srv = ModelServer()
+    assert srv.loaded
+    return srv
+
+
+def test_missing_artifacts_leave_server_unloaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference, "TFIDF_PATH", str(tmp_path / "missing.pkl"))
+    srv = ModelServer()
+    assert srv.loaded is False
+    with pytest.raises(ModelNotLoadedError):
+        srv.predict("anything")
+
+
+def test_predict_batch_matches_single_predictions(server):
+    texts = ["shocking secret miracle", "bank announced budget", "court appeal monday"]
+    batch = server.predict_batch(texts)
+    assert len(batch) == len(texts)
+    for text, (label, prob, top_tokens) in zip(texts, batch):
+        single = server.predict(text)
+        assert label == single[0]
+        assert prob == pytest.approx(single[1])
+        assert top_tokens == single[2]
+
+
+def test_predict_batch_empty_input(server):
+    assert server.predict_batch([]) == []
+
+
+def test_top_tokens_are_document_specific(server):
+    seen = []
+    for text in ("shocking secret miracle", "central bank budget", "court ruled appeal"):
+        _, _, tokens = server.predict(text)
+        seen.append(tokens)
+        # explanations only use features present in the document
+        words = text.split()
+        features = set(words) | {" ".join(pair) for pair in zip(words, words[1:])}
+        assert set(tokens) <= features
+    assert any(seen)
+
+
+def test_predict_returns_sorted_scores_and_respects_top_k(server):
+    label, prob, tokens, scores = server.predict(
+        "shocking secret miracle diet revealed", top_k=2, return_scores=True
+    )
+    assert len(tokens) == len(scores) <= 2
+    assert all(s > 0 for s in scores)
+    assert scores == sorted(scores, reverse=True)
+    assert server.predict("shocking secret", top_k=0)[2] == []
+
+
+def test_compact_artifacts_match_pickled_model(artifacts_dir, monkeypatch):
+    import numpy as np
+    import compact
+
+    pickled = ModelServer()
+    assert pickled.artifact_format == "pickle"
+
+    tfidf = joblib.load(artifacts_dir / "tfidf.pkl")
+    model = joblib.load(artifacts_dir / "model.pkl")
+    compact.export_compact(tfidf, model, artifacts_dir / "compact")
+    vec, lin, manifest = compact.load_compact(str(artifacts_dir / "compact"))
+    assert manifest["n_features"] == len(tfidf.vocabulary_)
+
+    docs = ["shocking secret miracle diet", "central bank raised rate", "unknown words only", ""]
+    expected = tfidf.transform(docs)
+    got = vec.transform(docs)
+    assert np.allclose(got.toarray(), expected.toarray())
+    assert np.allclose(lin.predict_proba(got), model.predict_proba(expected))
+    assert vec.vocabulary.lookup("secret miracle") == tfidf.vocabulary_["secret miracle"]
+    assert vec.vocabulary.lookup("not in vocab") == -1
+
+    served = ModelServer()
+    assert served.artifact_format == "compact"
+    monkeypatch.setattr(inference, "ARTIFACT_FORMAT", "pickle")
+    assert ModelServer().artifact_format == "pickle"
+    for doc in docs[:3]:
+        a = served.predict(doc, return_scores=True)
+        b = pickled.predict(doc, return_scores=True)
+        assert a[0] == b[0]
+        assert a[1] == pytest.approx(b[1])
+        # near-tied contributions may swap order, so compare as sets / sorted scores
+        assert set(a[2]) == set(b[2])
+        assert a[3] == pytest.approx(b[3])
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: LogisticRegression(max_iter=1000, class_weight="balanced"),
+    lambda: LogisticRegression(max_iter=1000, multi_class="multinomial"),
+    lambda: LogisticRegression(solver="liblinear"),
+    lambda: SGDClassifier(loss="log_loss", random_state=0),
+])
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_compact_predict_proba_matches_each_training_classifier(tmp_path, make_model, n_classes):
+    import numpy as np
+    import compact
+
+    labels = TRAIN_LABELS if n_classes == 2 else ["FAKE", "FAKE", "SATIRE", "SATIRE", "REAL", "REAL", "REAL", "FAKE"]
+    tfidf = TfidfVectorizer(ngram_range=(1, 2))
+    X = tfidf.fit_transform(TRAIN_TEXTS)
+    model = make_model().fit(X, labels)
+    compact.export_compact(tfidf, model, tmp_path)
+    vec, lin, _ = compact.load_compact(str(tmp_path))
+
+    docs = TRAIN_TEXTS + ["shocking secret miracle diet", "central bank raised rate", "unknown words only"]
+    assert np.allclose(lin.predict_proba(vec.transform(docs)), model.predict_proba(tfidf.transform(docs)))
+
+
+def test_compact_export_rejects_models_without_log_loss_probabilities(tmp_path):
+    from sklearn.naive_bayes import ComplementNB
+    import compact
+
+    tfidf = TfidfVectorizer()
+    X = tfidf.fit_transform(TRAIN_TEXTS)
+    for model in (SGDClassifier(loss="hinge"), SGDClassifier(loss="modified_huber"), ComplementNB()):
+        with pytest.raises(ValueError):
+            compact.export_compact(tfidf, model.fit(X, TRAIN_LABELS), tmp_path)
+
+
+def test_hashing_variant_is_served_with_document_explanations(artifacts_dir):
+    import json
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import Pipeline
+
+    pipeline = Pipeline([
+        ("hashing", HashingVectorizer(n_features=2 ** 12, ngram_range=(1, 2), alternate_sign=False, norm=None)),
+        ("tfidf", TfidfTransformer()),
+    ])
+    X = pipeline.fit_transform(TRAIN_TEXTS)
+    model = LogisticRegression(max_iter=1000).fit(X, TRAIN_LABELS)
+    joblib.dump(pipeline, artifacts_dir / "tfidf.pkl")
+    joblib.dump(model, artifacts_dir / "model.pkl")
+    (artifacts_dir / "metadata.json").write_text(json.dumps({"model_version": "hash_v0", "vectorizer": "hashing"}))
+
+    srv = ModelServer()
+    assert srv.loaded and srv.vectorizer_kind == "hashing"
+    assert srv.model_version == "hash_v0"
+    text = "central bank raised interest rate"
+    label, prob, tokens, scores = srv.predict(text, return_scores=True)
+    assert label in ("FAKE", "REAL")
+    words = text.split()
+    assert set(tokens) <= set(words) | {" ".join(p) for p in zip(words, words[1:])}
+    assert len(tokens) == len(scores)
@@ -0,0 +1,186 @@
+# tests/unit/test_linear_scorer.py
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import LinearSVC
+
+import compact
+import inference
+from inference import ModelServer
+from linear_scorer import TermAccumulator, build_scorer, build_term_vectorizer
+
+TRAIN_TEXTS = [
+    "shocking secret cure doctor hate",
+    "celebrity secret miracle shocking claim",
+    "aliens secretly control government shocking",
+    "miracle diet shocking secret revealed",
+    "parliament passed budget bill monday",
+    "central bank raised interest rate",
+    "minister announced trade agreement talk",
+    "court ruled election case appeal",
+]
+TRAIN_LABELS = ["FAKE"] * 4 + ["REAL"] * 4
+DOCS = [
+    "shocking secret miracle diet",
+    "central bank raised rate rate rate",
+    "unknown words only",
+    "",
+    "secret court secret appeal shocking budget",
+]
+
+
+@pytest.mark.parametrize("vectorizer_kwargs", [
+    {"ngram_range": (1, 2)},
+    {"sublinear_tf": True, "norm": "l1"},
+    {"binary": True, "use_idf": False},
+])
+def test_scorer_matches_sklearn_predict_proba(vectorizer_kwargs):
+    tfidf = TfidfVectorizer(**vectorizer_kwargs)
+    X = tfidf.fit_transform(TRAIN_TEXTS)
+    model = LogisticRegression(max_iter=1000).fit(X, TRAIN_LABELS)
+
+    scorer = build_scorer(tfidf, model)
+    rows = scorer.transform(DOCS)
+    expected = tfidf.transform(DOCS)
+    got = sp.csr_matrix((rows.data, rows.indices, rows.indptr), shape=expected.shape)
+    assert np.allclose(got.toarray(), expected.toarray())
+    assert np.allclose(scorer.predict_proba(rows), model.predict_proba(expected), atol=1e-12)
+
+
+def test_scorer_from_compact_artifacts_matches_pickles(tmp_path):
+    tfidf = TfidfVectorizer(ngram_range=(1, 2))
+    model = LogisticRegression(max_iter=1000).fit(tfidf.fit_transform(TRAIN_TEXTS), TRAIN_LABELS)
+    compact.export_compact(tfidf, model, tmp_path)
+    vectorizer, linear, _ = compact.load_compact(str(tmp_path))
+
+    scorer = build_scorer(vectorizer, linear)
+    assert np.allclose(scorer.predict_proba(scorer.transform(DOCS)), model.predict_proba(tfidf.transform(DOCS)))
+
+
+def test_unsupported_models_are_rejected():
+    tfidf = TfidfVectorizer()
+    X = tfidf.fit_transform(TRAIN_TEXTS)
+    with pytest.raises(ValueError):
+        build_scorer(tfidf, LinearSVC().fit(X, TRAIN_LABELS))
+    with pytest.raises(ValueError):
+        build_scorer(tfidf, LogisticRegression(multi_class="multinomial").fit(X, TRAIN_LABELS))
+
+
+def test_model_server_scorers_agree(tmp_path, monkeypatch):
+    tfidf = TfidfVectorizer(ngram_range=(1, 2))
+    model = LogisticRegression(max_iter=1000).fit(tfidf.fit_transform(TRAIN_TEXTS), TRAIN_LABELS)
+    joblib.dump(tfidf, tmp_path / "tfidf.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+    monkeypatch.setattr(inference, "TFIDF_PATH", str(tmp_path / "tfidf.pkl"))
+    monkeypatch.setattr(inference, "MODEL_PATH", str(tmp_path / "model.pkl"))
+    monkeypatch.setattr(inference, "METADATA_PATH", str(tmp_path / "metadata.json"))
+    monkeypatch.setattr(inference, "COMPACT_ARTIFACTS_DIR", str(tmp_path / "compact"))
+
+    fast = ModelServer()
+    assert fast.scorer_kind == "numpy"
+    monkeypatch.setattr(inference, "SCORER", "sklearn")
+    slow = ModelServer()
+    assert slow.scorer_kind == "sklearn"
+
+    for a, b in zip(fast.predict_batch(DOCS, return_scores=True), slow.predict_batch(DOCS, return_scores=True)):
+        assert a[0] == b[0]
+        assert a[1] == pytest.approx(b[1])
+        # near-tied contributions may swap order, so compare as sets / sorted scores
+        assert set(a[2]) == set(b[2])
+        assert a[3] == pytest.approx(b[3])
+
+
+@pytest.mark.parametrize("ngram_range", [(1, 1), (1, 2), (2, 3)])
+def test_accumulator_over_chunks_matches_whole_document(ngram_range):
+    tfidf = TfidfVectorizer(ngram_range=ngram_range)
+    model = LogisticRegression(max_iter=1000).fit(tfidf.fit_transform(TRAIN_TEXTS), TRAIN_LABELS)
+    scorer = build_scorer(tfidf, model)
+    words = ("shocking secret miracle diet central bank raised rate court appeal " * 7).split()
+
+    accumulator = scorer.accumulator()
+    for i in range(0, len(words), 4):
+        accumulator.add(" ".join(words[i:i + 4]))
+    rows = accumulator.rows()
+    whole = scorer.transform([" ".join(words)])
+    assert np.array_equal(rows.indices, whole.indices)
+    assert np.allclose(rows.data, whole.data)
+    assert scorer.predict_proba(rows) == pytest.approx(scorer.predict_proba(whole))
+    assert accumulator.tokens == len(words)
+
+
+
+def _hashing_pipeline(**hashing):
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ("hashing", HashingVectorizer(n_features=2 ** 12, alternate_sign=False, norm=None, **hashing)),
+        ("tfidf", TfidfTransformer(sublinear_tf=True)),
+    ])
+
+
+@pytest.mark.parametrize("make_vectorizer", [
+    lambda: TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True),
+    lambda: TfidfVectorizer(ngram_range=(2, 3), binary=True, norm="l1"),
+    lambda: _hashing_pipeline(ngram_range=(1, 2)),
+    lambda: _hashing_pipeline(ngram_range=(1, 3), binary=True),
+])
+def test_term_vectorizer_chunks_match_sklearn_transform(make_vectorizer):
+    vectorizer = make_vectorizer().fit(TRAIN_TEXTS)
+    words = ("shocking secret miracle diet central bank raised rate court appeal " * 7).split()
+
+    accumulator = TermAccumulator(build_term_vectorizer(vectorizer))
+    for i in range(0, len(words), 3):
+        accumulator.add(" ".join(words[i:i + 3]))
+    expected = vectorizer.transform([" ".join(words)])
+    got = accumulator.rows().tocsr(expected.shape[1])
+    assert np.allclose(got.toarray(), expected.toarray())
+
+
+def test_unsupported_vectorizers_are_rejected():
+    with pytest.raises(ValueError):
+        build_term_vectorizer(TfidfVectorizer(analyzer="char").fit(TRAIN_TEXTS))
+    with pytest.raises(ValueError):
+        build_term_vectorizer(_hashing_pipeline().set_params(hashing__alternate_sign=True).fit(TRAIN_TEXTS))
+
+
+@pytest.mark.parametrize("hashing", [False, True])
+def test_stream_without_numpy_scorer_keeps_counts_not_text(tmp_path, monkeypatch, hashing):
+    vectorizer = _hashing_pipeline(ngram_range=(1, 2)) if hashing else TfidfVectorizer(ngram_range=(1, 2))
+    model = LogisticRegression(max_iter=1000).fit(vectorizer.fit_transform(TRAIN_TEXTS), TRAIN_LABELS)
+    joblib.dump(vectorizer, tmp_path / "tfidf.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+    monkeypatch.setattr(inference, "TFIDF_PATH", str(tmp_path / "tfidf.pkl"))
+    monkeypatch.setattr(inference, "MODEL_PATH", str(tmp_path / "model.pkl"))
+    monkeypatch.setattr(inference, "METADATA_PATH", str(tmp_path / "metadata.json"))
+    monkeypatch.setattr(inference, "COMPACT_ARTIFACTS_DIR", str(tmp_path / "compact"))
+    monkeypatch.setattr(inference, "SCORER", "sklearn")
+
+    server = ModelServer()
+    assert server.scorer_kind == "sklearn"
+    words = ("central bank raised interest rate after court appeal " * 50).split()
+    accumulator = server.stream_accumulator()
+    assert isinstance(accumulator, TermAccumulator)
+    for i in range(0, len(words), 5):
+        accumulator.add(" ".join(words[i:i + 5]))
+    assert len(accumulator._counts) <= 2 * len(set(words))  # distinct uni/bigrams, not the article
+
+    streamed = server.predict_accumulated(accumulator, return_scores=True)
+    whole = server.predict(" ".join(words), return_scores=True)
+    assert streamed[0] == whole[0]
+    assert streamed[1] == pytest.approx(whole[1])
+    # every n-gram repeats equally often, so compare scores, not tie order
+    assert streamed[3] == pytest.approx(whole[3])
+    assert set(streamed[2]) <= set(words) | {" ".join(p) for p in zip(words, words[1:])}
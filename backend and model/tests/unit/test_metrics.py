@@ -0,0 +1,40 @@
+# tests/unit/test_metrics.py
+import sys
+from pathlib import Path
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from metrics import Counter, GaugeCallback, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    hist = Histogram("stage_seconds", "Stage latency.", ("stage",), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 5.0):
+        hist.observe(value, "vectorize")
+
+    lines = hist.render()
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="vectorize",le="0.01"} 1' in lines
+    assert 'stage_seconds_bucket{stage="vectorize",le="0.1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="vectorize",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="vectorize",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="vectorize"} 4' in lines
+    assert hist.snapshot("vectorize")["sum"] == 5.105
+
+
+def test_counter_labels_are_escaped_and_registry_joins_metrics():
+    registry = Registry()
+    counter = registry.register(Counter("predictions_total", "Predictions.", ("label",)))
+    counter.inc('FA"KE')
+    counter.inc('FA"KE', amount=2)
+    registry.register(GaugeCallback("queue_depth", "Depth.", ("stage",), lambda: {("db",): 3, ("x",): None}))
+
+    text = registry.render()
+    assert 'predictions_total{label="FA\\"KE"} 3' in text
+    assert 'queue_depth{stage="db"} 3' in text
+    assert 'stage="x"' not in text
+    assert text.endswith("\n")
@@ -0,0 +1,210 @@
+# tests/unit/test_micro_batch.py
+import sys
+import asyncio
+import threading
+from pathlib import Path
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from executors import StageExecutor, StageTimeoutError
+from micro_batch import MicroBatcher, QueueFullError
+
+
+class RecordingServer:
+    """predict_batch that labels by text and records every call."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def predict_batch(self, texts, top_k=6, return_scores=False):
+        self.calls.append((list(texts), top_k, return_scores))
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return [
+            ("FAKE" if "fake" in t else "REAL", 0.9, [t][:top_k], [1.0][:top_k]) for t in texts
+        ]
+
+
+def _run_saturated(batcher, stage, requests):
+    """Submit requests while the only worker is busy, then free it."""
+    release = threading.Event()
+
+    async def main():
+        blocker = asyncio.ensure_future(stage.run(release.wait))
+        await asyncio.sleep(0.01)
+        calls = [asyncio.ensure_future(batcher.predict(*args)) for args in requests]
+        await asyncio.sleep(0.1)  # past the window
+        release.set()
+        await blocker
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def stage():
+    stage = StageExecutor("inference", max_workers=1)
+    yield stage
+    stage.shutdown()
+
+
+def test_idle_requests_are_dispatched_immediately(stage):
+    server = RecordingServer()
+    batcher = MicroBatcher(stage, window=10.0, max_batch=8)  # a long window must not delay them
+
+    async def main():
+        return [await batcher.predict(server, f"text {i}", 6) for i in range(3)]
+
+    assert [r[0] for r in asyncio.run(main())] == ["REAL"] * 3
+    assert [len(texts) for texts, _, _ in server.calls] == [1, 1, 1]
+    stats = batcher.stats()
+    assert stats["flushes"]["idle"] == 3 and stats["max_batch_size"] == 1
+
+
+def test_busy_workers_batch_requests_within_the_window(stage):
+    server = RecordingServer()
+    batcher = MicroBatcher(stage, window=0.02, max_batch=8)
+    requests = [(server, f"fake {i}" if i % 2 else f"real {i}", 6, bool(i == 3)) for i in range(5)]
+    results = _run_saturated(batcher, stage, requests)
+
+    assert server.calls == [([r[1] for r in requests], 6, True)]
+    assert [r[0] for r in results] == ["REAL", "FAKE", "REAL", "FAKE", "REAL"]
+    assert results[3] == ("FAKE", 0.9, ["fake 3"], [1.0])  # scores only when asked for
+    assert results[0] == ("REAL", 0.9, ["real 0"])
+    stats = batcher.stats()
+    assert stats["flushes"]["window"] == 1 and stats["batches"] == 1 and stats["mean_batch_size"] == 5
+
+
+def test_groups_split_by_server_top_k_and_max_batch(stage):
+    old, new = RecordingServer(), RecordingServer()
+    batcher = MicroBatcher(stage, window=0.02, max_batch=3)
+    requests = [(old, "a", 6), (old, "b", 6), (new, "c", 6), (old, "d", 0)]
+    results = _run_saturated(batcher, stage, requests)
+
+    assert [r[2] for r in results] == [["a"], ["b"], ["c"], []]
+    assert old.calls == [(["a", "b"], 6, True), (["d"], 0, True)]
+    assert new.calls == [(["c"], 6, True)]
+
+    server = RecordingServer()
+    batcher = MicroBatcher(stage, window=0.02, max_batch=3, max_inflight=3)
+    _run_saturated(batcher, stage, [(server, str(i), 6) for i in range(7)])
+    assert [len(texts) for texts, _, _ in server.calls] == [3, 3, 1]
+    assert batcher.stats()["flushes"]["full"] == 2
+
+
+def test_failures_reach_every_caller_in_the_batch(stage):
+    server = RecordingServer(fail=True)
+    batcher = MicroBatcher(stage, window=0.02, max_batch=8)
+    results = _run_saturated(batcher, stage, [(server, "x", 6), (server, "y", 6)])
+    assert len(server.calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_requests_queue_behind_a_running_batch():
+    stage = StageExecutor("inference", max_workers=2)
+    first_started, release = threading.Event(), threading.Event()
+
+    class SlowFirstCall(RecordingServer):
+        def predict_batch(self, texts, top_k=6, return_scores=False):
+            if not self.calls:
+                first_started.set()
+                release.wait(5)
+            return super().predict_batch(texts, top_k, return_scores)
+
+    server = SlowFirstCall()
+    batcher = MicroBatcher(stage, window=5.0, max_batch=8, max_inflight=1)
+
+    async def main():
+        first = asyncio.ensure_future(batcher.predict(server, "first", 6))
+        await asyncio.get_running_loop().run_in_executor(None, first_started.wait, 5)
+        rest = [asyncio.ensure_future(batcher.predict(server, f"next {i}", 6)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert batcher.stats()["queue_depth"] == 3  # a worker is idle, but one batch is already running
+        release.set()
+        return await asyncio.gather(first, *rest)
+
+    try:
+        assert len(asyncio.run(main())) == 4
+    finally:
+        stage.shutdown()
+    assert [texts for texts, _, _ in server.calls] == [["first"], ["next 0", "next 1", "next 2"]]
+
+
+def test_burst_in_one_tick_is_batched_and_respects_max_inflight():
+    stage = StageExecutor("inference", max_workers=4)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    class ConcurrencyTracking(RecordingServer):
+        def predict_batch(self, texts, top_k=6, return_scores=False):
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            try:
+                threading.Event().wait(0.02)
+                return super().predict_batch(texts, top_k, return_scores)
+            finally:
+                with lock:
+                    running["now"] -= 1
+
+    server = ConcurrencyTracking()
+    batcher = MicroBatcher(stage, window=0.005, max_batch=4, max_inflight=1)
+
+    async def main():
+        # All calls are created in the same loop tick, before any batch task has started
+        return await asyncio.gather(*(batcher.predict(server, f"text {i}", 6) for i in range(10)))
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        stage.shutdown()
+    assert [r[2] for r in results] == [[f"text {i}"] for i in range(10)]
+    assert running["peak"] == 1
+    assert len(server.calls) < 10
+    assert all(len(texts) <= 4 for texts, _, _ in server.calls)
+    assert batcher.stats()["inflight_batches"] == 0 and batcher.stats()["queue_depth"] == 0
+
+
+def test_full_queue_is_rejected_and_queued_waits_time_out(stage):
+    server = RecordingServer()
+    batcher = MicroBatcher(stage, window=10.0, max_batch=8, max_queue=2, timeout=0.05)
+    release = threading.Event()
+
+    async def main():
+        blocker = asyncio.ensure_future(stage.run(release.wait))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.ensure_future(batcher.predict(server, f"text {i}", 6)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.predict(server, "one too many", 6)
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+        release.set()
+        await blocker
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, StageTimeoutError) for r in results)
+    stats = batcher.stats()
+    assert stats["rejected"] == 1 and stats["timeouts"] == 2
+    assert stats["queue_depth"] == 0 and server.calls == []  # timed-out requests were never scored
+
+
+def test_running_batches_are_referenced_until_done(stage):
+    server = RecordingServer()
+    batcher = MicroBatcher(stage, window=10.0, max_batch=8)
+
+    async def main():
+        call = asyncio.ensure_future(batcher.predict(server, "text", 6))
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        await call
+        await asyncio.sleep(0)
+        return len(batcher._tasks)
+
+    assert asyncio.run(main()) == 0
@@ -0,0 +1,86 @@
+# tests/unit/test_model_manager.py
+import sys
+import threading
+from pathlib import Path
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from model_manager import MetadataWatcher, ModelManager, ReloadInProgressError
+
+
+class FakeServer:
+    def __init__(self, version, loaded=True, prob=0.8, gate=None):
+        self.model_version = version
+        self.loaded = loaded
+        self.prob = prob
+        self.gate = gate
+
+    def predict_batch(self, texts, top_k=6, return_scores=False):
+        if self.gate is not None:
+            self.gate.wait(5)
+        return [("REAL", self.prob, ["token"]) for _ in texts]
+
+
+def make_manager(candidates):
+    swapped = []
+    manager = ModelManager(FakeServer("v1"), loader=lambda: candidates.pop(0), on_swap=swapped.append)
+    return manager, swapped
+
+
+def test_reload_warms_up_then_swaps_and_rollback_restores_previous():
+    manager, swapped = make_manager([FakeServer("v2")])
+    assert manager.reload(wait=True)
+    assert manager.current.model_version == "v2"
+    assert manager.previous.model_version == "v1"
+    assert [s.model_version for s in swapped] == ["v2"]
+    assert manager.last_warmup_ms is not None
+
+    manager.rollback()
+    assert manager.current.model_version == "v1"
+    assert manager.previous.model_version == "v2"
+    assert manager.status()["rollbacks"] == 1
+
+
+def test_old_model_keeps_serving_until_new_one_is_warm():
+    gate = threading.Event()
+    manager, _ = make_manager([FakeServer("v2", gate=gate)])
+    manager.reload()
+    try:
+        assert manager.status()["state"] == "loading"
+        assert manager.current.model_version == "v1"
+        with pytest.raises(ReloadInProgressError):
+            manager.reload()
+    finally:
+        gate.set()
+    assert manager.wait(5)
+    assert manager.current.model_version == "v2"
+
+
+@pytest.mark.parametrize("candidate", [FakeServer("bad", loaded=False), FakeServer("nan", prob=float("nan"))])
+def test_failed_reload_keeps_current_model(candidate):
+    manager, swapped = make_manager([candidate])
+    assert manager.reload(wait=True) is False
+    status = manager.status()
+    assert status["state"] == "failed" and status["last_error"]
+    assert manager.current.model_version == "v1"
+    assert swapped == []
+    with pytest.raises(ValueError):
+        manager.rollback()
+
+
+def test_metadata_watcher_fires_on_change(tmp_path):
+    meta = tmp_path / "metadata.json"
+    meta.write_text('{"model_version": "v1"}')
+    calls = []
+    watcher = MetadataWatcher(str(meta), interval=60, on_change=lambda: calls.append(1))
+    assert watcher.poll() is False
+
+    meta.write_text('{"model_version": "v2-longer"}')
+    assert watcher.poll() is True
+    assert watcher.poll() is False
+    assert calls == [1]
@@ -0,0 +1,197 @@
+# tests/unit/test_model_search.py
+import json
+import random
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure experiments (and through them backend) are importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+EXPERIMENTS_DIR = ROOT / "experiments"
+if str(EXPERIMENTS_DIR) not in sys.path:
+    sys.path.insert(0, str(EXPERIMENTS_DIR))
+
+import model_search
+from model_search import Candidate, VectorizerConfig, expand_grid, run_search, select_candidate, vectorize_cached
+
+FAKE_WORDS = ["shocking", "secret", "miracle", "cure", "celebrity", "hoax", "leaked", "aliens"]
+REAL_WORDS = ["parliament", "budget", "minister", "bank", "rates", "committee", "report", "election"]
+SHARED_WORDS = ["people", "today", "week", "city", "news", "said"]
+
+
+def _synthetic(n, seed=0):
+    """Letter-only articles whose label is mostly, not always, given away by their words."""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for i in range(n):
+        label = "FAKE" if i % 2 else "REAL"
+        own, other = (FAKE_WORDS, REAL_WORDS) if label == "FAKE" else (REAL_WORDS, FAKE_WORDS)
+        words = rng.choices(own, k=4) + rng.choices(other, k=2) + rng.choices(SHARED_WORDS, k=6)
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+        labels.append(label)
+    return texts, np.array(labels)
+
+
+@pytest.fixture
+def splits():
+    texts, labels = _synthetic(160)
+    return (
+        {"train": texts[:100], "val": texts[100:130], "test": texts[130:]},
+        {"train": labels[:100], "val": labels[100:130]},
+    )
+
+
+@pytest.fixture
+def counted_builds(monkeypatch):
+    builds = []
+    real_build = VectorizerConfig.build
+
+    def build(self):
+        builds.append(self.name)
+        return real_build(self)
+
+    monkeypatch.setattr(VectorizerConfig, "build", build)
+    return builds
+
+
+def test_expand_grid_crosses_vectorizers_classifiers_and_params():
+    unigrams, bigrams = VectorizerConfig("tfidf", (1, 1), 500), VectorizerConfig("tfidf", (1, 2), 500)
+    candidates = expand_grid(["logreg", "sgd"], [unigrams, bigrams], {"logreg": {"C": [0.5, 2.0]}})
+
+    assert [c.name for c in candidates] == [
+        "tfidf-11-500/logreg(C=0.5)",
+        "tfidf-11-500/logreg(C=2.0)",
+        "tfidf-11-500/sgd(alpha=1e-05)",
+        "tfidf-11-500/sgd(alpha=0.0001)",
+        "tfidf-12-500/logreg(C=0.5)",
+        "tfidf-12-500/logreg(C=2.0)",
+        "tfidf-12-500/sgd(alpha=1e-05)",
+        "tfidf-12-500/sgd(alpha=0.0001)",
+    ]
+    assert candidates[0].vectorizer is unigrams and candidates[0].params == {"C": 0.5}
+    assert len(expand_grid(["complement_nb"], [unigrams])) == len(model_search.DEFAULT_GRIDS["complement_nb"]["alpha"])
+    with pytest.raises(ValueError):
+        model_search.build_classifier("svm", {})
+
+
+def test_vectorize_cached_reuses_features(tmp_path, splits, counted_builds):
+    config = VectorizerConfig("tfidf", (1, 2), 200)
+    first = vectorize_cached(config, splits[0], tmp_path)
+    second = vectorize_cached(config, splits[0], tmp_path)
+
+    assert counted_builds == [config.name]
+    assert len(list(tmp_path.glob("*.joblib"))) == 1
+    for name in ("train", "val", "test"):
+        assert (first[name] != second[name]).nnz == 0
+    assert second["vectorizer"].vocabulary_ == first["vectorizer"].vocabulary_
+
+
+def test_vectorize_cached_invalidates_on_new_texts_or_settings(tmp_path, splits, counted_builds):
+    config = VectorizerConfig("tfidf", (1, 1), 200)
+    vectorize_cached(config, splits[0], tmp_path)
+
+    # Different preprocessing output for the same rows
+    changed = dict(splits[0], train=[t.upper().lower() + " extra" for t in splits[0]["train"]])
+    vectorize_cached(config, changed, tmp_path)
+    # Different vectorizer settings on the same texts
+    vectorize_cached(VectorizerConfig("tfidf", (1, 1), 100), splits[0], tmp_path)
+    vectorize_cached(VectorizerConfig("tfidf", (1, 2), 200), splits[0], tmp_path)
+
+    assert len(counted_builds) == 4
+    assert len(list(tmp_path.glob("*.joblib"))) == 4
+    vectorize_cached(config, splits[0], tmp_path)  # the original entry is still valid
+    assert len(counted_builds) == 4
+
+
+def _result(name, accuracy, latency, size=1000, classifier="logreg"):
+    return {
+        "name": name, "classifier": classifier, "cv_accuracy_mean": accuracy, "latency_us_p50": latency,
+        "vectorizer_bytes": size, "model_bytes": 0,
+    }
+
+
+def test_select_candidate_prefers_accuracy_then_cost():
+    results = [_result("slow-best", 0.90, 500.0), _result("fast-worse", 0.85, 100.0)]
+    assert select_candidate(results, tolerance=0.01)["name"] == "slow-best"
+    # A faster candidate within tolerance wins
+    assert select_candidate(results, tolerance=0.05)["name"] == "fast-worse"
+
+    # Latency differences within LATENCY_TIE are noise: the more accurate one wins
+    tied = [_result("a", 0.880, 100.0), _result("b", 0.884, 105.0), _result("c", 0.884, 105.0, size=10)]
+    assert select_candidate(tied, tolerance=0.01)["name"] == "c"
+
+
+def test_select_candidate_skips_models_without_coefficients_unless_allowed():
+    results = [_result("nb", 0.95, 50.0, classifier="complement_nb"), _result("lr", 0.90, 100.0)]
+    assert select_candidate(results, tolerance=0.0)["name"] == "lr"
+    assert select_candidate(results, tolerance=0.0, allow_nonlinear=True)["name"] == "nb"
+    with pytest.raises(ValueError):
+        select_candidate(results[:1])
+
+
+def test_run_search_scores_every_candidate_and_selects_the_best(tmp_path, splits):
+    vectorizers = [VectorizerConfig("tfidf", (1, 1), 200), VectorizerConfig("tfidf", (1, 2), 200)]
+    candidates = expand_grid(["logreg", "complement_nb"], vectorizers, {"logreg": {"C": [1.0]}, "complement_nb": {"alpha": [1.0]}})
+    results, fitted = run_search(candidates, splits[0], splits[1], cv_folds=3, n_jobs=1, cache_dir=tmp_path)
+
+    assert [r["name"] for r in results] == [c.name for c in candidates]
+    for r in results:
+        assert 0.0 <= r["cv_accuracy_mean"] <= 1.0 and r["latency_us_p50"] > 0
+        assert r["scorer"] == ("numpy" if r["classifier"] == "logreg" else "sklearn")
+    assert any(r["pareto"] for r in results)
+
+    chosen = select_candidate(results, tolerance=0.0)
+    assert chosen["classifier"] == "logreg"
+    assert chosen["cv_accuracy_mean"] == max(r["cv_accuracy_mean"] for r in results if r["classifier"] == "logreg")
+    vectorizer, model, _ = fitted[chosen["name"]]
+    assert model.predict(vectorizer.transform(splits[0]["test"])).shape == (len(splits[0]["test"]),)
+
+
+def test_train_baseline_search_ships_the_selected_candidate(tmp_path):
+    import train_baseline
+
+    texts, labels = _synthetic(200, seed=3)
+    data_path = tmp_path / "data.csv"
+    pd.DataFrame({"title": [""] * len(texts), "content": texts, "label": labels}).to_csv(data_path, index=False)
+    out_dir = tmp_path / "artifacts"
+    args = train_baseline.parse_args([
+        "--data-path", str(data_path), "--out-dir", str(out_dir), "--n-jobs", "1",
+        "--cache-dir", str(tmp_path / "preprocessed"), "--feature-cache-dir", str(tmp_path / "features"),
+        "--search", "--search-ngram-ranges", "1-1", "1-2", "--search-max-features", "300",
+        "--search-classifiers", "logreg", "sgd", "--search-C", "1", "--cv-folds", "3", "--search-tolerance", "0",
+    ])
+    train_baseline.main(args)
+
+    metadata = json.loads((out_dir / "metadata.json").read_text())
+    search = metadata["search"]
+    assert len(search["candidates"]) == 2 * (1 + 2)
+    best = max(c["cv_accuracy_mean"] for c in search["candidates"])
+    chosen = next(c for c in search["candidates"] if c["name"] == search["selected"])
+    assert chosen["cv_accuracy_mean"] == best
+    assert metadata["ngram_range"] == chosen["ngram_range"]
+    assert (out_dir / "model.pkl").exists() and (out_dir / "compact").is_dir()
+
+
+def test_train_baseline_refuses_models_it_cannot_serve(tmp_path):
+    import train_baseline
+
+    texts, labels = _synthetic(120, seed=4)
+    data_path = tmp_path / "data.csv"
+    pd.DataFrame({"title": [""] * len(texts), "content": texts, "label": labels}).to_csv(data_path, index=False)
+    out_dir = tmp_path / "artifacts"
+    argv = [
+        "--data-path", str(data_path), "--out-dir", str(out_dir), "--n-jobs", "1",
+        "--cache-dir", str(tmp_path / "preprocessed"), "--feature-cache-dir", str(tmp_path / "features"),
+        "--search", "--search-ngram-ranges", "1-1", "--search-max-features", "300",
+        "--search-classifiers", "complement_nb", "--cv-folds", "3",
+    ]
+    with pytest.raises(SystemExit):
+        train_baseline.parse_args(argv)  # needs --allow-nonlinear
+
+    # Selectable with the flag, but the compact export fails the run instead of being skipped
+    with pytest.raises(SystemExit, match="compact"):
+        train_baseline.main(train_baseline.parse_args(argv + ["--allow-nonlinear"]))
+    assert not (out_dir / "model.pkl").exists() and not (out_dir / "compact").exists()
@@ -0,0 +1,98 @@
+# tests/unit/test_near_dup.py
+import sys
+from pathlib import Path
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import db
+from near_dup import IndexedPrediction, MinHasher, NearDuplicateIndex, choose_bands
+
+STORY = " ".join(
+    f"minister announced budget plan week {w} parliament committee reviewed spending proposal"
+    for w in ("one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten")
+)
+EDITED = "reporter jane doe " + STORY + " subscribe newsletter"
+OTHER = " ".join(f"celebrity secret miracle cure shocking claim number {w}" for w in ("one", "two", "three", "four"))
+
+
+def _entry(pid, index, text, version="v1"):
+    return IndexedPrediction(pid, "REAL", 0.9, ["budget", "minister"], version, index.signature(text))
+
+
+def test_minhash_similarity_tracks_shingle_overlap():
+    hasher = MinHasher(128)
+    sig = hasher.signature(STORY)
+    assert MinHasher.similarity(sig, hasher.signature(STORY)) == 1.0
+    assert MinHasher.similarity(sig, hasher.signature(EDITED)) > 0.8
+    assert MinHasher.similarity(sig, hasher.signature(OTHER)) < 0.2
+    assert hasher.signature("") is None
+
+
+def test_choose_bands_puts_lsh_midpoint_below_threshold():
+    bands, rows = choose_bands(64, 0.8)
+    assert bands * rows == 64
+    assert (1.0 / bands) ** (1.0 / rows) <= 0.8
+
+
+def test_index_finds_edited_copy_only_for_same_model_version():
+    index = NearDuplicateIndex(threshold=0.8, num_perm=64)
+    index.add(_entry("first", index, STORY))
+
+    match = index.query(index.signature(EDITED), "v1")
+    assert match is not None
+    entry, similarity = match
+    assert entry.prediction_id == "first" and similarity >= 0.8
+    assert index.query(index.signature(EDITED), "v2") is None
+    assert index.query(index.signature(OTHER), "v1") is None
+    assert index.stats()["hits"] == 1
+
+
+def test_index_evicts_oldest_entries():
+    index = NearDuplicateIndex(threshold=0.8, num_perm=64, max_entries=1)
+    index.add(_entry("old", index, STORY))
+    index.add(_entry("new", index, OTHER))
+    assert index.stats()["entries"] == 1
+    assert index.query(index.signature(STORY), "v1") is None
+    assert index.query(index.signature(OTHER), "v1")[0].prediction_id == "new"
+
+
+def test_index_rebuilds_from_history_and_backfills(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    db.init_db()
+    index = NearDuplicateIndex(threshold=0.8, num_perm=64)
+    record = {
+        "prediction_id": "stored",
+        "content": STORY,
+        "label": "REAL",
+        "probability": 0.9,
+        "model_version": "v1",
+        "top_tokens": ["budget"],
+        "created_at": "2025-01-01T00:00:00Z",
+        "minhash": index.signature(STORY).tobytes(),
+    }
+    legacy = dict(record, prediction_id="legacy", content=OTHER, minhash=None, created_at="2025-01-01T00:00:01Z")
+    db.insert_predictions([record, legacy])
+
+    assert index.load(db.fetch_minhash_rows(100)) == 1
+    assert index.query(index.signature(EDITED), "v1")[0].top_tokens == ["budget"]
+
+    assert db.backfill_minhash(lambda title, content: index.signature(content)) == 1
+    rebuilt = NearDuplicateIndex(threshold=0.8, num_perm=64)
+    assert rebuilt.load(db.fetch_minhash_rows(100)) == 2
+    assert rebuilt.query(rebuilt.signature(OTHER), "v1")[0].prediction_id == "legacy"
+
+
+def test_index_removes_entries_and_their_buckets():
+    index = NearDuplicateIndex(threshold=0.8, num_perm=64)
+    index.add(_entry("story", index, STORY))
+    index.add(_entry("other", index, OTHER))
+
+    assert index.remove(["story", "never-indexed"]) == 1
+    assert index.prediction_ids() == ["other"]
+    assert index.query(index.signature(EDITED), "v1") is None
+    assert all("story" not in bucket for bucket in index._buckets.values())
+    assert index.query(index.signature(OTHER), "v1")[0].prediction_id == "other"
@@ -0,0 +1,171 @@
+# tests/unit/test_online_learner.py
+import json
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+import pytest
+
+# Ensure backend is importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+import db
+from compact import load_compact
+from online_learner import OnlineLearner, UnsupportedModelError, sgd_from_linear
+
+TRAIN_TEXTS = [
+    "shocking secret cure doctor hate",
+    "celebrity secret miracle shocking claim",
+    "parliament passed budget bill monday",
+    "central bank raised interest rate",
+]
+TRAIN_LABELS = ["FAKE", "FAKE", "REAL", "REAL"]
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    db.init_db()
+    out = tmp_path / "artifacts"
+    out.mkdir()
+    tfidf = TfidfVectorizer()
+    model = LogisticRegression(max_iter=1000).fit(tfidf.fit_transform(TRAIN_TEXTS), TRAIN_LABELS)
+    joblib.dump(tfidf, out / "tfidf.pkl")
+    joblib.dump(model, out / "model.pkl")
+    (out / "metadata.json").write_text(json.dumps({"model_version": "base_v1", "vectorizer": "tfidf"}))
+    return out
+
+
+def _label(prediction_id, content, label):
+    db.insert_prediction({
+        "prediction_id": prediction_id,
+        "title": None,
+        "content": content,
+        "label": "REAL",
+        "probability": 0.6,
+        "model_version": "base_v1",
+        "top_tokens": [],
+        "created_at": "2025-01-01T00:00:00Z",
+    })
+    return db.record_feedback(prediction_id, label, "2025-01-02T00:00:00Z")
+
+
+def test_sgd_starts_with_the_linear_model_probabilities(artifacts_dir):
+    tfidf = joblib.load(artifacts_dir / "tfidf.pkl")
+    model = joblib.load(artifacts_dir / "model.pkl")
+    X = tfidf.transform(TRAIN_TEXTS)
+    assert np.allclose(sgd_from_linear(model).predict_proba(X), model.predict_proba(X))
+
+    multinomial = LogisticRegression(max_iter=1000, multi_class="multinomial").fit(X, TRAIN_LABELS)
+    assert np.allclose(sgd_from_linear(multinomial).predict_proba(X), multinomial.predict_proba(X))
+
+
+def test_sgd_base_is_rebuilt_with_the_online_settings(artifacts_dir):
+    X = joblib.load(artifacts_dir / "tfidf.pkl").transform(TRAIN_TEXTS)
+    base = SGDClassifier(loss="log_loss", alpha=1e-3, random_state=0).fit(X, TRAIN_LABELS)
+
+    sgd = sgd_from_linear(base, learning_rate=0.25, alpha=1e-6)
+    assert sgd is not base
+    assert (sgd.learning_rate, sgd.eta0, sgd.alpha) == ("constant", 0.25, 1e-6)
+    assert np.allclose(sgd.predict_proba(X), base.predict_proba(X))
+
+
+def test_base_without_coefficients_disables_the_learner_once(artifacts_dir, caplog):
+    from sklearn.naive_bayes import ComplementNB
+
+    X = joblib.load(artifacts_dir / "tfidf.pkl").transform(TRAIN_TEXTS)
+    joblib.dump(ComplementNB().fit(X, TRAIN_LABELS), artifacts_dir / "model.pkl")
+    with pytest.raises(UnsupportedModelError):
+        sgd_from_linear(joblib.load(artifacts_dir / "model.pkl"))
+
+    learner = OnlineLearner(artifacts_dir, batch_size=1)
+    with caplog.at_level("WARNING", logger="online-learner"):
+        learner.start(3600)
+        assert learner.status()["disabled"] and learner._thread is None
+        _label("p1", "central bank miracle", "FAKE")
+        assert learner.run_once() is None and learner.run_once() is None
+    assert len([r for r in caplog.records if "disabled" in r.getMessage()]) == 1
+    assert not [r for r in caplog.records if r.levelname == "ERROR"]
+
+
+def test_step_waits_for_a_full_batch(artifacts_dir):
+    learner = OnlineLearner(artifacts_dir, batch_size=3)
+    _label("p1", "central bank secret miracle", "FAKE")
+    assert learner.step() is None
+    assert json.loads((artifacts_dir / "metadata.json").read_text())["model_version"] == "base_v1"
+
+
+def test_step_trains_on_new_feedback_and_publishes_a_version(artifacts_dir):
+    learner = OnlineLearner(artifacts_dir, batch_size=2, passes=5, learning_rate=0.5)
+    tfidf = joblib.load(artifacts_dir / "tfidf.pkl")
+    probe = tfidf.transform(["central bank miracle"])
+    before = joblib.load(artifacts_dir / "model.pkl").predict_proba(probe)[0]
+
+    for i in range(4):
+        _label(f"p{i}", "central bank miracle", "FAKE")
+    assert learner.step() == "base_v1+online1"
+
+    published = joblib.load(artifacts_dir / "model.pkl")
+    fake = list(published.classes_).index("FAKE")
+    assert published.predict_proba(probe)[0][fake] > before[fake]
+
+    metadata = json.loads((artifacts_dir / "metadata.json").read_text())
+    assert metadata["model_version"] == "base_v1+online1"
+    assert metadata["online"]["samples"] == 4
+    vectorizer, compact_model, _ = load_compact(str(artifacts_dir / "compact"))
+    assert compact_model.predict_proba(vectorizer.transform(["central bank miracle"]))[0] == pytest.approx(
+        published.predict_proba(probe)[0]
+    )
+
+    # Only feedback after the cursor is used
+    assert learner.step() is None
+    _label("p9", "secret cure", "FAKE")
+    assert db.record_feedback("p0", "REAL", "2025-01-03T00:00:00Z") is not None  # relabel counts as new
+    assert OnlineLearner(artifacts_dir, batch_size=2).step() == "base_v1+online2"
+
+
+def test_new_base_model_restarts_the_learner(artifacts_dir):
+    learner = OnlineLearner(artifacts_dir, batch_size=1)
+    _label("p1", "central bank miracle", "FAKE")
+    assert learner.step() == "base_v1+online1"
+
+    # A full retrain publishes a fresh base
+    (artifacts_dir / "metadata.json").write_text(json.dumps({"model_version": "base_v2"}))
+    joblib.dump(
+        LogisticRegression(max_iter=1000).fit(joblib.load(artifacts_dir / "tfidf.pkl").transform(TRAIN_TEXTS), TRAIN_LABELS),
+        artifacts_dir / "model.pkl",
+    )
+    _label("p2", "secret cure", "FAKE")
+    assert learner.step() == "base_v2+online1"
+    assert learner.state["samples"] == 1
+
+
+def test_retrain_with_the_same_version_restarts_the_learner(artifacts_dir):
+    learner = OnlineLearner(artifacts_dir, batch_size=1)
+    _label("p1", "central bank miracle", "FAKE")
+    assert learner.step() == "base_v1+online1"
+
+    # train_baseline.py keeps model_version unless told otherwise, and the vocabulary changes
+    texts = TRAIN_TEXTS + ["senate approved new trade agreement", "aliens secretly control weather"]
+    labels = TRAIN_LABELS + ["REAL", "FAKE"]
+    tfidf = TfidfVectorizer()
+    retrained = LogisticRegression(max_iter=1000).fit(tfidf.fit_transform(texts), labels)
+    joblib.dump(tfidf, artifacts_dir / "tfidf.pkl")
+    joblib.dump(retrained, artifacts_dir / "model.pkl")
+    (artifacts_dir / "metadata.json").write_text(json.dumps({"model_version": "base_v1", "vectorizer": "tfidf"}))
+
+    _label("p2", "senate trade miracle", "FAKE")
+    assert learner.step() == "base_v1+online1"
+    assert learner.state["samples"] == 1
+    published = joblib.load(artifacts_dir / "model.pkl")
+    assert published.coef_.shape[1] == len(tfidf.vocabulary_)
+
+    # A fresh process resumes from the saved state instead of starting over again
+    _label("p3", "aliens weather", "FAKE")
+    assert OnlineLearner(artifacts_dir, batch_size=1).step() == "base_v1+online2"
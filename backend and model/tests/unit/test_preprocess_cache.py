@@ -0,0 +1,81 @@
+# tests/unit/test_preprocess_cache.py
+import shutil
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure experiments (and through them backend) are importable when running pytest from project root
+ROOT = Path(__file__).resolve().parents[2]  # project-root/tests/unit -> go up two
+EXPERIMENTS_DIR = ROOT / "experiments"
+if str(EXPERIMENTS_DIR) not in sys.path:
+    sys.path.insert(0, str(EXPERIMENTS_DIR))
+
+import preprocess_cache
+from preprocess_cache import dataset_hash, preprocess_corpus, preprocessing_code_version
+from preprocessing import preprocess_fast
+
+TEXTS = [
+    "The Central Bank RAISED rates; see http://example.com/rates for details.",
+    "<p>Shocking secret cure</p> doctors hate, mail tips@example.org",
+    "Running dogs were running faster than the wolves",
+    "",
+]
+
+
+@pytest.fixture
+def counted_runs(monkeypatch):
+    runs = []
+    real = preprocess_cache._preprocess_all
+
+    def run(texts, n_jobs):
+        runs.append(len(texts))
+        return real(texts, n_jobs)
+
+    monkeypatch.setattr(preprocess_cache, "_preprocess_all", run)
+    return runs
+
+
+def test_cached_output_equals_direct_preprocessing(tmp_path, counted_runs):
+    expected = [preprocess_fast(t) for t in TEXTS]
+    assert preprocess_corpus(TEXTS, n_jobs=1, cache_dir=tmp_path) == expected
+    assert preprocess_corpus(TEXTS, n_jobs=1, cache_dir=tmp_path) == expected  # from the cache
+    assert counted_runs == [len(TEXTS)]
+    assert len(list(tmp_path.glob("*.joblib"))) == 1
+
+    # The parallel path (used from 1000 texts on) gives the same, in order
+    many = [f"{t} number {i}" for i in range(300) for t in TEXTS]
+    assert preprocess_corpus(many, n_jobs=2, cache_dir=None) == [preprocess_fast(t) for t in many]
+
+
+def test_changed_texts_miss_the_cache(tmp_path, counted_runs):
+    preprocess_corpus(TEXTS, n_jobs=1, cache_dir=tmp_path)
+    preprocess_corpus(TEXTS[:-1], n_jobs=1, cache_dir=tmp_path)
+    preprocess_corpus(TEXTS[:-2] + [TEXTS[-1], TEXTS[-2]], n_jobs=1, cache_dir=tmp_path)  # order matters
+    assert counted_runs == [4, 3, 4]
+    # Length-prefixed, so moving text across a boundary changes the hash
+    assert dataset_hash(["ab", "c"]) != dataset_hash(["a", "bc"])
+
+
+def test_changed_preprocessing_code_misses_the_cache(tmp_path, monkeypatch, counted_runs):
+    code_dir = tmp_path / "backend"
+    code_dir.mkdir()
+    for name in preprocess_cache._CODE_FILES:
+        shutil.copy(preprocess_cache.BACKEND_DIR / name, code_dir / name)
+    monkeypatch.setattr(preprocess_cache, "BACKEND_DIR", code_dir)
+    cache_dir = tmp_path / "cache"
+
+    before = preprocessing_code_version()
+    preprocess_corpus(TEXTS, n_jobs=1, cache_dir=cache_dir)
+    with open(code_dir / "preprocessing.py", "a", encoding="utf-8") as fh:
+        fh.write("\n# changed\n")
+    assert preprocessing_code_version() != before
+    preprocess_corpus(TEXTS, n_jobs=1, cache_dir=cache_dir)
+
+    assert counted_runs == [4, 4]
+    assert len(list(cache_dir.glob("*.joblib"))) == 2
+
+
+def test_no_cache_dir_always_preprocesses(tmp_path, counted_runs):
+    preprocess_corpus(TEXTS, n_jobs=1, cache_dir=None)
+    preprocess_corpus(TEXTS, n_jobs=1, cache_dir=None)
+    assert counted_runs == [4, 4]
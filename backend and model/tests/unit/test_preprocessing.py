@@ -17,6 +17,9 @@ from preprocessing import (
     lemmatize,
     normalize_for_vectorizer,
     preprocess_for_vectorizer,
+    PreprocessingEngine,
+    StreamingPreprocessor,
+    preprocess_fast,
 )
 
 
@@ -71,3 +74,113 @@ def test_normalize_for_vectorizer_and_pipeline_end_to_end():
     # tokens separated by single space
     assert "  " not in prepped
     assert len(prepped.split()) >= 1
+
+
+
+EQUIVALENCE_CASES = [
+    "",
+    "   ",
+    "<p>The QUICK brown foxes, running fast! Visit: http://x</p>",
+    "Contact foo@http://bar.com or <a href=http://x.com>link</a> now",
+    "www.example.com/path?q=1 and WWW.Shout.com plus ww.w.not",
+    "a<b and x>y with unclosed <tag and stray @ signs @@",
+    "Tabs\tand\r\nnewlines\n\nwith   spaces",
+    "Istanbul İstanbul straße ﬁne émigré naïve café",
+    "Numbers 123 mixed4in5words and don't it's we'll",
+    "The wolves and geese were running better than the cars",
+    12345,
+]
+
+
+@pytest.mark.parametrize("raw", EQUIVALENCE_CASES)
+def test_fast_engine_matches_reference_pipeline(raw):
+    engine = PreprocessingEngine(lemma_cache_size=16)
+    assert engine.preprocess(raw) == preprocess_for_vectorizer(raw)
+
+
+def test_fast_engine_matches_reference_on_random_text():
+    import random
+
+    pieces = ["http://a.b/c", "www.x.com", "me@dom.com", "<b>", "</p>", "<a href=http://x>",
+              "Running", "CARS", "the", "\n", "\t", "123", "!?", "wolves", "émigré", "@", " "]
+    rng = random.Random(0)
+    engine = PreprocessingEngine()
+    for _ in range(500):
+        raw = "".join(rng.choice(pieces) + rng.choice(["", " "]) for _ in range(rng.randint(0, 15)))
+        assert engine.preprocess(raw) == preprocess_for_vectorizer(raw)
+
+
+def test_fast_engine_lemma_cache_is_bounded_and_counted():
+    engine = PreprocessingEngine(lemma_cache_size=2)
+    engine.preprocess("cars cars cars")
+    stats = engine.cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+    engine.preprocess("wolves geese houses")
+    assert engine.cache_stats()["size"] <= 2
+
+
+def test_offline_bundle_matches_wordnet_lemmatizer(tmp_path):
+    from nltk.stem import WordNetLemmatizer
+    from nltk_bundle import build_bundle, load_bundle
+
+    path = tmp_path / "bundle.json.gz"
+    build_bundle(str(path))
+    stop_words, lemmatizer = load_bundle(str(path))
+
+    from nltk.corpus import stopwords
+    assert stop_words == frozenset(stopwords.words("english"))
+
+    reference = WordNetLemmatizer()
+    words = ["cars", "wolves", "geese", "running", "better", "studies", "boxes", "churches",
+             "women", "mice", "analyses", "news", "was", "glasses", "knives", "xyzzy", "a", ""]
+    for word in words:
+        assert lemmatizer.lemmatize(word) == reference.lemmatize(word), word
+
+
+def test_streaming_preprocessor_matches_whole_text_for_any_chunking():
+    import random
+
+    text = (
+        "Visit http://example.com/a?b=c now! <a href=\"x y\">Click HERE</a> mail me@x.org. "
+        "The Central Bank raised rates; www.site.org was down.\n<div\nclass='long tag'>Running dogs</div> "
+    ) * 20
+    expected = preprocess_fast(text).split()
+    rng = random.Random(7)
+    for _ in range(50):
+        streamer = StreamingPreprocessor()
+        tokens, i = [], 0
+        while i < len(text):
+            step = rng.randint(1, 120)
+            tokens += streamer.feed(text[i:i + step])
+            i += step
+        tokens += streamer.finish()
+        assert tokens == expected
+        assert streamer.chars == len(text)
+
+
+def test_streaming_preprocessor_matches_whole_text_with_stray_angle_brackets():
+    import random
+
+    rng = random.Random(11)
+    pieces = ["a < b", "<", ">", "x<y", "<p class='a b'>", "if a<b and c<d then", "word",
+              "tagged <span\n id=1>text</span>", "<<double>>", "3 < 4 > 2", "\n", " ",
+              "<b\n>x<\n\n>>", "<a href=http://x.org/a>link", "WWW.X.ORG>y", "me@x.org>z", "<>"]
+    for _ in range(300):
+        text = " ".join(rng.choice(pieces) for _ in range(rng.randint(1, 30)))
+        expected = preprocess_fast(text).split()
+        streamer = StreamingPreprocessor(max_carry=10 ** 6)
+        tokens, i = [], 0
+        while i < len(text):
+            step = rng.randint(1, 12)
+            tokens += streamer.feed(text[i:i + step])
+            i += step
+        tokens += streamer.finish()
+        assert tokens == expected, text
+
+
+def test_streaming_preprocessor_carry_is_bounded():
+    streamer = StreamingPreprocessor(max_carry=100)
+    streamer.feed("<" + "x" * 500)  # unclosed tag / endless word is not held forever
+    assert len(streamer._carry) <= 100
+